@@ -0,0 +1,73 @@
+"""Measure the import time of funalone with `python -X importtime`.
+
+Every statement runs in a fresh interpreter, several times, and the median
+cumulative import time of the modules it imports is reported.
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import funalone",
+    "from funalone import create_namespaced_function_clone",
+    "from funalone import AllowModulePrefix",
+    "from funalone import IsolatedFunctionClone",
+]
+
+
+def import_time(statement: str, baseline: set[str]) -> int:
+    """Return the microseconds spent importing modules in `statement`, other
+    than those in `baseline`, which the interpreter imports at startup."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    total = 0
+    for line in stderr.splitlines():
+        # Lines look like `import time:  self [us] | cumulative | module`, and
+        # top-level imports are the ones with a single space of indentation.
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, module = line.removeprefix("import time:").split("|")
+        if module.startswith(" ") and not module.startswith("  "):
+            if module.strip() not in baseline:
+                total += int(cumulative)
+    return total
+
+
+def _imported_modules(statement: str) -> set[str]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = _imported_modules("pass")
+    for statement in STATEMENTS:
+        times = [import_time(statement, baseline) for _ in range(args.runs)]
+        print(f"{statement:<56} {statistics.median(times) / 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare running isolated tests serially, in subinterpreters and in a
+process pool.
+
+Every test clones and calls a function many times, so the run is CPU bound.
+Subinterpreters need Python 3.12 or later, with their own GIL.
+
+Usage:
+    python benchmarks/subinterpreter_runner.py [--tests N] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from funalone.interpreters import (
+    SubinterpreterRunner,
+    run_tests,
+    subinterpreters_available,
+)
+
+
+def repeated_test():
+    """The benchmarked test. Runs an isolated test many times."""
+    from test.utils import passing_isolated_test
+
+    for _ in range(200):
+        passing_isolated_test()
+
+
+def process_pool_run(test_ids: list[str], workers: int) -> float:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        batches = [test_ids[index::workers] for index in range(workers)]
+        list(executor.map(run_tests, batches))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tests", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # The benchmarked test is referenced through this script's module.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    test_ids = ["subinterpreter_runner:repeated_test"] * args.tests
+
+    serial = SubinterpreterRunner(workers=1).run(test_ids)
+    assert serial.succeeded, serial.summary()
+    print(f"serial:          {serial.duration:8.3f}s")
+
+    if subinterpreters_available():
+        report = SubinterpreterRunner(workers=args.workers).run(test_ids)
+        assert report.succeeded, report.summary()
+        print(
+            f"subinterpreters: {report.duration:8.3f}s "
+            f"({serial.duration / report.duration:.2f}x, {report.workers} workers)"
+        )
+    else:
+        print("subinterpreters: not available, they need Python 3.12 or later")
+
+    duration = process_pool_run(test_ids, args.workers)
+    print(
+        f"process pool:    {duration:8.3f}s "
+        f"({serial.duration / duration:.2f}x, {args.workers} workers)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure how calls to a single isolated clone scale with threads.
+
+Every thread calls the same clone in a loop, so all of them access the same
+context. On free-threaded builds (like `python3.13t`) throughput should grow
+with the number of threads, while with the GIL it stays roughly flat.
+
+Usage:
+    python benchmarks/threaded_access.py [--calls N] [--threads 1 2 4 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from funalone import IsolatedFunctionClone
+
+
+def call_dependencies(items: list[int]) -> list:
+    """The benchmarked function. Accesses a mocked global once per item."""
+    return [check(item) for item in items]  # noqa: F821
+
+
+def calls_per_second(threads: int, calls: int) -> float:
+    """Return the calls per second of `threads` threads, each making `calls`
+    calls to the same clone."""
+    clone = IsolatedFunctionClone(call_dependencies).prewarm()
+    items = list(range(10))
+
+    def call_many():
+        for _ in range(calls):
+            clone(items)
+
+    with ThreadPoolExecutor(threads) as executor:
+        start = time.perf_counter()
+        for future in [executor.submit(call_many) for _ in range(threads)]:
+            future.result()
+        duration = time.perf_counter() - start
+
+    expected = threads * calls * len(items)
+    accesses = clone.context.to_debug_dict()["check"].metadata.total_access_count
+    assert accesses == expected, f"Counted {accesses} accesses, not {expected}."
+    return threads * calls / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'on' if is_gil_enabled else 'off'}")
+    baseline = None
+    for threads in args.threads:
+        throughput = calls_per_second(threads, args.calls)
+        baseline = baseline or throughput
+        print(
+            f"{threads:>3} threads: {throughput:>10,.0f} calls/s "
+            f"({throughput / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,51 @@
-from .isolated_function_clone import IsolatedFunctionClone
-from .namespaced_function import create_namespaced_function_clone
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .isolated_function_clone import IsolatedFunctionClone
+    from .isolated_test_case import IsolatedTestCase, isolated_clone
+    from .name_rules import (
+        AllowModulePrefix,
+        AllowNameGlob,
+        AllowNameRegex,
+        AllowType,
+    )
+    from .namespaced_function import create_namespaced_function_clone
+
+# The public API is imported on first access, so workers that only use part of
+# it don't pay for `unittest.mock` and the rest of the package at startup.
+_LAZY_EXPORTS = {
+    "AllowModulePrefix": ".name_rules",
+    "AllowNameGlob": ".name_rules",
+    "AllowNameRegex": ".name_rules",
+    "AllowType": ".name_rules",
+    "create_namespaced_function_clone": ".namespaced_function",
+    "IsolatedFunctionClone": ".isolated_function_clone",
+    "IsolatedTestCase": ".isolated_test_case",
+    "isolated_clone": ".isolated_test_case",
+}
 
 __all__ = [
+    "AllowModulePrefix",
+    "AllowNameGlob",
+    "AllowNameRegex",
+    "AllowType",
     "create_namespaced_function_clone",
     "IsolatedFunctionClone",
+    "IsolatedTestCase",
+    "isolated_clone",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
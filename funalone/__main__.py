@@ -0,0 +1,32 @@
+"""The command line interface of funalone.
+
+Usage:
+    python -m funalone scan <package> [<package> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from funalone import scan
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m funalone")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan.add_arguments(
+        commands.add_parser(
+            "scan",
+            help="Report how isolated clones would resolve the global names of "
+            "every function and method of packages.",
+        )
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.command == "scan":
+        return scan.run(arguments)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
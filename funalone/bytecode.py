@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import dis
+from collections.abc import Callable, Iterator
+from functools import wraps
+from types import CodeType
+from typing import TypeVar
+from weakref import WeakKeyDictionary
+
+_GLOBAL_LOAD_OPNAMES = frozenset({"LOAD_GLOBAL", "LOAD_NAME"})
+_ATTRIBUTE_LOAD_OPNAMES = frozenset({"LOAD_ATTR", "LOAD_METHOD"})
+
+
+T = TypeVar("T")
+
+
+def _cache_by_code(function: Callable[[CodeType], T]) -> Callable[[CodeType], T]:
+    """Cache the results of a function of a code object.
+
+    Code objects are held weakly, so the cache doesn't keep them alive.
+    """
+    cache: WeakKeyDictionary[CodeType, T] = WeakKeyDictionary()
+
+    @wraps(function)
+    def cached(code: CodeType) -> T:
+        try:
+            return cache[code]
+        except KeyError:
+            result = cache[code] = function(code)
+            return result
+
+    return cached
+
+
+def iter_code_objects(code: CodeType) -> Iterator[CodeType]:
+    """Yield a code object and all the code objects nested in it.
+
+    Nested code objects are those of comprehensions, lambdas, inner functions
+    and classes defined in the body of the given code.
+    """
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from iter_code_objects(const)
+
+
+@_cache_by_code
+def global_names(code: CodeType) -> frozenset[str]:
+    """Return the global names loaded by a code object or its nested code."""
+    return frozenset(
+        instruction.argval
+        for nested_code in iter_code_objects(code)
+        for instruction in dis.get_instructions(nested_code)
+        if instruction.opname in _GLOBAL_LOAD_OPNAMES
+    )
+
+
+@_cache_by_code
+def global_attribute_chains(code: CodeType) -> dict[str, frozenset[tuple[str, ...]]]:
+    """Return the attribute chains accessed on globals by a code object.
+
+    Scans `LOAD_GLOBAL` instructions followed by `LOAD_ATTR` or `LOAD_METHOD`
+    instructions in the code object and its nested code objects. For example,
+    `os.path.join(a, b)` results in `{"os": frozenset({("path", "join")})}`.
+    Globals that are only used directly are not included.
+    """
+    chains: dict[str, set[tuple[str, ...]]] = {}
+    for nested_code in iter_code_objects(code):
+        root: str | None = None
+        chain: list[str] = []
+        for instruction in dis.get_instructions(nested_code):
+            if root is not None and instruction.opname in _ATTRIBUTE_LOAD_OPNAMES:
+                chain.append(instruction.argval)
+                continue
+
+            if root is not None and chain:
+                chains.setdefault(root, set()).add(tuple(chain))
+            root = (
+                instruction.argval
+                if instruction.opname in _GLOBAL_LOAD_OPNAMES
+                else None
+            )
+            chain = []
+
+    return {name: frozenset(name_chains) for name, name_chains in chains.items()}
+
+
+def format_attribute_paths(
+    chains: dict[str, frozenset[tuple[str, ...]]],
+) -> list[str]:
+    """Format attribute chains as sorted dotted paths, like `os.path.join`."""
+    return sorted(
+        ".".join((name, *chain))
+        for name, name_chains in chains.items()
+        for chain in name_chains
+    )
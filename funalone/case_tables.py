@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import csv
+import json
+import mmap
+import os
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+REFERENCE_KEY = "$ref"
+
+
+class CaseTable:
+    """A table of declarative test cases loaded lazily from a file.
+
+    The file is memory-mapped, and every row is parsed only when it's reached,
+    so memory use doesn't grow with the size of the table and the first cases
+    can run before the rest are parsed. The table can be iterated many times.
+
+    Rows are dicts. JSON Lines files have a JSON object per line, and blank
+    lines are skipped. CSV files have a header row, and every cell that is
+    valid JSON is parsed as JSON, or kept as a string otherwise. Empty cells
+    are left out, and dotted column names, like `checks.result`, build nested
+    dicts.
+
+    Values like `{"$ref": "name"}` are replaced with the object with that name
+    in the registry, so rows can refer to functions, mocks and exceptions.
+
+    Attributes:
+        path: The path of the file.
+        registry: The objects rows can refer to, by name.
+        format: Either `"jsonl"` or `"csv"`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        registry: Mapping[str, Any] | None = None,
+        format: str | None = None,
+    ):
+        """
+        Args:
+            path: The path of the file.
+            registry: The objects rows can refer to, by name.
+            format: Either `"jsonl"` or `"csv"`. Defaults to the one of the
+                file extension.
+        """
+        self.path = path
+        self.registry = registry or {}
+        if format is None:
+            extension = os.path.splitext(path)[1].lower()
+            format = "csv" if extension == ".csv" else "jsonl"
+        if format not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown case table format: {format!r}")
+        self.format = format
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        rows = self._iter_csv() if self.format == "csv" else self._iter_jsonl()
+        for row in rows:
+            yield resolve_references(row, self.registry)
+
+    def _iter_jsonl(self) -> Iterator[dict[str, Any]]:
+        for line_number, line in enumerate(self._iter_lines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{self.path}, line {line_number}: {e}") from None
+
+    def _iter_csv(self) -> Iterator[dict[str, Any]]:
+        reader = csv.reader(line.decode() for line in self._iter_lines())
+        header = next(reader, None)
+        if header is None:
+            return
+        for cells in reader:
+            row: dict[str, Any] = {}
+            for column, cell in zip(header, cells):
+                if not cell:
+                    # Empty cells leave the column out of the row.
+                    continue
+                *parents, key = column.split(".")
+                target = row
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[key] = _parse_cell(cell)
+            yield row
+
+    def _iter_lines(self) -> Iterator[bytes]:
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                start = 0
+                while start < len(mapped):
+                    end = mapped.find(b"\n", start)
+                    if end == -1:
+                        end = len(mapped)
+                    yield mapped[start : end + 1]
+                    start = end + 1
+
+
+def resolve_references(value: Any, registry: Mapping[str, Any]) -> Any:
+    """Replace `{"$ref": name}` values with the object named in the registry."""
+    if isinstance(value, dict):
+        if value.keys() == {REFERENCE_KEY}:
+            name = value[REFERENCE_KEY]
+            if name not in registry:
+                raise KeyError(f"Unknown reference in case table: {name!r}")
+            return registry[name]
+        return {key: resolve_references(item, registry) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, registry) for item in value]
+    return value
+
+
+def _parse_cell(cell: str) -> Any:
+    try:
+        return json.loads(cell)
+    except json.JSONDecodeError:
+        return cell
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import os
+import pickle
+from collections.abc import Callable, Iterable
+from functools import wraps
+from typing import Any
+from unittest.mock import MagicMock, Mock
+
+CASSETTE_VERSION = 1
+
+
+class CassetteExhaustedError(AssertionError):
+    """Raised when a replayed dependency is called more times than recorded."""
+
+
+class Cassette:
+    """The recorded results of the dependencies of an isolated function.
+
+    Results are recorded, per dependency name and in call order, as pairs of
+    a flag telling whether the call raised and the returned value or raised
+    exception. Calls to attributes of modules, like `requests.get(...)`, are
+    recorded under their dotted path, `requests.get`, and replayed by a mock
+    of the module.
+
+    Attributes:
+        recordings: The recorded results by dependency name.
+        positions: The number of results replayed so far, by dependency name.
+    """
+
+    recordings: dict[str, list[tuple[bool, Any]]]
+    positions: dict[str, int]
+
+    def __init__(self, recordings: dict[str, list[tuple[bool, Any]]] | None = None):
+        self.recordings = recordings if recordings is not None else {}
+        self.positions = {}
+
+    def record(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a function so that its results are recorded under `name`."""
+        results = self.recordings.setdefault(name, [])
+
+        @wraps(function)
+        def recording_wrapper(*args, **kwargs):
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                results.append((True, e))
+                raise
+            results.append((False, result))
+            return result
+
+        return recording_wrapper
+
+    def record_attributes(
+        self, name: str, obj: Any, chains: Iterable[tuple[str, ...]]
+    ) -> Any:
+        """Wrap an object so that calls along attribute chains are recorded.
+
+        For example, with the chain `("path", "join")`, the results of
+        `obj.path.join(...)` are recorded under `name.path.join`.
+        """
+        return _RecordingProxy(self, name, obj, frozenset(chains))
+
+    def replay(self, name: str) -> Mock:
+        """Return a mock that returns or raises the results recorded for `name`.
+
+        Results are replayed from the position of `name` in `positions`, so
+        `rewind()` replays them again from the start.
+        """
+        results = self.recordings.get(name, [])
+
+        def side_effect(*_args, **_kwargs):
+            position = self.positions.get(name, 0)
+            if position >= len(results):
+                raise CassetteExhaustedError(
+                    f"`{name}` was called more times than recorded in the cassette."
+                )
+            self.positions[name] = position + 1
+            raised, value = results[position]
+            if raised:
+                raise value
+            return value
+
+        return MagicMock(name=name, side_effect=side_effect)
+
+    def rewind(self) -> None:
+        """Replay every recorded result again from the start."""
+        self.positions.clear()
+
+    def replay_mocks(self) -> dict[str, Mock]:
+        """Return a replaying mock for every recorded dependency.
+
+        Dependencies recorded under dotted paths are replayed by attributes of
+        a mock of their root name.
+        """
+        mocks: dict[str, Mock] = {}
+        for name in sorted(self.recordings, key=lambda name: name.count(".")):
+            root, *attributes = name.split(".")
+            if not attributes:
+                mocks[name] = self.replay(name)
+                continue
+            parent = mocks.setdefault(root, MagicMock(name=root))
+            for attribute in attributes[:-1]:
+                parent = getattr(parent, attribute)
+            setattr(parent, attributes[-1], self.replay(name))
+        return mocks
+
+    def save(self, path: str | os.PathLike) -> None:
+        with open(path, "wb") as file:
+            pickle.dump(
+                (CASSETTE_VERSION, self.recordings),
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> Cassette:
+        with open(path, "rb") as file:
+            version, recordings = pickle.load(file)
+        if version != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {version}")
+        return cls(recordings)
+
+
+class _RecordingProxy:
+    """An object whose callable attributes along attribute chains are recorded.
+
+    Other attributes are those of the wrapped object.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        name: str,
+        target: Any,
+        chains: frozenset[tuple[str, ...]],
+    ):
+        object.__setattr__(self, "_cassette", cassette)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_chains", chains)
+
+    def __getattr__(self, attribute: str) -> Any:
+        value = getattr(self._target, attribute)
+        path = f"{self._name}.{attribute}"
+        rest = frozenset(
+            chain[1:] for chain in self._chains if chain and chain[0] == attribute
+        )
+        if () in rest and callable(value) and not isinstance(value, type):
+            return self._cassette.record(path, value)
+        if rest - {()}:
+            return _RecordingProxy(self._cassette, path, value, rest - {()})
+        return value
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        setattr(self._target, attribute, value)
+
+    def __dir__(self) -> list[str]:
+        return dir(self._target)
+
+    def __repr__(self) -> str:
+        return f"<recording {self._target!r}>"
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import dis
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, Literal, TypeAlias
+
+from funalone.bytecode import iter_code_objects
+
+_BRANCH_OPNAME_PARTS = ("POP_JUMP", "JUMP_IF", "FOR_ITER")
+# Instructions emitted on the `def` line of a function that never report it.
+_PROLOGUE_OPNAMES = frozenset(
+    {"RESUME", "RETURN_GENERATOR", "POP_TOP", "NOP", "COPY_FREE_VARS", "MAKE_CELL"}
+)
+
+_TraceEvent: TypeAlias = Literal["call", "line", "return", "exception", "opcode"]
+_TraceFunction: TypeAlias = Callable[[FrameType, _TraceEvent, Any], Any]
+
+
+@dataclass
+class CoverageData:
+    """The lines and branches of a code object executed by one or more calls.
+
+    Attributes:
+        lines: The line numbers executed.
+        branches: The branches taken, as pairs of the line number of the
+            branching instruction and the line number it went to.
+        executable_lines: The line numbers of the code object.
+    """
+
+    lines: set[int] = field(default_factory=set)
+    branches: set[tuple[int, int]] = field(default_factory=set)
+    executable_lines: frozenset[int] = frozenset()
+
+    @property
+    def missing_lines(self) -> set[int]:
+        return set(self.executable_lines - self.lines)
+
+    def update(self, other: CoverageData) -> None:
+        self.lines |= other.lines
+        self.branches |= other.branches
+        self.executable_lines |= other.executable_lines
+
+
+class CodeCoverage:
+    """A context manager that collects the coverage of a single code object.
+
+    Only the code object and its nested code objects are instrumented. On
+    Python 3.12 and later, it uses `sys.monitoring` local events, and each
+    line is only reported once per collection. On older versions it falls back
+    to `sys.settrace`, with a global trace function that only traces frames of
+    the code object. Any trace function set before is still called for every
+    event, and is restored afterwards.
+    The collected data is available in `data`.
+    """
+
+    def __init__(self, code: CodeType):
+        self.codes = tuple(iter_code_objects(code))
+        self._code_set = frozenset(self.codes)
+        self._offset_lines = {
+            nested_code: _offset_lines(nested_code) for nested_code in self.codes
+        }
+        self.branch_lines = frozenset(
+            self._offset_lines[nested_code][instruction.offset]
+            for nested_code in self.codes
+            for instruction in dis.get_instructions(nested_code)
+            if any(part in instruction.opname for part in _BRANCH_OPNAME_PARTS)
+            and instruction.offset in self._offset_lines[nested_code]
+        )
+        self.data = CoverageData(
+            executable_lines=frozenset(
+                line
+                for nested_code in self.codes
+                for line in _executable_lines(nested_code)
+            )
+        )
+
+    def __enter__(self) -> CodeCoverage:
+        self.data = CoverageData(executable_lines=self.data.executable_lines)
+        if hasattr(sys, "monitoring"):
+            self._start_monitoring()
+        else:
+            self._start_tracing()
+        return self
+
+    def __exit__(self, *args) -> None:
+        if hasattr(sys, "monitoring"):
+            self._stop_monitoring()
+        else:
+            self._stop_tracing()
+
+    def _start_monitoring(self) -> None:
+        monitoring: Any = sys.monitoring  # type: ignore[attr-defined]
+        events = monitoring.events
+        tool_id = next(
+            (tool_id for tool_id in range(6) if monitoring.get_tool(tool_id) is None),
+            None,
+        )
+        if tool_id is None:
+            raise RuntimeError("No free `sys.monitoring` tool id to collect coverage.")
+        self._tool_id = tool_id
+        monitoring.use_tool_id(self._tool_id, "funalone")
+
+        branch_events = (
+            [events.BRANCH_LEFT, events.BRANCH_RIGHT]
+            if hasattr(events, "BRANCH_LEFT")
+            else [events.BRANCH]
+        )
+        monitoring.register_callback(self._tool_id, events.LINE, self._on_line)
+        event_set = events.LINE
+        for branch_event in branch_events:
+            monitoring.register_callback(self._tool_id, branch_event, self._on_branch)
+            event_set |= branch_event
+        self._events = [events.LINE, *branch_events]
+
+        # Only the events of this tool are enabled. Lines disabled by previous
+        # collections are enabled again, since their events were cleared.
+        for code in self.codes:
+            monitoring.set_local_events(self._tool_id, code, event_set)
+
+    def _stop_monitoring(self) -> None:
+        monitoring: Any = sys.monitoring  # type: ignore[attr-defined]
+        for code in self.codes:
+            monitoring.set_local_events(self._tool_id, code, 0)
+        for event in self._events:
+            monitoring.register_callback(self._tool_id, event, None)
+        monitoring.free_tool_id(self._tool_id)
+
+    def _on_line(self, code: CodeType, line: int) -> Any:
+        self.data.lines.add(line)
+        return sys.monitoring.DISABLE  # type: ignore[attr-defined]
+
+    def _on_branch(self, code: CodeType, offset: int, destination: int) -> None:
+        lines = self._offset_lines[code]
+        if offset in lines and destination in lines:
+            self.data.branches.add((lines[offset], lines[destination]))
+
+    def _start_tracing(self) -> None:
+        self._previous_trace: _TraceFunction | None = sys.gettrace()
+        self._last_lines: dict[FrameType, int] = {}
+        sys.settrace(self._trace_call)
+
+    def _stop_tracing(self) -> None:
+        sys.settrace(self._previous_trace)
+        self._last_lines.clear()
+
+    def _trace_call(self, frame: FrameType, event: _TraceEvent, arg: Any) -> Any:
+        previous_trace = (
+            self._previous_trace(frame, event, arg) if self._previous_trace else None
+        )
+        if frame.f_code not in self._code_set:
+            return previous_trace
+        if previous_trace is None:
+            return self._trace_line
+
+        def trace(frame: FrameType, event: _TraceEvent, arg: Any) -> Any:
+            nonlocal previous_trace
+            if previous_trace is not None:
+                previous_trace = previous_trace(frame, event, arg)
+            self._trace_line(frame, event, arg)
+            return trace
+
+        return trace
+
+    def _trace_line(self, frame: FrameType, event: _TraceEvent, arg: Any) -> Any:
+        if event == "line":
+            line = frame.f_lineno
+            self.data.lines.add(line)
+            last_line = self._last_lines.get(frame)
+            if last_line in self.branch_lines:
+                self.data.branches.add((last_line, line))
+            self._last_lines[frame] = line
+        elif event == "return":
+            self._last_lines.pop(frame, None)
+        return self._trace_line
+
+
+def _offset_lines(code: CodeType) -> dict[int, int]:
+    return {
+        offset: line
+        for start, end, line in code.co_lines()
+        if line is not None
+        for offset in range(start, end, 2)
+    }
+
+
+def _executable_lines(code: CodeType) -> set[int]:
+    lines: dict[int, set[str]] = {}
+    offset_lines = _offset_lines(code)
+    for instruction in dis.get_instructions(code):
+        if instruction.offset in offset_lines:
+            lines.setdefault(offset_lines[instruction.offset], set()).add(
+                instruction.opname
+            )
+
+    if lines.get(code.co_firstlineno, set()) <= _PROLOGUE_OPNAMES:
+        lines.pop(code.co_firstlineno, None)
+    return set(lines)
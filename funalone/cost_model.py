@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, TypeAlias
+
+from funalone.types import MockItem, Name, normalize_name
+
+Cost: TypeAlias = float | Callable[..., float]
+
+
+class LatencyBudgetExceededError(AssertionError):
+    """Raised when the simulated latency of a call is over its budget."""
+
+
+@dataclass
+class LatencyReport:
+    """The simulated latency of a single call to an isolated function.
+
+    Attributes:
+        total: The sum of the cost of every dependency call.
+        by_dependency: The cost of the calls to each dependency.
+        call_counts: The number of calls to each dependency.
+    """
+
+    total: float = 0.0
+    by_dependency: dict[str, float] = field(default_factory=dict)
+    call_counts: dict[str, int] = field(default_factory=dict)
+
+
+class CostModel:
+    """A model of what the dependencies of an isolated function cost.
+
+    Costs are given per dependency name, either as a fixed value or as a
+    function that receives the arguments of each call and returns its cost.
+    Dotted names, like `db.fetch`, give a cost to attributes of a dependency.
+
+    Calls are counted from the `call_args_list` of mocks. Dependencies that
+    are not mocks, like allowed originals, are counted by their active
+    accesses, and function costs are then called without arguments.
+    """
+
+    costs: dict[str, Cost]
+
+    def __init__(self, costs: Mapping[Name, Cost]):
+        self.costs = {normalize_name(name): cost for name, cost in costs.items()}
+
+    def snapshot(self, context: dict[str, MockItem]) -> dict[str, int]:
+        """Return the number of calls made so far to every dependency with a cost.
+
+        Dependencies that haven't been accessed yet are not created.
+        """
+        return {name: len(self._calls(context, name)) for name in self.costs}
+
+    def report(
+        self, context: dict[str, MockItem], snapshot: dict[str, int]
+    ) -> LatencyReport:
+        """Return the simulated latency of the calls made since `snapshot`."""
+        report = LatencyReport()
+        for name, cost in self.costs.items():
+            calls = self._calls(context, name)[snapshot.get(name, 0) :]
+            if callable(cost):
+                dependency_cost = sum(cost(*args, **kwargs) for args, kwargs in calls)
+            else:
+                dependency_cost = cost * len(calls)
+
+            report.call_counts[name] = len(calls)
+            report.by_dependency[name] = dependency_cost
+            report.total += dependency_cost
+        return report
+
+    @staticmethod
+    def _calls(
+        context: dict[str, MockItem], name: str
+    ) -> list[tuple[tuple, dict[str, Any]]]:
+        root, *attributes = name.split(".")
+        # `dict.get` doesn't create a mock for names that were never accessed.
+        mock_item = dict.get(context, root)
+        if mock_item is None:
+            return []
+
+        dependency = mock_item.object
+        for attribute in attributes:
+            dependency = getattr(dependency, attribute)
+
+        call_args_list = getattr(dependency, "call_args_list", None)
+        if isinstance(call_args_list, list):
+            return [(call.args, call.kwargs) for call in call_args_list]
+        return [((), {})] * mock_item.metadata.active_access_count
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import builtins
+import threading
 from enum import Enum
 from typing import Any
-from collections.abc import Iterable
-from unittest.mock import MagicMock, Mock, create_autospec
+from collections.abc import Iterable, Mapping, MutableMapping
+from types import ModuleType
+from unittest.mock import MagicMock, Mock, NonCallableMagicMock, create_autospec
 
+from funalone.stand_ins import StandInModule
+from funalone.streams import SideEffectStream
 from funalone.types import (
+    AccessCounter,
+    AccessCounterGroup,
     MockOrigin,
     NamedObject,
     Name,
@@ -16,7 +22,8 @@ from funalone.types import (
     normalize_name,
 )
 
-BUILTIN_NAMES = dir(builtins)
+BUILTIN_NAMES = frozenset(dir(builtins))
+_NOT_ALLOWED = object()
 
 
 class ContextStates(Enum):
@@ -26,6 +33,11 @@ class ContextStates(Enum):
     SETUP_ORIGINALS = 1
     ACTIVE = 2
     ENDED = 3
+    CLOSED = 4
+
+
+class AccessBudgetExceededError(AssertionError):
+    """Raised when a dependency is accessed more times than its budget allows."""
 
 
 class DefaultMockingContext(dict):
@@ -45,12 +57,40 @@ class DefaultMockingContext(dict):
             - SETUP: The context is being set up.
             - ACTIVE: The context is active and can be used.
             - ENDED: The context has ended and should not be used.
+            - CLOSED: The context has released its mocks and specs.
+        specs: The objects used to spec generated mocks, by name.
+        attribute_chains: The attribute chains used on each name. When the spec
+            of a name is a module, only the objects along these chains are
+            autospec-ed instead of the whole module.
+        module_spec_depth: When set, mocks for modules are autospec-ed lazily,
+            on first access of each attribute, up to this many attributes deep.
+            Otherwise, modules are autospec-ed completely when first accessed.
+        access_budgets: The maximum number of active accesses allowed for
+            each name in a call. Exceeding it raises an
+            `AccessBudgetExceededError`.
+        total_access_budget: The maximum number of active accesses allowed for
+            all names combined in a call.
+        budget_violation: The `AccessBudgetExceededError` raised in the current
+            call, if any. Kept in case the function under test catches it.
     """
 
     state: ContextStates
     allow_builtins: bool
     allow_exceptions: bool
-    specs: dict[str, Any]
+    specs: MutableMapping[str, Any]
+    attribute_chains: Mapping[str, Iterable[tuple[str, ...]]]
+    module_spec_depth: int | None
+    access_budgets: dict[str, int]
+    total_access_budget: int | None
+    budget_violation: AccessBudgetExceededError | None
+    _has_access_budgets: bool
+    _active_access_total: AccessCounter
+    _budget_baselines: dict[str, int]
+    _budget_total_baseline: int
+    _argument_sizes: dict[str, int]
+    _access_counters: AccessCounterGroup
+    _lock: threading.Lock
+    _active_calls: int
 
     def __init__(
         self,
@@ -59,19 +99,50 @@ class DefaultMockingContext(dict):
         | None = None,
         allow_builtins: bool = True,
         allow_exceptions: bool = True,
-        specs: dict[str, Any] | None = None,
+        specs: MutableMapping[str, Any] | None = None,
+        attribute_chains: Mapping[str, Iterable[tuple[str, ...]]] | None = None,
+        module_spec_depth: int | None = None,
+        access_budgets: dict[Name, int] | None = None,
+        total_access_budget: int | None = None,
         **kw_custom_mocked_objects,
     ):
         object.__setattr__(self, "state", ContextStates.SETUP)
         object.__setattr__(self, "allow_builtins", allow_builtins)
         object.__setattr__(self, "allow_exceptions", allow_exceptions)
         object.__setattr__(self, "specs", specs or {})
+        object.__setattr__(self, "attribute_chains", attribute_chains or {})
+        object.__setattr__(self, "module_spec_depth", module_spec_depth)
+        access_budgets = access_budgets or {}
+        object.__setattr__(
+            self,
+            "access_budgets",
+            {normalize_name(name): budget for name, budget in access_budgets.items()},
+        )
+        object.__setattr__(self, "total_access_budget", total_access_budget)
+        object.__setattr__(
+            self,
+            "_has_access_budgets",
+            bool(access_budgets) or total_access_budget is not None,
+        )
+        object.__setattr__(self, "_access_counters", AccessCounterGroup())
+        object.__setattr__(
+            self, "_active_access_total", AccessCounter(group=self._access_counters)
+        )
+        object.__setattr__(self, "budget_violation", None)
+        object.__setattr__(self, "_budget_baselines", {})
+        object.__setattr__(self, "_budget_total_baseline", 0)
+        object.__setattr__(self, "_argument_sizes", {})
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_active_calls", 0)
 
         processed_custom_mocked_objects: dict[str, Mock | Any] = _process_custom_mocks(
             custom_mocked_objects, **kw_custom_mocked_objects
         )
         mocks = {
-            name: MockItem(value, MockMetadata(self.state_to_mock_origin(), 0, 0))
+            name: MockItem(
+                value.as_mock(name) if isinstance(value, SideEffectStream) else value,
+                MockMetadata(self.state_to_mock_origin(), 0, 0, self._access_counters),
+            )
             for name, value in processed_custom_mocked_objects.items()
         }
 
@@ -80,41 +151,153 @@ class DefaultMockingContext(dict):
     def _get_mock(self, name: str | NamedObject) -> Any:
         name = normalize_name(name)
 
+        # Names set in the context take precedence over builtins, so that
+        # builtins like `open` can have custom mocks.
+        active_access = self.state == ContextStates.ACTIVE
+        if (result := super().get(name)) is None:
+            if (builtin := self._allowed_builtin(name)) is not _NOT_ALLOWED:
+                return builtin
+
+            # Mocks are generated under a lock, so that threads accessing a
+            # missing name at the same time all get the same mock.
+            with self._lock:
+                if (result := super().get(name)) is None:
+                    result = MockItem(
+                        self._generate_mock(name),
+                        MockMetadata(
+                            self.state_to_mock_origin(is_generated=True),
+                            counters=self._access_counters,
+                        ),
+                    )
+                    super().__setitem__(name, result)
+
+        result.metadata.count_access(active_access)
+        if active_access and self._has_access_budgets:
+            self._check_access_budgets(name, result.metadata)
+        return result.object
+
+    def _allowed_builtin(self, name: str) -> Any:
         if name in BUILTIN_NAMES:
             builtin = getattr(builtins, name)
             if self.allow_builtins:
                 return builtin
             elif self.allow_exceptions and is_exception(builtin):
                 return builtin
+        return _NOT_ALLOWED
 
-        active_access = 1 if self.state == ContextStates.ACTIVE else 0
-        if result := super().get(name):
-            result.metadata.total_access_count += 1
-            result.metadata.active_access_count += active_access
-            return result.object
-
+    def _generate_mock(self, name: str) -> Any:
         spec = self.specs.get(name)
-        result = auto_create_mock_from_spec(name, spec)
-
-        super().__setitem__(
-            name,
-            MockItem(
-                result,
-                MockMetadata(
-                    self.state_to_mock_origin(is_generated=True),
-                    1,
-                    active_access,
+        chains = self.attribute_chains.get(name)
+        if chains and isinstance(spec, ModuleType):
+            return create_mock_from_attribute_chains(
+                name, spec, chains, self.module_spec_depth
+            )
+        return auto_create_mock_from_spec(name, spec, self.module_spec_depth)
+
+    def prewarm(self, names: Iterable[str]) -> None:
+        """Generate the mocks of names ahead of time, without counting accesses.
+
+        Attributes along the known attribute chains of generated mocks are
+        accessed too, so that lazily autospec-ed mocks are specced up front.
+        The mocks are marked as prewarmed, since the function might never load
+        them.
+        """
+        for name in names:
+            name = normalize_name(name)
+            if super().__contains__(name):
+                continue
+            if self._allowed_builtin(name) is not _NOT_ALLOWED:
+                continue
+
+            result = self._generate_mock(name)
+            for chain in self.attribute_chains.get(name, ()):
+                attribute = result
+                for attribute_name in chain:
+                    attribute = getattr(attribute, attribute_name, None)
+            super().__setitem__(
+                name,
+                MockItem(
+                    result,
+                    MockMetadata(MockOrigin.PREWARMED, 0, 0, self._access_counters),
                 ),
-            ),
+            )
+
+    def start_call(self, argument_sizes: dict[str, int] | None = None) -> None:
+        """Start counting accesses against the budgets for a new call.
+
+        Args:
+            argument_sizes: The sizes of the sized arguments of the call, by
+                parameter name, to report when a budget is exceeded.
+        """
+        object.__setattr__(self, "budget_violation", None)
+        object.__setattr__(
+            self,
+            "_budget_baselines",
+            {
+                name: mock_item.metadata.active_access_count
+                for name, mock_item in super().items()
+            },
+        )
+        object.__setattr__(
+            self, "_budget_total_baseline", self._active_access_total.value
+        )
+        object.__setattr__(self, "_argument_sizes", argument_sizes or {})
+
+    def _check_access_budgets(self, name: str, metadata: MockMetadata) -> None:
+        self._active_access_total.add()
+        call_access_total = (
+            self._active_access_total.value - self._budget_total_baseline
+        )
+        call_access_count = metadata.active_access_count - self._budget_baselines.get(
+            name, 0
+        )
+
+        budget = self.access_budgets.get(name)
+        if budget is not None and call_access_count > budget:
+            message = (
+                f"`{name}` was accessed {call_access_count} times in the call, "
+                f"over its budget of {budget}."
+            )
+        elif (
+            self.total_access_budget is not None
+            and call_access_total > self.total_access_budget
+        ):
+            message = (
+                f"Dependencies were accessed {call_access_total} times in the "
+                f"call, over the total budget of {self.total_access_budget}. "
+                f"Last accessed: `{name}`."
+            )
+        else:
+            return
+
+        if self._argument_sizes:
+            sizes = ", ".join(
+                f"`{parameter}` has {size}"
+                for parameter, size in self._argument_sizes.items()
+            )
+            message += f"\nSizes of the arguments of the call: {sizes}."
+        baselines = self._budget_baselines
+        access_counts = "\n\t".join(
+            f"{item_name}: "
+            f"{mock_item.metadata.active_access_count - baselines.get(item_name, 0)}"
+            for item_name, mock_item in super().items()
+        )
+        error = AccessBudgetExceededError(
+            f"{message}\nAccess counts in the call at that point:\n\t{access_counts}"
         )
-        return result
+        object.__setattr__(self, "budget_violation", error)
+        raise error
 
     def _set_mock(self, name: Name, value: Any) -> None:
         if not isinstance(name, str):
             name = name.__name__
 
         super().__setitem__(
-            name, MockItem(value, MockMetadata(self.state_to_mock_origin(), 1, 0))
+            name,
+            MockItem(
+                value,
+                MockMetadata(self.state_to_mock_origin(), 1, 0, self._access_counters),
+            ),
         )
 
     def setdefault(self, name: Any, value: Any | None = None, /) -> Any | None:
@@ -130,19 +313,48 @@ class DefaultMockingContext(dict):
 
     def _setdefault_typed(self, name: str, value: Mock | Any | None, /) -> Any | None:
         return super().setdefault(
-            name, MockItem(value, MockMetadata(self.state_to_mock_origin(), 1, 0))
+            name,
+            MockItem(
+                value,
+                MockMetadata(self.state_to_mock_origin(), 1, 0, self._access_counters),
+            ),
         )
 
     def reset(self):
+        self._active_access_total.set(0)
+        object.__setattr__(self, "budget_violation", None)
+        object.__setattr__(self, "_budget_baselines", {})
+        object.__setattr__(self, "_budget_total_baseline", 0)
         for mock_item in self.values():
             mock_item.metadata.total_access_count = 0
             mock_item.metadata.active_access_count = 0
-            if isinstance(mock_item.object, Mock):
+            if isinstance(mock_item.object, (Mock, StandInModule)):
                 mock_item.object.reset_mock()
 
+    def close(self):
+        """Release all mocks and specs held by the context."""
+        super().clear()
+        object.__setattr__(self, "specs", {})
+        object.__setattr__(self, "attribute_chains", {})
+        self.set_state(ContextStates.CLOSED)
+
     def set_state(self, new_state: ContextStates):
         object.__setattr__(self, "state", new_state)
 
+    def activate(self):
+        """Mark the start of a call. Calls from several threads can overlap,
+        and the context stays active until all of them end."""
+        with self._lock:
+            object.__setattr__(self, "_active_calls", self._active_calls + 1)
+            self.set_state(ContextStates.ACTIVE)
+
+    def deactivate(self):
+        """Mark the end of a call."""
+        with self._lock:
+            object.__setattr__(self, "_active_calls", max(self._active_calls - 1, 0))
+            if not self._active_calls:
+                self.set_state(ContextStates.ENDED)
+
     def state_to_mock_origin(self, is_generated: bool = False) -> MockOrigin:
         match self.state:
             case ContextStates.SETUP_ORIGINALS:
@@ -193,17 +405,115 @@ def _process_custom_mocks(
     return result
 
 
-def auto_create_mock_from_spec(name: str, spec: Any | None = None) -> Mock:
+def auto_create_mock_from_spec(
+    name: str, spec: Any | None = None, module_spec_depth: int | None = None
+) -> Mock:
     """Create a Mock object with the given spec.
 
     If the spec is a type, it creates a MagicMock with that spec.
+    If the spec is a module and `module_spec_depth` is given, it creates a
+    `LazyModuleMock` that autospecs attributes when they are first accessed.
     Otherwise, it creates a regular Mock with the spec as its return value.
     """
     if spec is None or isinstance(spec, Mock):
         return MagicMock(name=name)
+    if module_spec_depth is not None and isinstance(spec, ModuleType):
+        return LazyModuleMock(spec=spec, depth=module_spec_depth, name=name)
     if isinstance(spec, type):
         return MagicMock(name=name, spec=spec, return_value=MagicMock(spec=spec))
     try:
         return create_autospec(spec=spec)
     except Exception:
         return MagicMock(name=name)
+
+
+def create_mock_from_attribute_chains(
+    name: str,
+    spec: Any,
+    chains: Iterable[tuple[str, ...]],
+    module_spec_depth: int | None = None,
+) -> Mock:
+    """Create a mock that is only autospec-ed along the given attribute chains.
+
+    The root and the intermediate objects of every chain are spec-ed, which only
+    restricts their attributes, and the last object of every chain is
+    autospec-ed. This is much cheaper than autospec-ing a whole module when a
+    function only uses a few of its attributes, like `os.path.join`. If
+    `module_spec_depth` is given, attributes outside of the chains are still
+    autospec-ed lazily on first access.
+    """
+    chains = set(chains)
+    prefixes = {chain[:depth] for chain in chains for depth in range(1, len(chain))}
+    root = (
+        NonCallableMagicMock(name=name, spec=spec)
+        if module_spec_depth is None
+        else LazyModuleMock(spec=spec, depth=module_spec_depth, name=name)
+    )
+    built: dict[tuple[str, ...], tuple[Mock, Any]] = {(): (root, spec)}
+
+    for chain in sorted(chains, key=len):
+        for depth in range(1, len(chain) + 1):
+            path = chain[:depth]
+            if path in built:
+                continue
+
+            parent, parent_spec = built[path[:-1]]
+            try:
+                child_spec = getattr(parent_spec, path[-1])
+            except AttributeError:
+                # The real object would fail here too, leave it to the mock.
+                break
+
+            if path in prefixes:
+                child = (
+                    MagicMock(spec=child_spec)
+                    if callable(child_spec)
+                    else NonCallableMagicMock(spec=child_spec)
+                )
+            else:
+                child = auto_create_mock_from_spec(".".join((name, *path)), child_spec)
+
+            setattr(parent, path[-1], child)
+            built[path] = (child, child_spec)
+
+    return root
+
+
+class LazyModuleMock(NonCallableMagicMock):
+    """A mock spec-ed with a module that autospecs attributes on first access.
+
+    Creating the mock only lists the attributes of the module. Each attribute is
+    autospec-ed the first time it is accessed, and submodules become lazy
+    mocks themselves. Attributes deeper than `depth` are not spec-ed.
+    """
+
+    def __init__(self, spec: ModuleType, *, depth: int = 1, **kwargs):
+        # Mock's constructor binds positional arguments to its own signature, so
+        # the module and depth are only accepted as keyword arguments.
+        super().__init__(spec=spec, **kwargs)
+        self.__dict__["_mock_lazy_module"] = spec
+        self.__dict__["_mock_lazy_depth"] = depth
+
+    def _get_child_mock(self, /, **kw) -> Any:
+        name = kw.get("name")
+        module = self.__dict__.get("_mock_lazy_module")
+        depth = self.__dict__.get("_mock_lazy_depth", 0)
+        if (
+            depth <= 0
+            or name is None
+            or name.startswith("__")
+            or kw.get("_new_name") != name
+        ):
+            return super()._get_child_mock(**kw)
+
+        try:
+            child_spec = getattr(module, name)
+        except AttributeError:
+            return super()._get_child_mock(**kw)
+
+        if isinstance(child_spec, ModuleType):
+            return LazyModuleMock(spec=child_spec, depth=depth - 1, **kw)
+        try:
+            return create_autospec(child_spec, _parent=self, _name=name)
+        except Exception:
+            return super()._get_child_mock(**kw)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from typing import Any, cast
+
+from funalone.interpreters import InterpreterRunReport, TestResult, run_tests
+from funalone.isolated_function_clone import IsolatedFunctionClone
+from funalone.parallel import fork_available
+from funalone.types import P, R
+
+# The clone templates of this process, with the parameters they were built
+# with, by function. Forked workers inherit them already warmed.
+_templates: dict[Callable, tuple[IsolatedFunctionClone, dict[str, Any]]] = {}
+
+
+def clone_template(
+    function: Callable[P, R], **clone_kwargs
+) -> IsolatedFunctionClone[P, R]:
+    """Return the pre-warmed clone template of a function, reset.
+
+    The template is built and prewarmed the first time, and reused after that.
+    In the workers of a `ForkServer`, templates built by the server before
+    forking are inherited, so tests don't pay for building them.
+
+    Raises:
+        ValueError: If the template was built with other parameters.
+    """
+    if function in _templates:
+        clone, template_kwargs = _templates[function]
+        if template_kwargs != clone_kwargs:
+            raise ValueError(
+                f"The clone template of `{function.__qualname__}` was built "
+                f"with other parameters: {template_kwargs}"
+            )
+        clone.reset()
+        return clone
+    clone = IsolatedFunctionClone(function, **clone_kwargs).prewarm()
+    _templates[function] = (clone, clone_kwargs)
+    return clone
+
+
+def clear_templates() -> None:
+    """Close and forget every clone template of this process."""
+    for clone, _ in _templates.values():
+        clone.close()
+    _templates.clear()
+
+
+class ForkServer:
+    """Run tests in forked workers that inherit imported and warmed state.
+
+    The server process imports the test modules and builds the clone
+    templates up front. Workers are forked from it when tests run, so they
+    inherit the imported modules, the templates and their autospec-ed mocks
+    copy-on-write, instead of importing and building them again. Tests get
+    their clones with `clone_template()`.
+
+    Tests are given as `module:qualname` references, like those of the
+    `SubinterpreterRunner`, and are dispatched in shards over a pipe to
+    every idle worker. Results are streamed back as each test ends. Tests run
+    serially in the server process where forking isn't available.
+
+    Attributes:
+        workers: The maximum number of worker processes.
+        shard_size: The number of tests sent to a worker at a time.
+    """
+
+    def __init__(
+        self,
+        modules: Iterable[str] = (),
+        workers: int | None = None,
+        shard_size: int = 8,
+    ):
+        """
+        Args:
+            modules: The modules to import in the server, like the test
+                modules. Clone templates they build at import time are
+                inherited by the workers.
+            workers: The maximum number of worker processes. Defaults to the
+                CPU count.
+            shard_size: The number of tests sent to a worker at a time.
+        """
+        if shard_size < 1:
+            raise ValueError("`shard_size` must be at least 1.")
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        for module in modules:
+            importlib.import_module(module)
+
+    def add_template(
+        self, function: Callable[P, R], **clone_kwargs
+    ) -> IsolatedFunctionClone[P, R]:
+        """Build the clone template of a function in the server."""
+        return clone_template(function, **clone_kwargs)
+
+    def run(self, test_ids: Iterable[str]) -> InterpreterRunReport:
+        """Run tests and return their results, in the order they ended."""
+        test_ids = list(test_ids)
+        start = time.perf_counter()
+        results = list(self.stream(test_ids))
+        shards = -(-len(test_ids) // self.shard_size)
+        workers = min(self.workers, shards) if fork_available() else 0
+        return InterpreterRunReport(results, time.perf_counter() - start, workers)
+
+    def stream(self, test_ids: Iterable[str]) -> Iterator[TestResult]:
+        """Run tests, yielding their results as they end."""
+        test_ids = list(test_ids)
+        if not fork_available():
+            for record in run_tests(test_ids):
+                yield TestResult(**record)
+            return
+
+        shards = [
+            test_ids[index : index + self.shard_size]
+            for index in range(0, len(test_ids), self.shard_size)
+        ]
+        shards.reverse()
+        workers: dict[Connection, _Worker] = {}
+        try:
+            for _ in range(min(self.workers, len(shards))):
+                worker = _Worker.fork()
+                workers[worker.connection] = worker
+                worker.send(shards.pop())
+
+            while workers:
+                for ready in wait(list(workers)):
+                    # Only the parent's ends of the pipes are waited on.
+                    connection = cast(Connection, ready)
+                    worker = workers[connection]
+                    try:
+                        record = connection.recv()
+                    except EOFError:
+                        # The worker died, so its pending tests are errors.
+                        del workers[worker.connection]
+                        worker.join()
+                        for test_id in worker.pending:
+                            yield TestResult(
+                                test_id,
+                                "error",
+                                message=f"The worker process exited with code "
+                                f"{worker.exit_code}.",
+                            )
+                        if shards:
+                            worker = _Worker.fork()
+                            workers[worker.connection] = worker
+                            worker.send(shards.pop())
+                        continue
+
+                    if isinstance(record, dict):
+                        yield TestResult(**record)
+                    elif isinstance(record, str):
+                        worker.pending.remove(record)
+                    elif shards:
+                        worker.send(shards.pop())
+                    else:
+                        del workers[worker.connection]
+                        worker.stop()
+        finally:
+            for worker in workers.values():
+                worker.kill()
+
+
+class _Worker:
+    """A forked worker process and the parent's end of its pipe.
+
+    The worker receives shards of test ids, and sends back the result record
+    of every test, the id of every test given once it has run, and `None`
+    once the shard is done.
+    """
+
+    def __init__(self, process: BaseProcess, connection: Connection):
+        self.process = process
+        self.connection = connection
+        self.pending: list[str] = []
+
+    @classmethod
+    def fork(cls) -> _Worker:
+        context = multiprocessing.get_context("fork")
+        connection, worker_connection = context.Pipe()
+        process = context.Process(target=_serve, args=(worker_connection,))
+        process.start()
+        worker_connection.close()
+        return cls(process, connection)
+
+    @property
+    def exit_code(self) -> int | None:
+        return self.process.exitcode
+
+    def send(self, shard: list[str]) -> None:
+        self.pending.extend(shard)
+        self.connection.send(shard)
+
+    def stop(self) -> None:
+        self.connection.send(None)
+        self.join()
+
+    def join(self) -> None:
+        self.process.join()
+        self.connection.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.join()
+
+
+def _serve(connection: Connection) -> None:
+    while (shard := connection.recv()) is not None:
+        for test_id in shard:
+            for record in run_tests([test_id]):
+                connection.send(record)
+            connection.send(test_id)
+        connection.send(None)
+    connection.close()
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import inspect
+import os
+import random
+import sys
+import time
+import traceback
+import types
+import typing
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, TypeAlias
+
+from funalone.isolated_function_clone import IsolatedFunctionClone
+from funalone.parallel import fork_map
+
+Strategy: TypeAlias = Callable[[random.Random], Any]
+
+_EDGE_INTS = (0, 1, -1, 2**31 - 1, -(2**31), 2**63, -(2**63))
+_EDGE_FLOATS = (0.0, -0.0, 1.0, -1.0, float("inf"), float("-inf"), float("nan"))
+_EDGE_STRS = ("", " ", "\x00", "ñ", "\U0001f600", "a" * 1000)
+_MAX_SIZE = 8
+
+
+def strategy_for(annotation: Any) -> Strategy:
+    """Return a strategy that generates values of a type annotation.
+
+    Supports `int`, `float`, `bool`, `str`, `bytes`, `None`, `Any`, `Literal`,
+    unions, and lists, sets, tuples and dicts of supported types. Edge values
+    like 0, empty strings and infinities are generated often.
+
+    Raises:
+        TypeError: If the annotation isn't supported.
+    """
+    origin = typing.get_origin(annotation)
+    arguments = typing.get_args(annotation)
+
+    if annotation is None or annotation is type(None):
+        return lambda rng: None
+    if annotation is Any:
+        scalars = [strategy_for(t) for t in (int, float, bool, str, None)]
+        return lambda rng: rng.choice(scalars)(rng)
+    if annotation is bool:
+        return lambda rng: rng.random() < 0.5
+    if annotation is int:
+        return lambda rng: (
+            rng.choice(_EDGE_INTS) if rng.random() < 0.2 else rng.randint(-100, 100)
+        )
+    if annotation is float:
+        return lambda rng: (
+            rng.choice(_EDGE_FLOATS) if rng.random() < 0.2 else rng.uniform(-1e3, 1e3)
+        )
+    if annotation is str:
+        return lambda rng: (
+            rng.choice(_EDGE_STRS)
+            if rng.random() < 0.2
+            else "".join(
+                chr(rng.randint(32, 126)) for _ in range(rng.randint(0, _MAX_SIZE))
+            )
+        )
+    if annotation is bytes:
+        return lambda rng: rng.randbytes(rng.randint(0, _MAX_SIZE))
+    if origin is typing.Literal:
+        return lambda rng: rng.choice(arguments)
+    if origin is typing.Union or origin is types.UnionType:
+        options = [strategy_for(argument) for argument in arguments]
+        return lambda rng: rng.choice(options)(rng)
+    if origin in (list, set, frozenset):
+        element = strategy_for(arguments[0] if arguments else Any)
+        return lambda rng: origin(
+            element(rng) for _ in range(rng.randint(0, _MAX_SIZE))
+        )
+    if origin is tuple:
+        if len(arguments) == 2 and arguments[1] is Ellipsis:
+            element = strategy_for(arguments[0])
+            return lambda rng: tuple(
+                element(rng) for _ in range(rng.randint(0, _MAX_SIZE))
+            )
+        elements = [strategy_for(argument) for argument in arguments]
+        return lambda rng: tuple(element(rng) for element in elements)
+    if origin is dict:
+        key = strategy_for(arguments[0] if arguments else str)
+        value = strategy_for(arguments[1] if arguments else Any)
+        return lambda rng: {
+            key(rng): value(rng) for _ in range(rng.randint(0, _MAX_SIZE))
+        }
+    raise TypeError(f"No strategy for the annotation {annotation!r}.")
+
+
+def shrink(value: Any) -> Iterator[Any]:
+    """Yield simpler versions of a value, simplest first."""
+    if isinstance(value, bool):
+        if value:
+            yield False
+    elif isinstance(value, int):
+        if value != 0:
+            yield 0
+            yield value // 2
+            yield value - 1 if value > 0 else value + 1
+    elif isinstance(value, float):
+        if value != 0.0:
+            yield 0.0
+            if value == value and abs(value) != float("inf"):
+                yield float(int(value))
+                yield value / 2
+    elif isinstance(value, (str, bytes)):
+        if value:
+            yield value[:0]
+            yield value[: len(value) // 2]
+            yield value[1:]
+    elif isinstance(value, (list, tuple)):
+        if value:
+            sequence_type = type(value)
+            items = list(value)
+            yield sequence_type()
+            yield sequence_type(items[: len(items) // 2])
+            for index in range(len(items)):
+                yield sequence_type(items[:index] + items[index + 1 :])
+            for index, element in enumerate(items):
+                for simpler in shrink(element):
+                    yield sequence_type(items[:index] + [simpler] + items[index + 1 :])
+    elif isinstance(value, (set, frozenset)):
+        if value:
+            yield type(value)()
+            for element in value:
+                yield value - {element}
+    elif isinstance(value, dict):
+        if value:
+            yield {}
+            for key in value:
+                yield {k: v for k, v in value.items() if k != key}
+
+
+@dataclass
+class FuzzFailure:
+    """An unexpected exception raised by the fuzzed function.
+
+    Attributes:
+        arguments: The generated arguments that raised, by parameter name.
+        shrunk_arguments: The simplest arguments found that raise the same
+            type of exception.
+        exception: The type and message of the exception.
+        traceback: The formatted traceback of the exception.
+    """
+
+    arguments: dict[str, Any]
+    shrunk_arguments: dict[str, Any]
+    exception: str
+    traceback: str
+
+
+@dataclass
+class FuzzReport:
+    """The result of a fuzzing run.
+
+    Attributes:
+        executions: The number of calls to the function.
+        duration: The seconds spent calling the function.
+        failures: The unexpected exceptions found.
+    """
+
+    executions: int = 0
+    duration: float = 0.0
+    failures: list[FuzzFailure] = field(default_factory=list)
+
+    @property
+    def executions_per_second(self) -> float:
+        return self.executions / self.duration if self.duration else 0.0
+
+
+class FuzzRunner:
+    """Call an isolated function with arguments generated from its annotations.
+
+    Since its dependencies are mocked, the clone can be called many times in
+    a tight loop, resetting its context between calls. Exceptions that are not
+    expected are reported as failures, with the arguments that raised them
+    shrunk to the simplest ones that still raise the same type of exception.
+
+    Attributes:
+        tested_function: The function to fuzz.
+        clone: The isolated clone that is called.
+        strategies: The strategy that generates each argument, by name.
+    """
+
+    def __init__(
+        self,
+        tested_function: Callable[..., Any],
+        *,
+        strategies: dict[str, Strategy] | None = None,
+        expected_exceptions: tuple[type[BaseException], ...] = (),
+        seed: int | None = None,
+        processes: int | None = 1,
+        **clone_kwargs,
+    ):
+        """
+        Args:
+            tested_function: The function to fuzz.
+            strategies: Strategies that override those of the annotations, by
+                parameter name.
+            expected_exceptions: Exceptions that are not failures.
+            seed: The seed of the random generator, for reproducible runs.
+            processes: The number of forked worker processes that fuzz in
+                parallel. `None` uses the CPU count.
+            clone_kwargs: The parameters of the `IsolatedFunctionClone`.
+        """
+        self.tested_function = tested_function
+        self.expected_exceptions = expected_exceptions
+        self.seed = seed if seed is not None else random.randrange(sys.maxsize)
+        self.processes = processes
+        self.clone = IsolatedFunctionClone(tested_function, **clone_kwargs)
+
+        signature = inspect.signature(tested_function)
+        hints = typing.get_type_hints(tested_function)
+        strategies = strategies or {}
+        self._positional_only = [
+            parameter.name
+            for parameter in signature.parameters.values()
+            if parameter.kind == parameter.POSITIONAL_ONLY
+        ]
+        self.strategies = {
+            parameter.name: strategies.get(parameter.name)
+            or strategy_for(hints.get(parameter.name, Any))
+            for parameter in signature.parameters.values()
+            if parameter.kind not in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD)
+        }
+
+    def run(
+        self, iterations: int = 1000, max_failures: int = 1, batch_size: int = 256
+    ) -> FuzzReport:
+        """Call the function with generated arguments.
+
+        Args:
+            iterations: The number of calls, split between worker processes.
+            max_failures: The number of failures after which fuzzing stops,
+                per worker process.
+            batch_size: The number of arguments generated ahead of each batch
+                of calls.
+        """
+        processes = self.processes or os.cpu_count() or 1
+        chunks = [
+            (self.seed + index, len(range(index, iterations, processes)))
+            for index in range(processes)
+        ]
+        report = FuzzReport()
+        for chunk_report in fork_map(
+            lambda chunk: self._run_chunk(*chunk, max_failures, batch_size),
+            chunks,
+            processes,
+        ):
+            report.executions += chunk_report.executions
+            report.duration = max(report.duration, chunk_report.duration)
+            report.failures.extend(chunk_report.failures)
+        return report
+
+    def _run_chunk(
+        self, seed: int, iterations: int, max_failures: int, batch_size: int
+    ) -> FuzzReport:
+        rng = random.Random(seed)
+        report = FuzzReport()
+        start = time.perf_counter()
+        while report.executions < iterations and len(report.failures) < max_failures:
+            batch = [
+                {name: strategy(rng) for name, strategy in self.strategies.items()}
+                for _ in range(min(batch_size, iterations - report.executions))
+            ]
+            for arguments in batch:
+                report.executions += 1
+                exception = self._call(arguments)
+                if exception is not None:
+                    report.failures.append(self._failure(arguments, exception))
+                    if len(report.failures) >= max_failures:
+                        break
+        report.duration = time.perf_counter() - start
+        return report
+
+    def _call(self, arguments: dict[str, Any]) -> Exception | None:
+        """Call the clone, returning the unexpected exception raised, if any."""
+        self.clone.context.reset()
+        positional = [arguments[name] for name in self._positional_only]
+        keywords = {
+            name: value
+            for name, value in arguments.items()
+            if name not in self._positional_only
+        }
+        try:
+            self.clone(*positional, **keywords)
+        except self.expected_exceptions:
+            return None
+        except Exception as e:
+            return e
+        return None
+
+    def _failure(self, arguments: dict[str, Any], exception: Exception) -> FuzzFailure:
+        shrunk = self._shrink(arguments, type(exception))
+        return FuzzFailure(
+            arguments=arguments,
+            shrunk_arguments=shrunk,
+            exception=f"{type(exception).__name__}: {exception}",
+            traceback="".join(traceback.format_exception(exception)),
+        )
+
+    def _shrink(
+        self, arguments: dict[str, Any], exception_type: type[Exception], steps=500
+    ) -> dict[str, Any]:
+        """Greedily simplify the arguments while they raise the same exception."""
+        improved = True
+        while improved and steps > 0:
+            improved = False
+            for name in arguments:
+                for simpler in shrink(arguments[name]):
+                    if type(simpler) is type(arguments[name]) and (
+                        simpler == arguments[name]
+                    ):
+                        continue
+                    steps -= 1
+                    candidate = arguments | {name: simpler}
+                    if type(self._call(candidate)) is exception_type:
+                        arguments = candidate
+                        improved = True
+                        break
+                    if steps <= 0:
+                        return arguments
+        return arguments
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from types import CodeType
+from typing import TYPE_CHECKING, Any
+
+from funalone.types import MockOrigin
+
+if TYPE_CHECKING:
+    from funalone.isolated_function_clone import IsolatedFunctionClone
+
+IMPACT_STORE_VERSION = 1
+
+
+def code_fingerprint(code: CodeType) -> str:
+    """Return a hash of what a code object does.
+
+    Covers the bytecode, names and constants of the code object and its nested
+    code objects, but not line numbers or file names, so moving a function
+    around doesn't change its fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_fingerprint(digest, code)
+    return digest.hexdigest()
+
+
+def _update_fingerprint(digest: Any, code: CodeType) -> None:
+    digest.update(code.co_code)
+    digest.update(repr((code.co_names, code.co_varnames, code.co_freevars)).encode())
+    for const in code.co_consts:
+        digest.update(_canonical_const(const).encode())
+
+
+def _canonical_const(const: Any) -> str:
+    """Return a representation of a constant that is the same in every process.
+
+    The order of `frozenset` elements depends on the hash seed, so they are
+    sorted by their own representation.
+    """
+    if isinstance(const, CodeType):
+        return f"<code {code_fingerprint(const)}>"
+    if isinstance(const, tuple):
+        return f"({','.join(_canonical_const(item) for item in const)})"
+    if isinstance(const, frozenset):
+        return f"frozenset({{{','.join(sorted(map(_canonical_const, const)))}}})"
+    return repr(const)
+
+
+def function_fingerprint(function: Any) -> str | None:
+    """Return the fingerprint of the code of a function or method.
+
+    Decorated functions are unwrapped first. Returns `None` for objects
+    without code, like classes, modules and mocks.
+    """
+    function = inspect.unwrap(getattr(function, "__func__", function))
+    code = getattr(function, "__code__", None)
+    return code_fingerprint(code) if isinstance(code, CodeType) else None
+
+
+@dataclass
+class ImpactRecord:
+    """The code a test ran through a single isolated function clone.
+
+    Attributes:
+        function: The tested function, as `module:qualname`.
+        fingerprint: The fingerprint of the tested function's code.
+        accessed_names: The global names the function accessed.
+        dependencies: The fingerprints of the allowed original functions and
+            followed callees it accessed, by name.
+    """
+
+    function: str
+    fingerprint: str
+    accessed_names: list[str] = field(default_factory=list)
+    dependencies: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_clone(cls, clone: IsolatedFunctionClone) -> ImpactRecord:
+        function = clone.original_function
+        accessed = {
+            name: mock_item
+            for name, mock_item in clone.context.to_debug_dict().items()
+            if mock_item.metadata.total_access_count
+        }
+        dependencies = {
+            name: fingerprint
+            for name, mock_item in accessed.items()
+            if mock_item.metadata.origin
+            in (MockOrigin.FUNCTION_ORIGINAL, MockOrigin.FOLLOWED_CLONE)
+            and (fingerprint := function_fingerprint(mock_item.object)) is not None
+        }
+        return cls(
+            f"{function.__module__}:{function.__qualname__}",
+            code_fingerprint(function.__code__),
+            sorted(accessed),
+            dependencies,
+        )
+
+    def is_affected(self, resolve: Callable[[str], Any]) -> bool:
+        """Whether the code the record covers changed since it was recorded.
+
+        Records whose function can't be resolved anymore are affected.
+        """
+        try:
+            function = resolve(self.function)
+        except (ImportError, AttributeError):
+            return True
+        if code_fingerprint(function.__code__) != self.fingerprint:
+            return True
+        return any(
+            function_fingerprint(function.__globals__.get(name)) != fingerprint
+            for name, fingerprint in self.dependencies.items()
+        )
+
+
+def resolve_function(qualified_name: str) -> Any:
+    """Import the function named `module:qualname`."""
+    module_name, qualname = qualified_name.split(":")
+    obj: Any = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def current_test_id() -> str | None:
+    """Return the id of the pytest test running, if any."""
+    current_test = os.environ.get("PYTEST_CURRENT_TEST")
+    return current_test.rsplit(" ", 1)[0] if current_test else None
+
+
+class ImpactStore:
+    """Persist which code every test runs, to select the tests a change affects.
+
+    Tests record the isolated function clones they use with `record()`, after
+    calling them. On a later run, `affected_tests()` returns the tests whose
+    tested function, or one of the allowed original functions it accessed,
+    changed since they were recorded. Dependencies that are mocked don't
+    affect a test, since it never runs their code.
+
+    Attributes:
+        path: The path of the JSON file of the store.
+        records: The records of every test, by test id.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = path
+        self.records: dict[str, list[ImpactRecord]] = {}
+        if os.path.exists(path):
+            self.load()
+
+    def record(self, clone: IsolatedFunctionClone, test_id: str | None = None):
+        """Record the code a test ran through a clone.
+
+        Args:
+            clone: The clone the test called.
+            test_id: The id of the test. Defaults to the id of the running
+                pytest test.
+        """
+        test_id = test_id or current_test_id()
+        if test_id is None:
+            raise ValueError("No test id given and no pytest test is running.")
+
+        record = ImpactRecord.from_clone(clone)
+        test_records = self.records.setdefault(test_id, [])
+        test_records[:] = [
+            test_record
+            for test_record in test_records
+            if test_record.function != record.function
+        ]
+        test_records.append(record)
+
+    def affected_tests(
+        self, resolve: Callable[[str], Any] = resolve_function
+    ) -> set[str]:
+        """Return the recorded tests affected by code changes.
+
+        Args:
+            resolve: Finds the current version of a function from its
+                `module:qualname`. Functions are imported by default.
+        """
+        return {
+            test_id
+            for test_id, test_records in self.records.items()
+            if any(record.is_affected(resolve) for record in test_records)
+        }
+
+    def select(
+        self,
+        test_ids: Iterable[str],
+        resolve: Callable[[str], Any] = resolve_function,
+    ) -> list[str]:
+        """Return the tests that have to run: those affected or not recorded."""
+        affected = self.affected_tests(resolve)
+        return [
+            test_id
+            for test_id in test_ids
+            if test_id in affected or test_id not in self.records
+        ]
+
+    def save(self) -> None:
+        with open(self.path, "w") as file:
+            json.dump(
+                {
+                    "version": IMPACT_STORE_VERSION,
+                    "tests": {
+                        test_id: [asdict(record) for record in test_records]
+                        for test_id, test_records in self.records.items()
+                    },
+                },
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+
+    def load(self) -> None:
+        with open(self.path) as file:
+            data = json.load(file)
+        if data.get("version") != IMPACT_STORE_VERSION:
+            # Stores of other versions are discarded, so every test runs.
+            self.records = {}
+            return
+        self.records = {
+            test_id: [ImpactRecord(**record) for record in test_records]
+            for test_id, test_records in data["tests"].items()
+        }
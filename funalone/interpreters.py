@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+import unittest
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from types import ModuleType
+from typing import Any
+
+from funalone.impact import resolve_function
+
+# The script every subinterpreter runs. `path`, `test_ids` and `fd` are shared
+# by the main interpreter, and the results are written to the file `fd`.
+_WORKER_SCRIPT = """\
+import json, os, sys
+sys.path[:] = path.split("\\n")
+from funalone.interpreters import run_tests
+os.write(fd, json.dumps(run_tests(test_ids.split("\\n"))).encode())
+"""
+
+
+def _interpreters_module() -> ModuleType | None:
+    """Return the low-level subinterpreters module, if interpreters have their
+    own GIL in this version."""
+    if sys.version_info < (3, 12):
+        return None
+    for name in ("_interpreters", "_xxsubinterpreters"):
+        try:
+            return __import__(name)
+        except ImportError:
+            continue
+    return None
+
+
+def subinterpreters_available() -> bool:
+    """Whether tests can run in subinterpreters with their own GIL."""
+    return _interpreters_module() is not None
+
+
+@dataclass
+class TestResult:
+    """The outcome of a single test.
+
+    Attributes:
+        test_id: The test, as `module:qualname`.
+        outcome: Either `"passed"`, `"failed"`, `"error"` or `"skipped"`.
+        duration: The seconds the test took.
+        message: The traceback of failures and errors, or the skip reason.
+    """
+
+    __test__ = False
+
+    test_id: str
+    outcome: str
+    duration: float = 0.0
+    message: str = ""
+
+
+@dataclass
+class InterpreterRunReport:
+    """The results of tests run by a `SubinterpreterRunner` or a `ForkServer`.
+
+    Attributes:
+        results: The result of every test.
+        duration: The seconds the whole run took.
+        workers: The number of interpreters or processes the tests ran in, or
+            0 if they ran in the main interpreter.
+    """
+
+    results: list[TestResult] = field(default_factory=list)
+    duration: float = 0.0
+    workers: int = 0
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """The number of tests by outcome."""
+        counts: dict[str, int] = {}
+        for result in self.results:
+            counts[result.outcome] = counts.get(result.outcome, 0) + 1
+        return counts
+
+    @property
+    def succeeded(self) -> bool:
+        return all(result.outcome in ("passed", "skipped") for result in self.results)
+
+    def summary(self) -> str:
+        lines = [
+            f"{result.outcome.upper()} {result.test_id}\n{result.message}"
+            for result in self.results
+            if result.outcome in ("failed", "error")
+        ]
+        counts = ", ".join(
+            f"{count} {outcome}" for outcome, count in self.counts.items()
+        )
+        lines.append(f"{counts or 'no tests ran'} in {self.duration:.3f}s")
+        return "\n".join(lines)
+
+
+class SubinterpreterRunner:
+    """Run tests in parallel subinterpreters, each with its own GIL.
+
+    Tests are given as importable references, `module:qualname`, to either
+    test functions, `unittest.TestCase` classes or their test methods. They
+    are split into one batch per worker, and every batch runs in a new
+    subinterpreter, in a thread of the main interpreter. Subinterpreters
+    import the test modules themselves, so nothing is pickled, and only
+    compact JSON result records are sent back.
+
+    Test functions pass if they return, are skipped if they raise
+    `unittest.SkipTest`, fail if they raise an `AssertionError` and error
+    otherwise.
+
+    Subinterpreters with their own GIL need Python 3.12 or later. On older
+    versions, or with a single worker, tests run serially in the main
+    interpreter. Tests that import extension modules without support for
+    subinterpreters error, and are better run in a process pool.
+
+    Attributes:
+        workers: The number of subinterpreters.
+    """
+
+    def __init__(self, workers: int | None = None):
+        """
+        Args:
+            workers: The number of subinterpreters. Defaults to the CPU count.
+        """
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, test_ids: Iterable[str]) -> InterpreterRunReport:
+        """Run tests and return their results.
+
+        Args:
+            test_ids: The tests to run, as `module:qualname`.
+        """
+        test_ids = list(test_ids)
+        start = time.perf_counter()
+        if self.workers == 1 or not subinterpreters_available():
+            results = [TestResult(**result) for result in run_tests(test_ids)]
+            return InterpreterRunReport(results, time.perf_counter() - start)
+
+        batches = [
+            test_ids[index :: self.workers]
+            for index in range(min(self.workers, len(test_ids)))
+        ]
+        with ThreadPoolExecutor(len(batches)) as executor:
+            batch_results = list(executor.map(self._run_batch, batches))
+
+        # Results are ordered as the tests were given, with the tests of a
+        # class where the class was given.
+        positions = {test_id: index for index, test_id in enumerate(test_ids)}
+        results = sorted(
+            (result for results in batch_results for result in results),
+            key=lambda result: positions.get(
+                result.test_id, positions.get(result.test_id.rpartition(".")[0], 0)
+            ),
+        )
+        return InterpreterRunReport(results, time.perf_counter() - start, len(batches))
+
+    def _run_batch(self, test_ids: list[str]) -> list[TestResult]:
+        interpreters = _interpreters_module()
+        assert interpreters is not None
+        shared: dict[str, object] = {
+            "path": "\n".join(sys.path),
+            "test_ids": "\n".join(test_ids),
+        }
+        with tempfile.TemporaryFile() as output:
+            shared["fd"] = output.fileno()
+            interpreter = interpreters.create()
+            try:
+                error = _exec(interpreters, interpreter, shared)
+            finally:
+                interpreters.destroy(interpreter)
+            output.seek(0)
+            data = output.read()
+
+        if error is not None:
+            return [TestResult(test_id, "error", message=error) for test_id in test_ids]
+        return [TestResult(**result) for result in json.loads(data)]
+
+
+def _exec(
+    interpreters: ModuleType, interpreter: Any, shared: dict[str, object]
+) -> str | None:
+    """Run the worker script, returning the error it raised, if any."""
+    if hasattr(interpreters, "exec"):
+        # Python 3.13 and later return the uncaught exception.
+        error = interpreters.exec(interpreter, _WORKER_SCRIPT, shared)
+        return None if error is None else error.errdisplay
+    try:
+        interpreters.run_string(interpreter, _WORKER_SCRIPT, shared)
+    except interpreters.RunFailedError as e:
+        return str(e)
+    return None
+
+
+def run_tests(test_ids: Iterable[str]) -> list[dict[str, Any]]:
+    """Run tests in the current interpreter and return their result records."""
+    return [asdict(result) for test_id in test_ids for result in _run_test(test_id)]
+
+
+def _run_test(test_id: str) -> Iterator[TestResult]:
+    start = time.perf_counter()
+    module, qualname = test_id.split(":")
+    try:
+        test = resolve_function(test_id)
+        owner_qualname = qualname.rpartition(".")[0]
+        owner = owner_qualname and resolve_function(f"{module}:{owner_qualname}")
+    except Exception:
+        yield TestResult(test_id, "error", 0.0, traceback.format_exc())
+        return
+
+    if isinstance(test, type) and issubclass(test, unittest.TestCase):
+        yield from _run_suite(
+            module, unittest.defaultTestLoader.loadTestsFromTestCase(test)
+        )
+        return
+    if isinstance(owner, type) and issubclass(owner, unittest.TestCase):
+        yield from _run_suite(module, owner(test.__name__))
+        return
+
+    try:
+        test()
+    except unittest.SkipTest as e:
+        outcome, message = "skipped", str(e)
+    except AssertionError:
+        outcome, message = "failed", traceback.format_exc()
+    except Exception:
+        outcome, message = "error", traceback.format_exc()
+    else:
+        outcome, message = "passed", ""
+    yield TestResult(test_id, outcome, time.perf_counter() - start, message)
+
+
+def _run_suite(
+    module: str, suite: unittest.TestSuite | unittest.TestCase
+) -> Iterator[TestResult]:
+    """Run a unittest suite, yielding a result per test method."""
+    result = _RecordingResult()
+    suite.run(result)
+    for test, (outcome, duration, message) in result.records.items():
+        qualname = f"{type(test).__qualname__}.{test._testMethodName}"
+        yield TestResult(f"{module}:{qualname}", outcome, duration, message)
+
+
+class _RecordingResult(unittest.TestResult):
+    """A unittest result that records the outcome of every test."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: dict[unittest.TestCase, tuple[str, float, str]] = {}
+        self._start = 0.0
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._start = time.perf_counter()
+
+    def _record(self, test, outcome: str, message: str = ""):
+        previous = self.records.get(test)
+        if previous is not None and previous[0] in ("failed", "error"):
+            # A failing subtest or cleanup fails the whole test.
+            return
+        self.records[test] = (outcome, time.perf_counter() - self._start, message)
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "passed")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "failed", self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skipped", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "passed")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "failed", "Unexpected success.")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            self._record(test, "failed", self._exc_info_to_string(err, test))
@@ -1,24 +1,66 @@
-from collections.abc import Callable, Iterable
+from __future__ import annotations
+
+import builtins
+import inspect
+import os
+import sys
+import warnings
+import weakref
+from collections import ChainMap
+from collections.abc import Callable, Iterable, Sized
+from contextlib import ExitStack, nullcontext
 from sys import stderr
-from typing import Any, Generic
+from types import CodeType, FunctionType, ModuleType
+from typing import TYPE_CHECKING, Any, Generic, Literal, NamedTuple
 from unittest.mock import Mock
-from typing_extensions import deprecated, Self
 
+from funalone.bytecode import (
+    format_attribute_paths,
+    global_attribute_chains,
+    global_names,
+)
 from funalone.default_mocking_context import (
     ContextStates,
     DefaultMockingContext,
+    _process_custom_mocks,
+)
+from funalone.name_rules import (
+    AllowModulePrefix,
+    AllowNameGlob,
+    AllowNameRegex,
+    AllowRule,
+    AllowType,
+    compile_name_allows,
 )
 from funalone.namespaced_function import create_namespaced_function_clone
 from funalone.types import (
+    MockItem,
+    MockMetadata,
     MockOrigin,
     Name,
     NamedObject,
     P,
     R,
-    is_exception,
     normalize_name,
 )
 
+if sys.version_info >= (3, 13):
+    from warnings import deprecated
+else:
+    from typing_extensions import deprecated
+
+# The modules of optional features are imported when a clone first uses them,
+# so that importing funalone doesn't pay for `pathlib`, `tracemalloc`, etc.
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+    from funalone.cassette import Cassette
+    from funalone.code_coverage import CodeCoverage, CoverageData
+    from funalone.cost_model import Cost, CostModel, LatencyReport
+    from funalone.memory_filesystem import MemoryFileSystem
+    from funalone.memory_profile import MemoryProfiler, MemoryReport
+    from funalone.virtual_clock import VirtualClock
+
 
 class IsolatedFunctionClone(Generic[P, R]):
     """A context manager that creates a namespaced clone of a function with
@@ -27,12 +69,37 @@ class IsolatedFunctionClone(Generic[P, R]):
     statistics like access counts.
 
     Attributes:
-        original_function: A reference to the original function..
+        original_function: A reference to the original function. With
+            `weak_original_function`, only a weak reference is kept, so the
+            clone doesn't keep it alive.
         context: A reference to the `globals` context of the isolated function.
+        attribute_paths: The dotted attribute paths the function accesses on
+            its globals, like `os.path.join`.
         mocked_objects: A shortcut reference to the `MockCollection` used by the
             context. Same as `self.context.mocked_objects`.
+        cassette: The `Cassette` being recorded or replayed, if any.
+        clock: The `VirtualClock` that replaces time related dependencies, if
+            any.
+        filesystem: The `MemoryFileSystem` that replaces `open`, `os`,
+            `os.path` and `pathlib.Path`, if any.
+        cost_model: The `CostModel` used to simulate the latency of calls, if
+            any.
+        latency_reports: The simulated `LatencyReport` of every call since the
+            last reset, when the clone has a cost model.
+        profile_memory: Whether every call is profiled with `tracemalloc`.
+        memory_reports: The `MemoryReport` of every profiled call or batch
+            since the last reset.
+        coverage_per_call: The line and branch `CoverageData` of every call
+            since the last reset, when the clone collects coverage.
+        followed_clones: The clones of the callees followed with `follow`, by
+            code object. They share the context of the clone.
+        live_clone_warning_threshold: The number of clones that can be alive at
+            the same time before a `ResourceWarning` is emitted. `None` disables
+            the warning.
     """
 
+    live_clone_warning_threshold: int | None = 1000
+
     def __init__(
         self,
         tested_function: Callable[P, R],
@@ -40,20 +107,90 @@ class IsolatedFunctionClone(Generic[P, R]):
         custom_mocked_objects: dict | Iterable[tuple[NamedObject, Mock]] | None = None,
         name_allow_list: Iterable[NamedObject] | None = None,
         name_allow_condition: Callable[[str, Any], bool] | None = None,
+        name_allow_rules: Iterable[AllowRule] | None = None,
         allow_all_names: bool = False,
         allow_builtins: bool = True,
         allow_exceptions: bool = True,
         autospec_mocks: bool = True,
+        module_spec_depth: int | None = None,
         strip_function_defaults: bool = False,
         log_dependency_access_count: bool = False,
         alert_on_default_mock: bool = False,
+        cassette: str | os.PathLike | None = None,
+        cassette_mode: Literal["auto", "record", "replay"] = "auto",
+        virtual_clock: bool | VirtualClock = False,
+        filesystem: bool | MemoryFileSystem = False,
+        max_calls: dict[Name, int] | None = None,
+        max_total_calls: int | None = None,
+        dependency_costs: dict[Name, Cost] | None = None,
+        max_simulated_latency: float | None = None,
+        profile_memory: bool = False,
+        collect_coverage: bool = False,
+        follow: Iterable[Name | AllowRule] | Callable[[str, Any], bool] | None = None,
+        follow_depth: int = 1,
+        weak_original_function: bool = False,
         **kw_custom_mocked_objects,
     ):
+        default_mocks: dict[str, Any] = {}
+
+        self.clock: VirtualClock | None = None
+        if virtual_clock:
+            from funalone.virtual_clock import VirtualClock
+
+            self.clock = (
+                virtual_clock
+                if isinstance(virtual_clock, VirtualClock)
+                else VirtualClock()
+            )
+            default_mocks |= _stand_in_mocks(tested_function, self.clock.stand_ins())
+
+        self.filesystem: MemoryFileSystem | None = None
+        if filesystem:
+            from funalone.memory_filesystem import MemoryFileSystem
+
+            self.filesystem = (
+                filesystem
+                if isinstance(filesystem, MemoryFileSystem)
+                else MemoryFileSystem()
+            )
+            default_mocks |= _stand_in_mocks(
+                tested_function, self.filesystem.stand_ins()
+            )
+
+        self.cassette: Cassette | None = None
+        self._cassette_path = cassette
+        self._recording_cassette = False
+        if cassette is not None:
+            from funalone.cassette import Cassette
+
+            if cassette_mode == "auto":
+                cassette_mode = "replay" if os.path.exists(cassette) else "record"
+            if cassette_mode == "replay":
+                self.cassette = Cassette.load(cassette)
+                default_mocks |= self.cassette.replay_mocks()
+            elif cassette_mode == "record":
+                self.cassette = Cassette()
+                self._recording_cassette = True
+            else:
+                raise ValueError(f"Unknown cassette mode: {cassette_mode!r}")
+
+        if default_mocks:
+            custom_mocked_objects = default_mocks | _process_custom_mocks(
+                custom_mocked_objects, **kw_custom_mocked_objects
+            )
+            kw_custom_mocked_objects = {}
+
+        attribute_chains = global_attribute_chains(tested_function.__code__)
+        self.attribute_paths = format_attribute_paths(attribute_chains)
         self.context = DefaultMockingContext(
             custom_mocked_objects,
             allow_builtins,
             allow_exceptions,
             specs=tested_function.__globals__ if autospec_mocks else None,
+            attribute_chains=attribute_chains if autospec_mocks else None,
+            module_spec_depth=module_spec_depth,
+            access_budgets=max_calls,
+            total_access_budget=max_total_calls,
             **kw_custom_mocked_objects,
         )
 
@@ -62,26 +199,190 @@ class IsolatedFunctionClone(Generic[P, R]):
             tested_function,
             self.context,
             keep_original_globals=_process_name_allows(
-                allow_all_names, name_allow_list, name_allow_condition, allow_exceptions
+                tested_function.__code__,
+                allow_all_names,
+                name_allow_list,
+                name_allow_condition,
+                allow_exceptions,
+                name_allow_rules,
             ),
             strip_original_defaults=strip_function_defaults,
         )
 
+        self.followed_clones: dict[CodeType, Callable[..., Any]] = {}
+        if follow is not None and follow_depth > 0:
+            self._follow_callees(
+                tested_function,
+                _process_follow(follow),
+                follow_depth,
+                _FollowedAllows(
+                    allow_all_names,
+                    name_allow_list,
+                    name_allow_condition,
+                    allow_exceptions,
+                    name_allow_rules,
+                ),
+            )
+
+        if self._recording_cassette:
+            self._record_original_calls(attribute_chains)
+
+        self.cost_model: CostModel | None = None
+        if dependency_costs:
+            from funalone.cost_model import CostModel
+
+            self.cost_model = CostModel(dependency_costs)
+        self.max_simulated_latency = max_simulated_latency
+        self.latency_reports: list[LatencyReport] = []
+        self.profile_memory = profile_memory
+        self.memory_reports: list[MemoryReport] = []
+        self._code_coverage: CodeCoverage | None = None
+        if collect_coverage:
+            from funalone.code_coverage import CodeCoverage
+
+            self._code_coverage = CodeCoverage(tested_function.__code__)
+        self.coverage_per_call: list[CoverageData] = []
+
         self.context.set_state(ContextStates.SETUP)
-        self.original_function = tested_function
+        self._original_function_ref = (
+            _weak_or_strong_ref(tested_function)
+            if weak_original_function
+            else lambda: tested_function
+        )
         self.log_dependency_access_count = log_dependency_access_count
         self.alert_on_default_mock = alert_on_default_mock
+        _register_live_clone(self)
+
+    @property
+    def original_function(self) -> Callable[P, R]:
+        function = self._original_function_ref()
+        if function is None:
+            raise ReferenceError("The original function no longer exists.")
+        return function
 
     def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        if self._namespaced_function_clone is None:
+            raise RuntimeError("The isolated function clone has been closed.")
+        if self.cost_model is not None:
+            cost_snapshot = self.cost_model.snapshot(self.context)
+        if self.context._has_access_budgets:
+            self.context.start_call(
+                _argument_sizes(self._namespaced_function_clone, args, kwargs)
+            )
+
         self.activate()
-        result = self._namespaced_function_clone(*args, **kwargs)
-        self.deactivate()
+        try:
+            if self.profile_memory or self._code_coverage is not None:
+                result = self._call_instrumented(*args, **kwargs)
+            else:
+                result = self._namespaced_function_clone(*args, **kwargs)
+        finally:
+            self.deactivate()
+            if self.cost_model is not None:
+                self.latency_reports.append(
+                    self.cost_model.report(self.context, cost_snapshot)
+                )
+
+        # Budgets are enforced on access, but the function might have caught it.
+        if self.context.budget_violation is not None:
+            raise self.context.budget_violation
+        if (
+            self.max_simulated_latency is not None
+            and self.latency_reports
+            and self.latency_reports[-1].total > self.max_simulated_latency
+        ):
+            from funalone.cost_model import LatencyBudgetExceededError
+
+            raise LatencyBudgetExceededError(
+                f"The simulated latency of the call was "
+                f"{self.latency_reports[-1].total}, over its budget of "
+                f"{self.max_simulated_latency}. By dependency: "
+                f"{self.latency_reports[-1].by_dependency}"
+            )
         return result
 
+    def _call_instrumented(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        with ExitStack() as instruments:
+            # Callbacks are registered before entering each instrument, so that
+            # they run after it exits, even if the function raises.
+            if self.profile_memory:
+                profiler = self._memory_profiler()
+                instruments.callback(
+                    lambda: self.memory_reports.append(profiler.report)
+                )
+                instruments.enter_context(profiler)
+            if (coverage := self._code_coverage) is not None:
+                instruments.callback(
+                    lambda: self.coverage_per_call.append(coverage.data)
+                )
+                instruments.enter_context(coverage)
+
+            return self._namespaced_function_clone(*args, **kwargs)
+
+    @property
+    def coverage(self) -> CoverageData:
+        """The coverage of all calls since the last reset combined."""
+        if self._code_coverage is None:
+            raise RuntimeError("The isolated function clone doesn't collect coverage.")
+        from funalone.code_coverage import CoverageData
+
+        combined = CoverageData(
+            executable_lines=self._code_coverage.data.executable_lines
+        )
+        for call_coverage in self.coverage_per_call:
+            combined.update(call_coverage)
+        return combined
+
+    def run_batch(
+        self,
+        arguments: Iterable[tuple[Any, ...]],
+        *,
+        reset: bool = True,
+        profile_memory: bool = False,
+    ) -> list[R]:
+        """Call the clone once for every tuple of positional arguments.
+
+        Args:
+            arguments: The positional arguments of every call.
+            reset: Whether to reset the context before every call.
+            profile_memory: Whether to profile the whole batch with
+                `tracemalloc`. The report is appended to `memory_reports`.
+
+        Returns:
+            The result of every call.
+        """
+        results: list[R] = []
+        with self._memory_profiler() if profile_memory else nullcontext() as profiler:
+            for call_arguments in arguments:
+                if reset:
+                    self.context.reset()
+                results.append(self(*call_arguments))  # type: ignore[call-arg]
+
+        if profiler is not None:
+            self.memory_reports.append(profiler.report)
+        return results
+
+    def _memory_profiler(self) -> MemoryProfiler:
+        from funalone.memory_profile import MemoryProfiler
+
+        return MemoryProfiler(self._namespaced_function_clone.__code__)
+
+    @property
+    def simulated_latency(self) -> float:
+        """The simulated latency of the last call."""
+        if not self.latency_reports:
+            raise RuntimeError("No simulated latency has been recorded.")
+        return self.latency_reports[-1].total
+
     def __enter__(self) -> Self:
         return self
 
-    def __exit__(self, *args):
+    def __exit__(self, exc_type, *args):
+        # Recordings of calls that raised might be partial, so they're not
+        # saved to be replayed.
+        if self._recording_cassette and exc_type is None:
+            self.save_cassette()
+
         if self.log_dependency_access_count:
             print(self.dependency_access_count_message(), file=stderr)
 
@@ -91,13 +392,146 @@ class IsolatedFunctionClone(Generic[P, R]):
         self.deactivate()
 
     def activate(self):
-        self.context.set_state(ContextStates.ACTIVE)
+        self.context.activate()
 
     def deactivate(self):
-        self.context.set_state(ContextStates.ENDED)
+        self.context.deactivate()
+
+    def prewarm(self) -> Self:
+        """Generate the mocks of every global name the function loads now.
+
+        Moves the cost of creating and autospec-ing mocks from the first call
+        to the point the clone is built, for clones reused by many tests.
+        """
+        self.context.prewarm(global_names(self._namespaced_function_clone.__code__))
+        for followed_code in self.followed_clones:
+            self.context.prewarm(global_names(followed_code))
+        return self
 
     def reset(self):
         self.context.reset()
+        if self.cassette is not None and not self._recording_cassette:
+            self.cassette.rewind()
+        if self.clock is not None:
+            self.clock.reset()
+        self.latency_reports.clear()
+        self.memory_reports.clear()
+        self.coverage_per_call.clear()
+
+    def advance_time(self, seconds: float):
+        """Advance the virtual clock of the clone by a number of seconds."""
+        if self.clock is None:
+            raise RuntimeError("The isolated function clone has no virtual clock.")
+        self.clock.advance(seconds)
+
+    def save_cassette(self):
+        """Write the results recorded so far to the cassette file."""
+        if self.cassette is None or self._cassette_path is None:
+            raise RuntimeError("The isolated function clone has no cassette.")
+        self.cassette.save(self._cassette_path)
+
+    def _record_original_calls(
+        self, attribute_chains: dict[str, frozenset[tuple[str, ...]]]
+    ):
+        """Record the calls to allowed original functions, and to the
+        attributes of allowed original modules along their attribute chains."""
+        assert self.cassette is not None
+        for name, mock_item in self.context.to_debug_dict().items():
+            if mock_item.metadata.origin != MockOrigin.FUNCTION_ORIGINAL:
+                continue
+            if isinstance(mock_item.object, ModuleType):
+                if chains := attribute_chains.get(name):
+                    mock_item.object = self.cassette.record_attributes(
+                        name, mock_item.object, chains
+                    )
+            elif callable(mock_item.object) and not isinstance(mock_item.object, type):
+                mock_item.object = self.cassette.record(name, mock_item.object)
+
+    def _follow_callees(
+        self,
+        function: Callable[..., Any],
+        follow: tuple[list[Name], list[AllowRule], Callable[[str, Any], bool] | None],
+        depth: int,
+        allows: _FollowedAllows,
+    ):
+        """Clone the callees of a function that match `follow` into the context.
+
+        Callees are cloned against the same context, keeping the originals
+        the name allow configuration allows for them, and followed in turn
+        until `depth` levels deep. Names already in the context, like custom
+        mocks and allowed originals, are not followed.
+        """
+        follow_names, follow_rules, follow_condition = follow
+        follow_table = compile_name_allows(
+            function.__code__,
+            (normalize_name(name) for name in follow_names),
+            follow_rules,
+            follow_condition,
+            allow_exceptions=False,
+        )
+        for name in sorted(global_names(function.__code__)):
+            callee = function.__globals__.get(name)
+            if (
+                dict.__contains__(self.context, name)
+                or not isinstance(callee, FunctionType)
+                or not follow_table(name, callee)
+            ):
+                continue
+
+            followed_clone = self.followed_clones.get(callee.__code__)
+            is_new = followed_clone is None
+            if followed_clone is None:
+                followed_clone = create_namespaced_function_clone(
+                    callee,
+                    self.context,
+                    keep_original_globals=_process_name_allows(
+                        callee.__code__, *allows
+                    ),
+                )
+                self.followed_clones[callee.__code__] = followed_clone
+                self._add_followed_specs(callee)
+
+            # Set before following the callee, so that recursion ends here.
+            dict.__setitem__(
+                self.context,
+                name,
+                MockItem(
+                    followed_clone,
+                    MockMetadata(
+                        MockOrigin.FOLLOWED_CLONE, 0, 0, self.context._access_counters
+                    ),
+                ),
+            )
+            if is_new and depth > 1:
+                self._follow_callees(callee, follow, depth - 1, allows)
+
+    def _add_followed_specs(self, callee: FunctionType):
+        if not self.context.specs:
+            # Mocks are not autospec-ed.
+            return
+        specs = self.context.specs
+        if not isinstance(specs, ChainMap):
+            specs = ChainMap(specs)
+        if all(specs_map is not callee.__globals__ for specs_map in specs.maps):
+            specs.maps.append(callee.__globals__)
+        object.__setattr__(self.context, "specs", specs)
+
+        attribute_chains = dict(self.context.attribute_chains)
+        for name, chains in global_attribute_chains(callee.__code__).items():
+            attribute_chains[name] = frozenset(attribute_chains.get(name, ())) | chains
+        object.__setattr__(self.context, "attribute_chains", attribute_chains)
+
+    def close(self):
+        """Release the context, its mocks and specs and the cloned function.
+
+        The clone can't be called after it has been closed. This is useful in
+        long running test suites where many clones are created, since a clone
+        keeps every mock it generated alive until it is garbage collected.
+        """
+        self.context.close()
+        self.followed_clones.clear()
+        self._namespaced_function_clone = None  # type: ignore
+        _live_clones.discard(self)
 
     def dependency_access_count_message(self) -> str:
         accessct_str = "\n\t".join(
@@ -113,6 +547,10 @@ class IsolatedFunctionClone(Generic[P, R]):
             name
             for name, mock_item in self.context.to_debug_dict().items()
             if mock_item.metadata.origin == MockOrigin.GENERATED_WHILE_ACTIVE
+            or (
+                mock_item.metadata.origin == MockOrigin.PREWARMED
+                and mock_item.metadata.active_access_count
+            )
         ]
         return "\n".join(
             f"`{key}` is not properly mocked and uses a default Mock."
@@ -167,34 +605,106 @@ def with_isolated_function_clone(
     return wrapper
 
 
+_live_clones: weakref.WeakSet[IsolatedFunctionClone] = weakref.WeakSet()
+
+
+def _register_live_clone(clone: IsolatedFunctionClone) -> None:
+    _live_clones.add(clone)
+    threshold = IsolatedFunctionClone.live_clone_warning_threshold
+    if threshold is not None and len(_live_clones) > threshold:
+        warnings.warn(
+            f"More than {threshold} isolated function clones are alive. "
+            "Call `close()` on clones that are no longer needed to release "
+            "their mocks.",
+            ResourceWarning,
+            stacklevel=3,
+        )
+
+
+def _stand_in_mocks(
+    function: Callable[..., Any], stand_ins: Iterable[tuple[Any, Any]]
+) -> dict[str, Any]:
+    """Map the globals of a function that have a stand-in to that stand-in.
+
+    Names that are not globals of the function are looked up in the builtins.
+    """
+    replacements = {id(original): stand_in for original, stand_in in stand_ins}
+    result = {}
+    for name in global_names(function.__code__):
+        value = function.__globals__.get(name, getattr(builtins, name, None))
+        if id(value) in replacements:
+            result[name] = replacements[id(value)]
+    return result
+
+
+def _weak_or_strong_ref(obj: Any) -> Callable[[], Any]:
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        return lambda: obj
+
+
+class _FollowedAllows(NamedTuple):
+    """The name allow configuration applied to the callees followed."""
+
+    allow_all: bool
+    name_allow_list: Iterable[Name] | None
+    name_allow_condition: Callable[[str, Any], bool] | None
+    allow_exceptions: bool
+    name_allow_rules: Iterable[AllowRule] | None
+
+
+def _process_follow(
+    follow: Iterable[Name | AllowRule] | Callable[[str, Any], bool],
+) -> tuple[list[Name], list[AllowRule], Callable[[str, Any], bool] | None]:
+    if callable(follow):
+        return [], [], follow
+    names: list[Name] = []
+    rules: list[AllowRule] = []
+    for item in follow:
+        if isinstance(
+            item, (AllowModulePrefix, AllowType, AllowNameGlob, AllowNameRegex)
+        ):
+            rules.append(item)
+        else:
+            names.append(item)
+    return names, rules, None
+
+
 def _process_name_allows(
+    code: CodeType,
     allow_all: bool = False,
     name_allow_list: Iterable[Name] | None = None,
     name_allow_condition: Callable[[str, Any], bool] | None = None,
     allow_exceptions: bool = True,
+    name_allow_rules: Iterable[AllowRule] | None = None,
 ) -> Callable[[str, Any], bool] | bool:
     if allow_all:
         return allow_all
 
-    checks: list[Callable[[str, Any], bool]] = []
-    if name_allow_list:
-        normalized_name_allow_set = (
-            {normalize_name(name) for name in name_allow_list}
-            if name_allow_list
-            else set()
-        )
-
-        def name_is_in_list(name: str, _obj: Any) -> bool:
-            return name in normalized_name_allow_set
-
-        checks.append(name_is_in_list)
+    return compile_name_allows(
+        code,
+        (normalize_name(name) for name in name_allow_list or ()),
+        name_allow_rules or (),
+        name_allow_condition,
+        allow_exceptions,
+    )
 
-    if name_allow_condition:
-        checks.append(name_allow_condition)
 
-    if allow_exceptions:
-        checks.append(lambda _n, o: is_exception(o))
+def _argument_sizes(
+    function: Callable, args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> dict[str, int]:
+    """Return the sizes of the sized arguments of a call, by parameter name.
 
-    return lambda name, object: (
-        any(check(name, object) for check in checks) if checks else False
-    )
+    Strings and bytes are not counted as sized arguments.
+    """
+    try:
+        arguments = inspect.signature(function).bind(*args, **kwargs).arguments
+    except TypeError:
+        # The call itself will raise the error.
+        return {}
+    sizes = {}
+    for name, value in arguments.items():
+        if isinstance(value, Sized) and not isinstance(value, (str, bytes, bytearray)):
+            sizes[name] = len(value)
+    return sizes
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, Generic, overload
+
+from funalone.isolated_function_clone import IsolatedFunctionClone
+from funalone.types import P, R
+
+
+class isolated_clone(Generic[P, R]):
+    """The declaration of an isolated function clone of an `IsolatedTestCase`.
+
+    Declared as a class attribute, it reads as the clone built for the class:
+
+        class ExampleTests(IsolatedTestCase, TestCase):
+            clone = isolated_clone(tested_function, name_allow_list=["helper"])
+
+            def test_example(self):
+                self.assertEqual(self.clone(1, 2), 3)
+    """
+
+    def __init__(self, function: Callable[P, R], **clone_kwargs):
+        """
+        Args:
+            function: The function to clone.
+            clone_kwargs: The parameters of the `IsolatedFunctionClone`.
+        """
+        self.function = function
+        self.clone_kwargs = clone_kwargs
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def build(self) -> IsolatedFunctionClone[P, R]:
+        return IsolatedFunctionClone(self.function, **self.clone_kwargs).prewarm()
+
+    @overload
+    def __get__(self, instance: None, owner: type) -> isolated_clone[P, R]: ...
+
+    @overload
+    def __get__(self, instance: object, owner: type) -> IsolatedFunctionClone[P, R]: ...
+
+    def __get__(self, instance: object | None, owner: type) -> Any:
+        if instance is None:
+            return self
+        clones = owner.__dict__.get("_isolated_clones")
+        if clones is None or self.name not in clones:
+            raise RuntimeError(
+                f"The isolated clone `{self.name}` is built in `setUpClass`. Make "
+                f"sure `{owner.__name__}.setUpClass` calls `super().setUpClass()`."
+            )
+        return clones[self.name]
+
+
+class IsolatedTestCase:
+    """A `unittest.TestCase` mixin that shares isolated clones between tests.
+
+    Clones declared with `isolated_clone` are built once per class in
+    `setUpClass`, with all their mocks generated and autospec-ed up front,
+    reset in `setUp` before every test and closed in `tearDownClass`. This
+    avoids paying the setup cost of a clone in every test method.
+
+    Subclasses that override these methods have to call `super()`.
+    """
+
+    _isolated_clones: dict[str, IsolatedFunctionClone]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()  # type: ignore[misc]
+        cls._isolated_clones = {
+            name: declaration.build()
+            for name, declaration in cls._clone_declarations().items()
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        for clone in cls.__dict__.get("_isolated_clones", {}).values():
+            clone.close()
+        cls._isolated_clones = {}
+        super().tearDownClass()  # type: ignore[misc]
+
+    def setUp(self):
+        super().setUp()  # type: ignore[misc]
+        for clone in type(self).__dict__.get("_isolated_clones", {}).values():
+            clone.reset()
+
+    @classmethod
+    def _clone_declarations(cls) -> dict[str, isolated_clone]:
+        declarations: dict[str, isolated_clone] = {}
+        for klass in reversed(cls.__mro__):
+            for name, attribute in vars(klass).items():
+                if isinstance(attribute, isolated_clone):
+                    declarations[name] = attribute
+                elif name in declarations:
+                    del declarations[name]
+        return declarations
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import builtins
+import errno
+import io
+import os
+import pathlib
+import posixpath
+from collections.abc import Iterable, Iterator
+from typing import Any
+from unittest.mock import MagicMock
+
+from funalone.stand_ins import StandInModule
+
+# Filesystem functions of `os` and `os.path` that the in-memory filesystem
+# doesn't support, and that would otherwise use the real filesystem.
+_UNSUPPORTED_OS_FUNCTIONS = (
+    "chmod",
+    "chown",
+    "link",
+    "lstat",
+    "open",
+    "readlink",
+    "removedirs",
+    "renames",
+    "scandir",
+    "stat",
+    "symlink",
+    "truncate",
+    "utime",
+    "walk",
+)
+_UNSUPPORTED_PATH_FUNCTIONS = (
+    "getatime",
+    "getctime",
+    "getmtime",
+    "ismount",
+    "samefile",
+)
+
+
+class MemoryFileSystem:
+    """An in-memory stand-in for the filesystem used by an isolated function.
+
+    Serves replacements for the `open` builtin, `os`, `os.path` and
+    `pathlib.Path` that read and write from memory. Paths are POSIX paths,
+    relative paths are resolved from `cwd`.
+
+    Attributes:
+        files: The contents of every file, by absolute path.
+        directories: The absolute paths of every directory.
+        writes: The absolute paths of the files written, in the order in which
+            they were closed.
+        cwd: The current working directory.
+        Path: A `pathlib.Path` replacement bound to this filesystem.
+    """
+
+    files: dict[str, bytes]
+    directories: set[str]
+    writes: list[str]
+    cwd: str
+
+    def __init__(
+        self, files: dict[str, str | bytes] | None = None, cwd: str = "/"
+    ) -> None:
+        self.files = {}
+        self.directories = {"/"}
+        self.writes = []
+        self.cwd = "/"
+        self.makedirs(cwd, exist_ok=True)
+        self.cwd = self._path(cwd)
+        for path, content in (files or {}).items():
+            self.seed(path, content)
+
+        self.Path = type("Path", (MemoryPath,), {"_filesystem": self})
+
+    def seed(self, path: str | os.PathLike, content: str | bytes) -> None:
+        """Create a file, and its parent directories, without recording a write."""
+        path = self._path(path)
+        self.makedirs(posixpath.dirname(path), exist_ok=True)
+        self.files[path] = content.encode() if isinstance(content, str) else content
+
+    def read_bytes(self, path: str | os.PathLike) -> bytes:
+        path = self._path(path)
+        if path not in self.files:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+        return self.files[path]
+
+    def read_text(self, path: str | os.PathLike, encoding: str = "utf-8") -> str:
+        return self.read_bytes(path).decode(encoding)
+
+    def open(
+        self,
+        file: str | os.PathLike,
+        mode: str = "r",
+        buffering: int = -1,
+        encoding: str | None = None,
+        errors: str | None = None,
+        newline: str | None = None,
+        closefd: bool = True,
+        opener: Any = None,
+    ) -> Any:
+        """Open a file in memory, with the same interface as the `open` builtin."""
+        path = self._path(file)
+        if path in self.directories:
+            raise _error(IsADirectoryError, errno.EISDIR, path)
+        if posixpath.dirname(path) not in self.directories:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+
+        if "r" in mode:
+            content = self.read_bytes(path)
+        elif "x" in mode and path in self.files:
+            raise _error(FileExistsError, errno.EEXIST, path)
+        elif "a" in mode:
+            content = self.files.get(path, b"")
+        else:
+            content = b""
+
+        writable = "+" in mode or "r" not in mode
+        if writable:
+            # Like the real `open`, the file is created or truncated right away.
+            self.files[path] = content
+
+        buffer = _MemoryFile(self, path, content, "r" in mode or "+" in mode, writable)
+        if "a" in mode:
+            buffer.seek(0, io.SEEK_END)
+        if "b" in mode:
+            return buffer
+        return io.TextIOWrapper(
+            buffer, encoding=encoding or "utf-8", errors=errors, newline=newline
+        )
+
+    def exists(self, path: str | os.PathLike) -> bool:
+        path = self._path(path)
+        return path in self.files or path in self.directories
+
+    def isfile(self, path: str | os.PathLike) -> bool:
+        return self._path(path) in self.files
+
+    def isdir(self, path: str | os.PathLike) -> bool:
+        return self._path(path) in self.directories
+
+    def getsize(self, path: str | os.PathLike) -> int:
+        return len(self.read_bytes(path))
+
+    def abspath(self, path: str | os.PathLike) -> str:
+        return self._path(path)
+
+    def getcwd(self) -> str:
+        return self.cwd
+
+    def chdir(self, path: str | os.PathLike) -> None:
+        path = self._path(path)
+        if path not in self.directories:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+        self.cwd = path
+
+    def listdir(self, path: str | os.PathLike = ".") -> list[str]:
+        path = self._path(path)
+        if path not in self.directories:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+        return sorted(
+            posixpath.basename(entry)
+            for entry in (*self.files, *self.directories)
+            if entry != path and posixpath.dirname(entry) == path
+        )
+
+    def mkdir(self, path: str | os.PathLike, mode: int = 0o777) -> None:
+        path = self._path(path)
+        if self.exists(path):
+            raise _error(FileExistsError, errno.EEXIST, path)
+        if posixpath.dirname(path) not in self.directories:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+        self.directories.add(path)
+
+    def makedirs(
+        self, path: str | os.PathLike, mode: int = 0o777, exist_ok: bool = False
+    ) -> None:
+        path = self._path(path)
+        if path in self.files or (path in self.directories and not exist_ok):
+            raise _error(FileExistsError, errno.EEXIST, path)
+        while path not in self.directories:
+            self.directories.add(path)
+            path = posixpath.dirname(path)
+
+    def remove(self, path: str | os.PathLike) -> None:
+        path = self._path(path)
+        if path in self.directories:
+            raise _error(IsADirectoryError, errno.EISDIR, path)
+        if self.files.pop(path, None) is None:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+
+    def rmdir(self, path: str | os.PathLike) -> None:
+        path = self._path(path)
+        if path not in self.directories:
+            raise _error(FileNotFoundError, errno.ENOENT, path)
+        if self.listdir(path):
+            raise _error(OSError, errno.ENOTEMPTY, path)
+        self.directories.discard(path)
+
+    def replace(self, src: str | os.PathLike, dst: str | os.PathLike) -> None:
+        content = self.read_bytes(src)
+        self.remove(src)
+        self.files[self._path(dst)] = content
+
+    def stand_ins(self) -> list[tuple[Any, Any]]:
+        """Return pairs of filesystem related objects and their replacements.
+
+        `os`, `os.path` and `pathlib` are replaced by modules that override
+        only their filesystem functions, with mocks backed by this filesystem,
+        so calls can be asserted as with any other mock. Their other
+        attributes, like `os.environ` or `pathlib.PurePath`, are the real
+        ones, and `os.path` is `posixpath`, since paths are POSIX paths.
+        Filesystem functions this filesystem doesn't support raise
+        `NotImplementedError` instead of using the real filesystem. The
+        functions themselves are replaced too, for functions that import
+        them directly.
+        """
+        open_mock = MagicMock(name="open", side_effect=self.open)
+
+        path_functions = {
+            "exists": self.exists,
+            "lexists": self.exists,
+            "isfile": self.isfile,
+            "isdir": self.isdir,
+            "islink": lambda path: False,
+            "getsize": self.getsize,
+            "abspath": self.abspath,
+            "realpath": self.abspath,
+        }
+        path_module = StandInModule(
+            posixpath,
+            {
+                **{
+                    name: MagicMock(name=f"os.path.{name}", side_effect=function)
+                    for name, function in path_functions.items()
+                },
+                **_unsupported("os.path", _UNSUPPORTED_PATH_FUNCTIONS),
+            },
+        )
+
+        os_functions = {
+            "getcwd": self.getcwd,
+            "chdir": self.chdir,
+            "listdir": self.listdir,
+            "mkdir": self.mkdir,
+            "makedirs": self.makedirs,
+            "rmdir": self.rmdir,
+            "remove": self.remove,
+            "unlink": self.remove,
+            "rename": self.replace,
+            "replace": self.replace,
+        }
+        os_module = StandInModule(
+            os,
+            {
+                "path": path_module,
+                "sep": "/",
+                "altsep": None,
+                **{
+                    name: MagicMock(name=f"os.{name}", side_effect=function)
+                    for name, function in os_functions.items()
+                },
+                **_unsupported("os", _UNSUPPORTED_OS_FUNCTIONS),
+            },
+        )
+
+        pathlib_module = StandInModule(
+            pathlib, {"Path": self.Path, "PosixPath": self.Path}
+        )
+
+        stand_ins: list[tuple[Any, Any]] = [
+            (builtins.open, open_mock),
+            (os, os_module),
+            (os.path, path_module),
+            (pathlib, pathlib_module),
+            (pathlib.Path, self.Path),
+        ]
+        # Functions imported on their own, like `from os.path import exists`,
+        # are replaced too.
+        stand_ins.extend(
+            (getattr(posixpath, name), stand_in)
+            for name, stand_in in vars(path_module).items()
+            if name in path_functions or name in _UNSUPPORTED_PATH_FUNCTIONS
+        )
+        stand_ins.extend(
+            (getattr(os, name), stand_in)
+            for name, stand_in in vars(os_module).items()
+            if name in os_functions or name in _UNSUPPORTED_OS_FUNCTIONS
+        )
+        return stand_ins
+
+    def _path(self, path: str | os.PathLike) -> str:
+        return posixpath.normpath(posixpath.join(self.cwd, os.fspath(path)))
+
+
+class MemoryPath(pathlib.PurePosixPath):
+    """A `pathlib.Path` replacement backed by a `MemoryFileSystem`."""
+
+    _filesystem: MemoryFileSystem
+
+    @classmethod
+    def cwd(cls) -> MemoryPath:
+        return cls(cls._filesystem.getcwd())
+
+    def absolute(self) -> MemoryPath:
+        return type(self)(self._filesystem.abspath(self))
+
+    resolve = absolute
+
+    def open(
+        self,
+        mode: str = "r",
+        buffering: int = -1,
+        encoding: str | None = None,
+        errors: str | None = None,
+        newline: str | None = None,
+    ) -> Any:
+        return self._filesystem.open(self, mode, buffering, encoding, errors, newline)
+
+    def read_bytes(self) -> bytes:
+        return self._filesystem.read_bytes(self)
+
+    def read_text(self, encoding: str | None = None, errors: str | None = None) -> str:
+        with self.open(encoding=encoding, errors=errors) as file:
+            return file.read()
+
+    def write_bytes(self, data: bytes) -> int:
+        with self.open("wb") as file:
+            return file.write(data)
+
+    def write_text(
+        self,
+        data: str,
+        encoding: str | None = None,
+        errors: str | None = None,
+        newline: str | None = None,
+    ) -> int:
+        with self.open("w", encoding=encoding, errors=errors, newline=newline) as file:
+            return file.write(data)
+
+    def exists(self) -> bool:
+        return self._filesystem.exists(self)
+
+    def is_file(self) -> bool:
+        return self._filesystem.isfile(self)
+
+    def is_dir(self) -> bool:
+        return self._filesystem.isdir(self)
+
+    def iterdir(self) -> Iterator[MemoryPath]:
+        for name in self._filesystem.listdir(self):
+            yield self / name
+
+    def mkdir(self, mode: int = 0o777, parents: bool = False, exist_ok: bool = False):
+        if parents:
+            self._filesystem.makedirs(self, mode, exist_ok=exist_ok)
+        elif not (exist_ok and self.is_dir()):
+            self._filesystem.mkdir(self, mode)
+
+    def unlink(self, missing_ok: bool = False) -> None:
+        try:
+            self._filesystem.remove(self)
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+
+    def rmdir(self) -> None:
+        self._filesystem.rmdir(self)
+
+
+class _MemoryFile(io.BytesIO):
+    """A file opened in a `MemoryFileSystem` that saves its content on close."""
+
+    def __init__(
+        self,
+        filesystem: MemoryFileSystem,
+        path: str,
+        content: bytes,
+        readable: bool,
+        writable: bool,
+    ) -> None:
+        super().__init__(content)
+        self.name = path
+        self._filesystem = filesystem
+        self._readable = readable
+        self._writable = writable
+
+    def readable(self) -> bool:
+        return self._readable
+
+    def writable(self) -> bool:
+        return self._writable
+
+    def read(self, size: int | None = -1) -> bytes:
+        if not self._readable:
+            raise io.UnsupportedOperation("not readable")
+        return super().read(size)
+
+    def write(self, data: Any) -> int:
+        if not self._writable:
+            raise io.UnsupportedOperation("not writable")
+        return super().write(data)
+
+    def flush(self) -> None:
+        super().flush()
+        if self._writable and not self.closed:
+            self._filesystem.files[self.name] = self.getvalue()
+
+    def close(self) -> None:
+        if self._writable and not self.closed:
+            self.flush()
+            self._filesystem.writes.append(self.name)
+        super().close()
+
+
+def _unsupported(module: str, names: Iterable[str]) -> dict[str, Any]:
+    def unsupported(name: str):
+        def function(*args, **kwargs):
+            raise NotImplementedError(
+                f"`{module}.{name}` isn't supported by the in-memory filesystem."
+            )
+
+        return function
+
+    return {name: unsupported(name) for name in names}
+
+
+def _error(error_class: type[OSError], code: int, path: str) -> OSError:
+    return error_class(code, os.strerror(code), path)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import tracemalloc
+from dataclasses import dataclass, field
+from types import CodeType
+
+from funalone.bytecode import iter_code_objects
+
+
+@dataclass
+class AllocationSite:
+    """Memory allocated by a single line of the profiled function.
+
+    Attributes:
+        lineno: The line number in the function's source file.
+        size: The net number of bytes allocated by the line.
+        count: The net number of memory blocks allocated by the line.
+    """
+
+    lineno: int
+    size: int
+    count: int
+
+
+@dataclass
+class MemoryReport:
+    """The memory allocated while running an isolated function.
+
+    Attributes:
+        peak: The peak number of bytes allocated by the process over the
+            memory in use when profiling started. This includes the memory
+            allocated by mocks. `None` if `tracemalloc` was already tracing
+            with a higher peak than any reached while profiling, as the peak
+            while profiling is then unknown.
+        net: The number of bytes allocated, and not freed, by the code of the
+            function itself.
+        top_sites: The lines of the function that allocated the most memory.
+    """
+
+    peak: int | None = 0
+    net: int = 0
+    top_sites: list[AllocationSite] = field(default_factory=list)
+
+
+class MemoryProfiler:
+    """A context manager that profiles the memory allocated by a code object.
+
+    Uses `tracemalloc`, which is started while profiling if it wasn't running
+    already. The peak traced by `tracemalloc` isn't reset, so profilers can be
+    nested and other users of `tracemalloc` keep their peak, but the peak of
+    the report is unknown when the traced peak was reached before profiling.
+    Net allocations and allocation sites are limited to the lines of the code
+    object and its nested code objects. The report is available in `report`
+    after the block exits.
+    """
+
+    def __init__(self, code: CodeType, top: int = 10):
+        self.filename = code.co_filename
+        self.lines = frozenset(
+            line
+            for nested_code in iter_code_objects(code)
+            for _start, _end, line in nested_code.co_lines()
+            if line is not None
+        )
+        self.top = top
+        self.report = MemoryReport()
+
+    def __enter__(self) -> MemoryProfiler:
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._before = self._snapshot()
+        self._baseline, self._peak_before = tracemalloc.get_traced_memory()
+        return self
+
+    def __exit__(self, *args) -> None:
+        _current, peak = tracemalloc.get_traced_memory()
+        after = self._snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        sites = [
+            AllocationSite(stat.traceback[0].lineno, stat.size_diff, stat.count_diff)
+            for stat in after.compare_to(self._before, "lineno")
+            if stat.traceback[0].lineno in self.lines
+        ]
+        self.report = MemoryReport(
+            # A peak reached before profiling started hides the one reached
+            # while profiling.
+            peak=(
+                peak - self._baseline
+                if self._started_tracing or peak > self._peak_before
+                else None
+            ),
+            net=sum(site.size for site in sites),
+            top_sites=sorted(
+                (site for site in sites if site.size > 0),
+                key=lambda site: site.size,
+                reverse=True,
+            )[: self.top],
+        )
+        del self._before
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, self.filename)]
+        )
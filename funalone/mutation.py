@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import dis
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Any
+
+from funalone.isolated_function_clone import IsolatedFunctionClone
+from funalone.parallel import fork_map
+
+_COMPARISON_FLIPS = {
+    "<": ">=",
+    ">=": "<",
+    ">": "<=",
+    "<=": ">",
+    "==": "!=",
+    "!=": "==",
+}
+# The comparison operator is stored in the high bits of the argument of
+# `COMPARE_OP` since Python 3.12, with flags in the low bits.
+if sys.version_info >= (3, 13):
+    _COMPARE_OP_SHIFT = 5
+elif sys.version_info >= (3, 12):
+    _COMPARE_OP_SHIFT = 4
+else:
+    _COMPARE_OP_SHIFT = 0
+_NEGATED_OPNAMES = {"IS_OP": "`is` / `is not`", "CONTAINS_OP": "`in` / `not in`"}
+
+
+def _jump_swaps() -> dict[int, int]:
+    swaps = {}
+    for name, opcode in dis.opmap.items():
+        for condition, opposite in (
+            ("IF_TRUE", "IF_FALSE"),
+            ("IF_NONE", "IF_NOT_NONE"),
+        ):
+            partner = name.replace(condition, opposite)
+            if partner != name and partner in dis.opmap:
+                swaps[opcode] = dis.opmap[partner]
+                swaps[dis.opmap[partner]] = opcode
+    return swaps
+
+
+_JUMP_SWAPS = _jump_swaps()
+
+
+@dataclass(frozen=True)
+class Mutant:
+    """A mutated version of the code of a function.
+
+    Attributes:
+        description: What was changed, and where.
+        code: The mutated code object.
+    """
+
+    description: str
+    code: CodeType
+
+
+def generate_mutants(code: CodeType, docstring: str | None = None) -> list[Mutant]:
+    """Generate the mutants of a code object and its nested code objects.
+
+    Mutants are built with `CodeType.replace`, without touching the source.
+    Comparisons are flipped (`<` to `>=`, `==` to `!=`, `is` to `is not`,
+    `in` to `not in`), conditional jumps are negated, which also swaps `and`
+    and `or`, and constants are changed (numbers are incremented, booleans
+    negated and strings emptied). The docstring is never mutated.
+    """
+    return [
+        Mutant(description, mutated_code)
+        for description, mutated_code in _mutate(code, docstring)
+    ]
+
+
+def _mutate(code: CodeType, docstring: str | None) -> Iterator[tuple[str, CodeType]]:
+    offset_lines = {
+        offset: line
+        for start, end, line in code.co_lines()
+        for offset in range(start, end, 2)
+    }
+    co_code = code.co_code
+
+    for instruction in dis.get_instructions(code):
+        if instruction.arg is None or instruction.arg > 0xFF:
+            # Arguments that need an `EXTENDED_ARG` prefix are not mutated.
+            continue
+        location = f"{code.co_name}, line {offset_lines.get(instruction.offset)}"
+
+        new_opcode, new_arg, change = instruction.opcode, instruction.arg, None
+        if instruction.opname == "COMPARE_OP":
+            operator_index = instruction.arg >> _COMPARE_OP_SHIFT
+            operator = dis.cmp_op[operator_index]
+            if operator in _COMPARISON_FLIPS:
+                flipped = _COMPARISON_FLIPS[operator]
+                flags = instruction.arg & ((1 << _COMPARE_OP_SHIFT) - 1)
+                new_arg = (dis.cmp_op.index(flipped) << _COMPARE_OP_SHIFT) | flags
+                change = f"`{operator}` -> `{flipped}`"
+        elif instruction.opname in _NEGATED_OPNAMES:
+            new_arg = instruction.arg ^ 1
+            change = f"negated {_NEGATED_OPNAMES[instruction.opname]}"
+        elif instruction.opcode in _JUMP_SWAPS:
+            new_opcode = _JUMP_SWAPS[instruction.opcode]
+            change = f"{instruction.opname} -> {dis.opname[new_opcode]}"
+
+        if change is not None:
+            mutated = bytearray(co_code)
+            mutated[instruction.offset] = new_opcode
+            mutated[instruction.offset + 1] = new_arg
+            yield f"{location}: {change}", code.replace(co_code=bytes(mutated))
+
+    consts = code.co_consts
+    for index, const in enumerate(consts):
+        if isinstance(const, CodeType):
+            for description, nested_code in _mutate(const, None):
+                yield (
+                    description,
+                    code.replace(
+                        co_consts=(*consts[:index], nested_code, *consts[index + 1 :])
+                    ),
+                )
+            continue
+
+        mutated_const = _mutate_const(const, docstring)
+        if mutated_const is not _UNCHANGED:
+            yield (
+                f"{code.co_name}: constant {const!r} -> {mutated_const!r}",
+                code.replace(
+                    co_consts=(*consts[:index], mutated_const, *consts[index + 1 :])
+                ),
+            )
+
+
+_UNCHANGED = object()
+
+
+def _mutate_const(const: Any, docstring: str | None) -> Any:
+    if isinstance(const, bool):
+        return not const
+    if isinstance(const, (int, float)):
+        return const + 1
+    if isinstance(const, str) and const and const != docstring:
+        return ""
+    return _UNCHANGED
+
+
+@dataclass
+class MutantResult:
+    """The result of running the test cases against a mutant.
+
+    Attributes:
+        description: What was changed in the mutant.
+        killed: Whether any test case detected the mutant.
+        reason: How the mutant was detected, empty if it survived.
+    """
+
+    description: str
+    killed: bool
+    reason: str = ""
+
+
+@dataclass
+class MutationReport:
+    """The results of a mutation testing run."""
+
+    results: list[MutantResult] = field(default_factory=list)
+
+    @property
+    def survivors(self) -> list[MutantResult]:
+        return [result for result in self.results if not result.killed]
+
+    @property
+    def score(self) -> float:
+        """The fraction of mutants killed."""
+        if not self.results:
+            return 1.0
+        return 1 - len(self.survivors) / len(self.results)
+
+
+class MutationRunner:
+    """Run a table of test cases against mutants of a function.
+
+    The mutants are swapped into a single `IsolatedFunctionClone`, so they all
+    share the same context and mocks, which are reset between cases. A mutant
+    is killed if a test case fails its checks, or if its outcome differs from
+    that of the original function: its result, the type of the exception it
+    raised or the calls made to the mocks.
+
+    Test cases are dicts, like those of a declarative test table, with the
+    positional `args`, optional `kwargs` and optional `checks`, which may have
+    the expected `result` or the exception type it `raises`.
+
+    Attributes:
+        tested_function: The function to mutate.
+        test_cases: The test cases.
+        clone: The clone used to run the mutants.
+        mutants: The mutants of the function.
+    """
+
+    def __init__(
+        self,
+        tested_function: Callable[..., Any],
+        test_cases: Iterable[dict],
+        *,
+        processes: int | None = None,
+        timeout: float | None = 10.0,
+        compare_outcomes: bool = True,
+        **clone_kwargs,
+    ):
+        """
+        Args:
+            tested_function: The function to mutate.
+            test_cases: The test cases.
+            processes: The number of worker processes used to run mutants in
+                parallel. `None` uses the CPU count.
+            timeout: The seconds after which a mutant is considered killed,
+                which catches mutants that never end. Only enforced when
+                running in worker processes.
+            compare_outcomes: Whether mutants are compared with the outcome
+                of the original function, or only with the checks of the cases.
+            clone_kwargs: The parameters of the `IsolatedFunctionClone`.
+        """
+        self.tested_function = tested_function
+        self.test_cases = list(test_cases)
+        self.processes = processes
+        self.timeout = timeout
+        self.compare_outcomes = compare_outcomes
+        self.clone = IsolatedFunctionClone(tested_function, **clone_kwargs)
+        self.mutants = generate_mutants(
+            tested_function.__code__, tested_function.__doc__
+        )
+
+    def run(self) -> MutationReport:
+        """Run the test cases against every mutant."""
+        baseline = [self._run_case(case) for case in self.test_cases]
+        for case, outcome in zip(self.test_cases, baseline):
+            if failure := self._check(case, outcome):
+                raise ValueError(f"The original function fails a test case: {failure}")
+
+        self._baseline = baseline
+        return MutationReport(
+            fork_map(
+                self._run_mutant,
+                self.mutants,
+                self.processes,
+                self.timeout,
+                on_timeout=lambda mutant: MutantResult(
+                    mutant.description, True, "timed out"
+                ),
+            )
+        )
+
+    def _run_mutant(self, mutant: Mutant) -> MutantResult:
+        function = self.clone._namespaced_function_clone
+        original_code = function.__code__
+        function.__code__ = mutant.code
+        try:
+            for index, (case, expected) in enumerate(
+                zip(self.test_cases, self._baseline)
+            ):
+                outcome = self._run_case(case)
+                if failure := self._check(case, outcome):
+                    return MutantResult(mutant.description, True, failure)
+                if self.compare_outcomes and not _outcomes_equal(outcome, expected):
+                    return MutantResult(
+                        mutant.description,
+                        True,
+                        f"Case {index} differs from the original: {outcome[:2]}",
+                    )
+            return MutantResult(mutant.description, False)
+        finally:
+            function.__code__ = original_code
+
+    def _run_case(self, case: dict) -> tuple[str, Any, list]:
+        self.clone.reset()
+        try:
+            result = self.clone(*case.get("args", ()), **case.get("kwargs", {}))
+            outcome: tuple[str, Any] = ("result", result)
+        except Exception as e:
+            outcome = ("raises", type(e))
+        calls = [
+            (name, list(mock_item.object.mock_calls))
+            for name, mock_item in self.clone.context.to_debug_dict().items()
+            if hasattr(mock_item.object, "mock_calls")
+        ]
+        return (*outcome, calls)
+
+    @staticmethod
+    def _check(case: dict, outcome: tuple[str, Any, list]) -> str:
+        kind, value, _calls = outcome
+        checks = case.get("checks", {})
+        if "raises" in checks:
+            if kind != "raises" or not issubclass(value, checks["raises"]):
+                return f"Expected {checks['raises']} to be raised."
+        elif kind == "raises":
+            return f"Unexpected {value.__name__} raised."
+        elif "result" in checks and not _equal(checks["result"], value):
+            return f"Expected result {checks['result']!r}, got {value!r}."
+        return ""
+
+
+def _outcomes_equal(outcome: tuple, expected: tuple) -> bool:
+    return all(_equal(a, b) for a, b in zip(outcome, expected))
+
+
+def _equal(a: Any, b: Any) -> bool:
+    try:
+        return bool(a == b)
+    except Exception:
+        return a is b
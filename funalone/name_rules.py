@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import fnmatch
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from types import CodeType, ModuleType
+from typing import Any, TypeAlias
+from weakref import WeakKeyDictionary
+
+from funalone.bytecode import global_names
+from funalone.types import is_exception
+
+
+@dataclass(frozen=True)
+class AllowModulePrefix:
+    """Allow every global defined in a module or any of its submodules.
+
+    `AllowModulePrefix("mypkg.models")` allows objects from `mypkg.models` and
+    `mypkg.models.user`, but not from `mypkg.models_old`.
+    """
+
+    prefix: str
+
+
+@dataclass(frozen=True)
+class AllowType:
+    """Allow every global that is an instance or a subclass of the given types."""
+
+    types: type | tuple[type, ...]
+
+
+@dataclass(frozen=True)
+class AllowNameGlob:
+    """Allow every global whose name matches a shell-style pattern."""
+
+    pattern: str
+
+
+@dataclass(frozen=True)
+class AllowNameRegex:
+    """Allow every global whose name fully matches a regular expression."""
+
+    pattern: str
+
+
+AllowRule: TypeAlias = AllowModulePrefix | AllowType | AllowNameGlob | AllowNameRegex
+
+
+@dataclass(frozen=True)
+class NameAllowTable:
+    """A compiled name allow configuration for a single code object.
+
+    Rules that only depend on the name are resolved ahead of time into
+    `names`, so they cost a single set membership test. Rules that depend on
+    the value of the global are kept as fast matchers.
+
+    Attributes:
+        names: The names used by the code object that are always allowed.
+        module_prefixes: Modules whose objects are allowed.
+        types: Types whose instances and subclasses are allowed.
+        condition: A user provided condition called with the name and object.
+        allow_exceptions: Whether exceptions are allowed.
+    """
+
+    names: frozenset[str]
+    module_prefixes: frozenset[str]
+    types: tuple[type, ...]
+    condition: Callable[[str, Any], bool] | None
+    allow_exceptions: bool
+
+    def __call__(self, name: str, obj: Any) -> bool:
+        if name in self.names:
+            return True
+        if self.types and (
+            isinstance(obj, self.types)
+            or (isinstance(obj, type) and issubclass(obj, self.types))
+        ):
+            return True
+        if self.module_prefixes and self._module_is_allowed(obj):
+            return True
+        if self.allow_exceptions and is_exception(obj):
+            return True
+        return self.condition is not None and self.condition(name, obj)
+
+    def _module_is_allowed(self, obj: Any) -> bool:
+        module_name = (
+            obj.__name__
+            if isinstance(obj, ModuleType)
+            else getattr(obj, "__module__", None)
+        )
+        if not isinstance(module_name, str):
+            return False
+
+        while True:
+            if module_name in self.module_prefixes:
+                return True
+            module_name, dot, _ = module_name.rpartition(".")
+            if not dot:
+                return False
+
+
+def compile_name_allows(
+    code: CodeType,
+    name_allow_list: Iterable[str] = (),
+    name_allow_rules: Iterable[AllowRule] = (),
+    name_allow_condition: Callable[[str, Any], bool] | None = None,
+    allow_exceptions: bool = True,
+) -> NameAllowTable:
+    """Compile a name allow configuration into a `NameAllowTable`.
+
+    Results are cached per code object and configuration, so building several
+    clones of the same function with the same configuration only compiles the
+    rules once. The cache holds code objects weakly, so it doesn't keep them
+    alive. Configurations with a condition aren't cached, since conditions
+    are often new lambdas that would never match.
+    """
+    key = (frozenset(name_allow_list), tuple(name_allow_rules), allow_exceptions)
+    if name_allow_condition is not None:
+        return _compile_name_allows(code, *key[:2], name_allow_condition, key[2])
+
+    tables = _name_allow_tables.setdefault(code, {})
+    if (table := tables.get(key)) is None:
+        table = tables[key] = _compile_name_allows(code, *key[:2], None, key[2])
+    return table
+
+
+# The compiled tables of configurations without a condition, by code object.
+_name_allow_tables: WeakKeyDictionary[CodeType, dict[tuple, NameAllowTable]] = (
+    WeakKeyDictionary()
+)
+
+
+def _compile_name_allows(
+    code: CodeType,
+    name_allow_list: frozenset[str],
+    name_allow_rules: tuple[AllowRule, ...],
+    name_allow_condition: Callable[[str, Any], bool] | None,
+    allow_exceptions: bool,
+) -> NameAllowTable:
+    name_patterns: list[str] = []
+    module_prefixes: set[str] = set()
+    types: list[type] = []
+    for rule in name_allow_rules:
+        match rule:
+            case AllowNameGlob(pattern):
+                name_patterns.append(fnmatch.translate(pattern))
+            case AllowNameRegex(pattern):
+                name_patterns.append(f"(?:{pattern})\\Z")
+            case AllowModulePrefix(prefix):
+                module_prefixes.add(prefix)
+            case AllowType(rule_types):
+                types.extend(
+                    rule_types if isinstance(rule_types, tuple) else (rule_types,)
+                )
+            case _:
+                raise TypeError(f"Unknown name allow rule: {rule!r}")
+
+    code_names = global_names(code)
+    names = name_allow_list.intersection(code_names)
+    if name_patterns:
+        name_matcher = re.compile("|".join(name_patterns))
+        names |= {name for name in code_names if name_matcher.match(name)}
+
+    return NameAllowTable(
+        names=frozenset(names),
+        module_prefixes=frozenset(module_prefixes),
+        types=tuple(types),
+        condition=name_allow_condition,
+        allow_exceptions=allow_exceptions,
+    )
@@ -3,6 +3,7 @@ from __future__ import annotations
 from collections.abc import Callable
 from typing import Any
 
+from funalone.bytecode import global_names
 from funalone.types import P, R
 
 
@@ -81,9 +82,11 @@ def _process_globals(
                 globals.setdefault(key, value)
         return globals
 
+    # Names used in nested code, like comprehensions, are globals of the
+    # function too.
     function_used_globals = {
         name: function.__globals__[name]
-        for name in function.__code__.co_names
+        for name in global_names(function.__code__)
         if name in function.__globals__
     }
     for key, value in function_used_globals.items():
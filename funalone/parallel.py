@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import multiprocessing
+from collections.abc import Callable, Sequence
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# The function and items of the running `fork_map`, inherited by the workers.
+_inherited: tuple[Callable[[Any], Any], Sequence[Any]] | None = None
+
+
+def fork_available() -> bool:
+    """Whether worker processes can be forked on this platform."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def fork_map(
+    function: Callable[[T], U],
+    items: Sequence[T],
+    processes: int | None = None,
+    timeout: float | None = None,
+    on_timeout: Callable[[T], U] | None = None,
+) -> list[U]:
+    """Map a function over items in forked worker processes.
+
+    The workers are forked after `function` and `items` are set, so they
+    inherit them, including anything they reference like clones and mocks,
+    without pickling. Only item indices and results, which must be picklable,
+    are sent between processes. Runs serially if `processes` is 1 or forking
+    isn't available.
+
+    Args:
+        function: The function to call with every item.
+        items: The items to map.
+        processes: The number of worker processes. Defaults to the CPU count.
+        timeout: The seconds to wait for each result. The workers are
+            replaced after a timeout, so stuck ones are killed.
+        on_timeout: Called with the item instead of `function` when it times
+            out. If not given, the timeout error is raised.
+
+    Returns:
+        The results, in the same order as the items.
+    """
+    global _inherited
+
+    if processes == 1 or not fork_available():
+        return [function(item) for item in items]
+
+    _inherited = (function, items)
+    results: dict[int, U] = {}
+    try:
+        while len(results) < len(items):
+            # A worker that times out is stuck, so the pool is replaced and
+            # the pending items run again in the new one.
+            _map_until_timeout(results, items, processes, timeout, on_timeout)
+        return [results[index] for index in range(len(items))]
+    finally:
+        _inherited = None
+
+
+def _map_until_timeout(
+    results: dict[int, Any],
+    items: Sequence[Any],
+    processes: int | None,
+    timeout: float | None,
+    on_timeout: Callable[[Any], Any] | None,
+) -> None:
+    pool = multiprocessing.get_context("fork").Pool(processes)
+    try:
+        pending = {
+            index: pool.apply_async(_call_inherited, (index,))
+            for index in range(len(items))
+            if index not in results
+        }
+        for index, result in pending.items():
+            try:
+                results[index] = result.get(timeout)
+            except multiprocessing.TimeoutError:
+                if on_timeout is None:
+                    raise
+                results[index] = on_timeout(items[index])
+                for other_index, other_result in pending.items():
+                    if other_index not in results and other_result.ready():
+                        results[other_index] = other_result.get()
+                return
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _call_inherited(index: int) -> Any:
+    assert _inherited is not None
+    function, items = _inherited
+    return function(items[index])
@@ -0,0 +1,228 @@
+"""A pytest plugin with a fixture to share isolated function clones.
+
+Building an `IsolatedFunctionClone` once and resetting it between tests is
+faster than building a new one for every test. The `isolated` fixture returns
+a factory that builds clones once per test, module or session, and resets
+them after every test:
+
+    def test_example(isolated):
+        clone = isolated(tested_function, scope="module", name_allow_list=[...])
+        assert clone(1, 2) == 3
+
+The access counts of every clone are aggregated across tests and reported at
+the end of the session, including those of pytest-xdist workers.
+
+The plugin isn't loaded automatically. Enable it with `-p funalone.pytest_plugin`
+or with `pytest_plugins = ["funalone.pytest_plugin"]` in a root `conftest.py`.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Hashable, Iterator
+from typing import Any, Literal
+
+import pytest
+
+from funalone.isolated_function_clone import IsolatedFunctionClone
+
+Scope = Literal["function", "module", "session"]
+
+_STORE_KEY = pytest.StashKey["_CloneStore"]()
+_WORKER_OUTPUT_KEY = "funalone_clone_stats"
+
+
+class _CloneStore:
+    """The clones built by the `isolated` fixture and their statistics.
+
+    Attributes:
+        clones: The clones, by scope, scope id, tested function and parameters.
+        built: The number of clones built.
+        resets: The number of times a clone was reset between tests.
+        access_counts: The active access counts of every dependency, summed
+            over all tests, by tested function.
+    """
+
+    def __init__(self):
+        self.clones: dict[tuple[Hashable, ...], IsolatedFunctionClone] = {}
+        self.used: set[tuple[Hashable, ...]] = set()
+        self.built = 0
+        self.resets = 0
+        self.access_counts: dict[str, Counter[str]] = {}
+
+    def get(
+        self,
+        function: Callable[..., Any],
+        scope: Scope,
+        scope_id: str,
+        **clone_kwargs,
+    ) -> IsolatedFunctionClone:
+        key = (scope, scope_id, function, _freeze(clone_kwargs))
+        if key not in self.clones:
+            self.clones[key] = IsolatedFunctionClone(function, **clone_kwargs)
+            self.built += 1
+        self.used.add(key)
+        return self.clones[key]
+
+    def end_test(self, next_module: str | None) -> None:
+        """Collect the statistics of the clones used by a test and reset them.
+
+        Clones of function scope are closed, and so are those of module scope
+        when the next test is in another module, or there isn't one.
+        """
+        for key in self.used:
+            clone = self.clones[key]
+            counts = self.access_counts.setdefault(_clone_name(clone), Counter())
+            for name, mock_item in clone.context.to_debug_dict().items():
+                if mock_item.metadata.active_access_count:
+                    counts[name] += mock_item.metadata.active_access_count
+            clone.reset()
+            self.resets += 1
+        self.used.clear()
+
+        for key in list(self.clones):
+            scope, scope_id, *_configuration = key
+            if scope == "function" or (scope == "module" and scope_id != next_module):
+                self.clones.pop(key).close()
+
+    def close(self) -> None:
+        for clone in self.clones.values():
+            clone.close()
+        self.clones.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "built": self.built,
+            "resets": self.resets,
+            "access_counts": {
+                function: dict(counts)
+                for function, counts in self.access_counts.items()
+            },
+        }
+
+    def merge(self, stats: dict[str, Any]) -> None:
+        """Merge the statistics of another store, like that of a worker."""
+        self.built += stats["built"]
+        self.resets += stats["resets"]
+        for function, counts in stats["access_counts"].items():
+            self.access_counts.setdefault(function, Counter()).update(counts)
+
+    def summary_lines(self, top: int = 5) -> Iterator[str]:
+        yield f"{self.built} clones built, reset {self.resets} times between tests."
+        for function, counts in sorted(self.access_counts.items()):
+            most_common = ", ".join(
+                f"{name}: {count}" for name, count in counts.most_common(top)
+            )
+            yield f"{function}: {most_common or '<No external dependencies>'}"
+
+
+class _Identity:
+    """An unhashable value, compared by identity."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Identity) and other.value is self.value
+
+
+def _freeze(value: Any) -> Hashable:
+    """Return a hashable key for a clone parameter.
+
+    Lists, tuples, dictionaries and sets are compared by their contents, other
+    hashable values by equality and anything else by identity.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return (
+            dict,
+            frozenset((_freeze(key), _freeze(item)) for key, item in value.items()),
+        )
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(_freeze(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        return _Identity(value)
+    return (type(value), value)
+
+
+def _qualified_name(function: Callable[..., Any]) -> str:
+    return f"{function.__module__}:{function.__qualname__}"
+
+
+def _clone_name(clone: IsolatedFunctionClone) -> str:
+    try:
+        return _qualified_name(clone.original_function)
+    except ReferenceError:
+        return "<collected function>"
+
+
+def _scope_id(request: pytest.FixtureRequest, scope: Scope) -> str:
+    if scope == "session":
+        return ""
+    if scope == "module":
+        return request.node.nodeid.split("::")[0]
+    if scope == "function":
+        return request.node.nodeid
+    raise ValueError(f"Unknown clone scope: {scope!r}")
+
+
+@pytest.fixture
+def isolated(request: pytest.FixtureRequest) -> Callable[..., IsolatedFunctionClone]:
+    """Return a factory of isolated function clones shared by scope.
+
+    The factory takes the tested function, an optional `scope`, one of
+    `"function"` (the default), `"module"` or `"session"`, and the parameters
+    of `IsolatedFunctionClone`. Clones are reset after every test.
+    """
+    store = request.config.stash[_STORE_KEY]
+
+    def factory(
+        function: Callable[..., Any], scope: Scope = "function", **clone_kwargs
+    ) -> IsolatedFunctionClone:
+        return store.get(function, scope, _scope_id(request, scope), **clone_kwargs)
+
+    return factory
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.stash[_STORE_KEY] = _CloneStore()
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_teardown(item: pytest.Item, nextitem: pytest.Item | None) -> None:
+    item.config.stash[_STORE_KEY].end_test(
+        nextitem.nodeid.split("::")[0] if nextitem is not None else None
+    )
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    store = session.config.stash[_STORE_KEY]
+    store.close()
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput[_WORKER_OUTPUT_KEY] = store.to_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node: Any, error: Any) -> None:
+    """Merge the statistics of a pytest-xdist worker that finished."""
+    stats = getattr(node, "workeroutput", {}).get(_WORKER_OUTPUT_KEY)
+    if stats is not None:
+        node.config.stash[_STORE_KEY].merge(stats)
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    store = config.stash[_STORE_KEY]
+    if not store.built:
+        return
+    terminalreporter.write_sep("-", "funalone isolated clones")
+    for line in store.summary_lines():
+        terminalreporter.write_line(line)
@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import argparse
+import builtins
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import multiprocessing
+import os
+import pkgutil
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import asdict, dataclass, field
+from types import FunctionType, ModuleType
+from typing import Any
+
+from funalone.bytecode import global_names
+from funalone.default_mocking_context import BUILTIN_NAMES
+from funalone.name_rules import AllowModulePrefix, compile_name_allows
+from funalone.parallel import fork_available, fork_map
+from funalone.types import is_exception
+
+SCAN_CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = ".funalone_scan_cache.json"
+
+
+@dataclass
+class ScannedName:
+    """A global name a function loads, and how its context would resolve it.
+
+    Attributes:
+        name: The global name.
+        category: Either `"builtin"`, `"exception"`, `"allowed"` or
+            `"mocked"`.
+        spec: The type of the global the mock is autospec-ed from, or `None`
+            if the name isn't a global of the function's module.
+    """
+
+    name: str
+    category: str
+    spec: str | None = None
+
+
+@dataclass
+class ScannedFunction:
+    """The global names a function or method loads.
+
+    Attributes:
+        qualname: The qualified name of the function in its module.
+        names: The global names the function and its nested code load.
+    """
+
+    qualname: str
+    names: list[ScannedName] = field(default_factory=list)
+
+
+@dataclass
+class ModuleScan:
+    """The functions and methods defined in a module, scanned.
+
+    Attributes:
+        module: The name of the module.
+        digest: The hash of the module source.
+        functions: The scanned functions and methods of the module.
+        error: The error raised importing the module, if any.
+    """
+
+    module: str
+    digest: str
+    functions: list[ScannedFunction] = field(default_factory=list)
+    error: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ModuleScan:
+        functions = [
+            ScannedFunction(
+                function["qualname"],
+                [ScannedName(**name) for name in function["names"]],
+            )
+            for function in data["functions"]
+        ]
+        return cls(data["module"], data["digest"], functions, data["error"])
+
+
+@dataclass(frozen=True)
+class ScanConfig:
+    """How the contexts of the scanned functions would resolve names.
+
+    The parameters are those of `IsolatedFunctionClone` with the same names.
+    """
+
+    name_allow_list: tuple[str, ...] = ()
+    allowed_modules: tuple[str, ...] = ()
+    allow_builtins: bool = True
+    allow_exceptions: bool = True
+
+    def digest(self) -> str:
+        return hashlib.blake2b(
+            json.dumps(asdict(self), sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+
+
+def classify_names(function: FunctionType, config: ScanConfig) -> list[ScannedName]:
+    """Classify the global names a function loads like its context would.
+
+    Allowed globals of the function's module are kept, builtins are used if
+    allowed and anything else is mocked, autospec-ed from the global of the
+    same name if there is one.
+    """
+    allowed = compile_name_allows(
+        function.__code__,
+        config.name_allow_list,
+        [AllowModulePrefix(prefix) for prefix in config.allowed_modules],
+        None,
+        config.allow_exceptions,
+    )
+    function_globals = function.__globals__
+    names = []
+    for name in sorted(global_names(function.__code__)):
+        value = function_globals.get(name)
+        if name in function_globals and allowed(name, value):
+            category = "exception" if is_exception(value) else "allowed"
+            names.append(ScannedName(name, category))
+        elif name in BUILTIN_NAMES and (
+            config.allow_builtins
+            or (config.allow_exceptions and is_exception(getattr(builtins, name)))
+        ):
+            builtin = getattr(builtins, name)
+            category = "exception" if is_exception(builtin) else "builtin"
+            names.append(ScannedName(name, category))
+        elif name in function_globals:
+            names.append(ScannedName(name, "mocked", type(value).__name__))
+        else:
+            names.append(ScannedName(name, "mocked"))
+    return names
+
+
+def iter_functions(module: ModuleType) -> Iterator[tuple[str, FunctionType]]:
+    """Yield the functions and methods defined in a module, by qualname.
+
+    Decorated functions are unwrapped, and methods include static methods,
+    class methods and property accessors of classes defined in the module.
+    """
+    seen: set[int] = set()
+
+    def visit(namespace: Mapping[str, Any], prefix: str) -> Iterator[Any]:
+        for name, value in namespace.items():
+            if isinstance(value, (staticmethod, classmethod)):
+                value = value.__func__
+            if isinstance(value, property):
+                for accessor in (value.fget, value.fset, value.fdel):
+                    if accessor is not None:
+                        yield from visit({name: accessor}, prefix)
+                continue
+            if id(value) in seen:
+                continue
+            if isinstance(value, type) and value.__module__ == module.__name__:
+                seen.add(id(value))
+                yield from visit(vars(value), f"{prefix}{name}.")
+                continue
+            function = inspect.unwrap(value) if callable(value) else value
+            if (
+                isinstance(function, FunctionType)
+                and function.__module__ == module.__name__
+            ):
+                seen.add(id(value))
+                yield f"{prefix}{name}", function
+
+    yield from visit(vars(module), "")
+
+
+def scan_module(module_name: str, digest: str, config: ScanConfig) -> ModuleScan:
+    """Import a module and classify the names of its functions and methods.
+
+    Modules imported already aren't reloaded, so changes made since then are
+    only scanned in a new process.
+    """
+    try:
+        module = importlib.import_module(module_name)
+    except BaseException as e:
+        return ModuleScan(module_name, digest, error=f"{type(e).__name__}: {e}")
+    return ModuleScan(
+        module_name,
+        digest,
+        [
+            ScannedFunction(qualname, classify_names(function, config))
+            for qualname, function in iter_functions(module)
+        ],
+    )
+
+
+def iter_modules(
+    package: str, errors: dict[str, str] | None = None
+) -> Iterator[tuple[str, str | None]]:
+    """Yield the name and source path of a package and all its submodules.
+
+    Only packages are imported, to find their submodules. Subpackages that
+    raise importing are skipped, along with their submodules.
+
+    Args:
+        package: The name of the package.
+        errors: Where the errors raised importing subpackages are recorded,
+            by package name.
+    """
+    spec = importlib.util.find_spec(package)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {package!r}")
+    yield package, spec.origin
+    if spec.submodule_search_locations is None:
+        return
+
+    def onerror(name: str) -> None:
+        error = sys.exc_info()[1]
+        if errors is not None:
+            errors[name] = f"{type(error).__name__}: {error}"
+
+    for module_info in pkgutil.walk_packages(
+        spec.submodule_search_locations, f"{package}.", onerror
+    ):
+        module_spec = module_info.module_finder.find_spec(  # type: ignore[call-arg]
+            module_info.name, None
+        )
+        yield module_info.name, module_spec.origin if module_spec else None
+
+
+def source_digest(path: str | None) -> str:
+    """Return the hash of a module source file."""
+    digest = hashlib.blake2b(digest_size=16)
+    if path is not None and os.path.isfile(path):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+@dataclass
+class ScanReport:
+    """The result of scanning a package.
+
+    Attributes:
+        modules: The scan of every module.
+        scanned: The names of the modules scanned in this run.
+        cached: The names of the modules whose scan was cached.
+    """
+
+    modules: list[ModuleScan] = field(default_factory=list)
+    scanned: list[str] = field(default_factory=list)
+    cached: list[str] = field(default_factory=list)
+
+    @property
+    def errors(self) -> dict[str, str]:
+        return {scan.module: scan.error for scan in self.modules if scan.error}
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            f"{scan.module}:{function.qualname}": {
+                name.name: {"category": name.category, "spec": name.spec}
+                for name in function.names
+            }
+            for scan in self.modules
+            for function in scan.functions
+        }
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for scan in self.modules:
+            for function in scan.functions:
+                lines.append(f"{scan.module}:{function.qualname}")
+                for name in function.names:
+                    spec = f" ({name.spec})" if name.spec else ""
+                    lines.append(f"    {name.name}: {name.category}{spec}")
+        lines.extend(
+            f"ERROR {module}: {error}" for module, error in self.errors.items()
+        )
+        functions = sum(len(scan.functions) for scan in self.modules)
+        lines.append(
+            f"{len(self.modules)} modules ({len(self.cached)} cached), "
+            f"{functions} functions"
+        )
+        return lines
+
+
+class Scanner:
+    """Scan packages, caching the scan of every module by the hash of its source.
+
+    Re-scans only import and scan the modules whose source, or the scan
+    configuration, changed since they were cached. Changes to other modules
+    that a module imports don't invalidate its scan.
+
+    Modules are imported in child processes, also when scanning serially, so
+    that modules changed since a scan are imported again by the next one in
+    the same process. Packages are imported in the calling process, to find
+    their submodules.
+
+    Attributes:
+        config: How names are classified.
+        cache_path: The path of the JSON cache file, or `None` to not cache.
+        processes: The number of forked worker processes. `None` uses the CPU
+            count.
+    """
+
+    def __init__(
+        self,
+        config: ScanConfig | None = None,
+        cache_path: str | os.PathLike | None = DEFAULT_CACHE_PATH,
+        processes: int | None = None,
+    ):
+        self.config = config or ScanConfig()
+        self.cache_path = cache_path
+        self.processes = processes
+
+    def scan(self, packages: Iterable[str]) -> ScanReport:
+        cache = self._load_cache()
+        report = ScanReport()
+        pending: list[tuple[str, str]] = []
+        digests: dict[str, str] = {}
+        import_errors: dict[str, str] = {}
+        for package in packages:
+            for module_name, path in iter_modules(package, import_errors):
+                digest = digests[module_name] = source_digest(path)
+                cached = cache.get(module_name)
+                if cached is not None and cached.digest == digest:
+                    report.modules.append(cached)
+                    report.cached.append(module_name)
+                else:
+                    pending.append((module_name, digest))
+
+        # Packages that raised importing are reported without scanning them.
+        report.modules = [
+            scan for scan in report.modules if scan.module not in import_errors
+        ]
+        report.cached = [name for name in report.cached if name not in import_errors]
+        pending = [module for module in pending if module[0] not in import_errors]
+        scans = self._scan_modules(pending) + [
+            ModuleScan(module_name, digests[module_name], error=error)
+            for module_name, error in import_errors.items()
+        ]
+        report.modules.extend(scans)
+        report.scanned.extend(scan.module for scan in scans)
+        report.modules.sort(key=lambda scan: scan.module)
+
+        cache.update((scan.module, scan) for scan in scans if scan.error is None)
+        self._save_cache(cache)
+        return report
+
+    def _scan_modules(self, pending: list[tuple[str, str]]) -> list[ModuleScan]:
+        if not pending:
+            return []
+        if self.processes != 1 and fork_available():
+            return fork_map(
+                lambda module: scan_module(*module, self.config),
+                pending,
+                self.processes,
+            )
+        context = multiprocessing.get_context("fork" if fork_available() else "spawn")
+        with context.Pool(1) as pool:
+            return pool.starmap(
+                scan_module, [(*module, self.config) for module in pending]
+            )
+
+    def _load_cache(self) -> dict[str, ModuleScan]:
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return {}
+        with open(self.cache_path) as file:
+            data = json.load(file)
+        if (
+            data.get("version") != SCAN_CACHE_VERSION
+            or data.get("config") != self.config.digest()
+        ):
+            # Caches of other versions or configurations are discarded.
+            return {}
+        return {
+            module: ModuleScan.from_dict(scan)
+            for module, scan in data["modules"].items()
+        }
+
+    def _save_cache(self, cache: dict[str, ModuleScan]) -> None:
+        if self.cache_path is None:
+            return
+        with open(self.cache_path, "w") as file:
+            json.dump(
+                {
+                    "version": SCAN_CACHE_VERSION,
+                    "config": self.config.digest(),
+                    "modules": {module: asdict(scan) for module, scan in cache.items()},
+                },
+                file,
+                sort_keys=True,
+            )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the `scan` command to a parser."""
+    parser.add_argument("packages", nargs="+", help="The packages to scan.")
+    parser.add_argument(
+        "--allow",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="A global name that is allowed, like `name_allow_list`.",
+    )
+    parser.add_argument(
+        "--allow-module",
+        action="append",
+        default=[],
+        metavar="PREFIX",
+        help="A module whose objects are allowed, like `AllowModulePrefix`.",
+    )
+    parser.add_argument("--no-builtins", action="store_true", help="Mock builtins too.")
+    parser.add_argument(
+        "--no-exceptions", action="store_true", help="Mock exceptions too."
+    )
+    parser.add_argument(
+        "--format", choices=("text", "json"), default="text", help="Output format."
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="The number of worker processes. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--cache", default=DEFAULT_CACHE_PATH, help="The path of the scan cache."
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Don't read or write the cache."
+    )
+
+
+def run(arguments: argparse.Namespace) -> int:
+    """Run the `scan` command, returning the exit code."""
+    # Like `python -m`, packages are imported from the working directory.
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    config = ScanConfig(
+        name_allow_list=tuple(arguments.allow),
+        allowed_modules=tuple(arguments.allow_module),
+        allow_builtins=not arguments.no_builtins,
+        allow_exceptions=not arguments.no_exceptions,
+    )
+    scanner = Scanner(
+        config,
+        cache_path=None if arguments.no_cache else arguments.cache,
+        processes=arguments.processes,
+    )
+    report = scanner.scan(arguments.packages)
+    if arguments.format == "json":
+        print(json.dumps(report.to_dict(), indent=2, sort_keys=True))
+        for module, error in report.errors.items():
+            print(f"ERROR {module}: {error}", file=sys.stderr)
+    else:
+        print("\n".join(report.summary_lines()))
+    return 1 if report.errors else 0
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from types import ModuleType
+from typing import Any
+from unittest.mock import Mock
+
+
+class StandInModule(ModuleType):
+    """A module that overrides some attributes of a real module.
+
+    Every other attribute is looked up in the real module, so code that only
+    uses a module incidentally, like `time.strftime` next to `time.sleep`,
+    keeps working. Attributes set on the stand-in don't change the real
+    module.
+
+    Attributes:
+        __wrapped__: The real module.
+    """
+
+    def __init__(self, module: ModuleType, overrides: dict[str, Any]):
+        """
+        Args:
+            module: The real module.
+            overrides: The attributes that replace those of the real module.
+        """
+        super().__init__(module.__name__, module.__doc__)
+        self.__wrapped__ = module
+        self.__dict__.update(overrides)
+
+    def reset_mock(self) -> None:
+        """Reset the mocks that override attributes, like a mock's
+        `reset_mock()`."""
+        for value in vars(self).values():
+            if isinstance(value, (Mock, StandInModule)):
+                value.reset_mock()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes that are not overridden.
+        return getattr(self.__dict__["__wrapped__"], name)
+
+    def __dir__(self) -> list[str]:
+        return sorted(set(dir(self.__wrapped__)) | set(self.__dict__))
+
+    def __repr__(self) -> str:
+        return f"<stand-in for {self.__wrapped__!r}>"
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import IO, Any
+from unittest.mock import MagicMock, Mock
+
+
+class StreamExhaustedError(AssertionError):
+    """Raised when a dependency is called more times than its stream has items."""
+
+
+class SideEffectStream:
+    """Successive return values of a mocked dependency, read lazily.
+
+    The values come from an iterable, like a generator, or from a file, and
+    are only read ahead `read_ahead` items at a time, so large datasets never
+    have to be in memory at once. Values that are exceptions are raised.
+
+    Files are JSON Lines files, with a JSON value per line, or pickle files
+    with a sequence of pickled values, like those written by calling
+    `pickle.dump` once per value. Files are opened on the first read and
+    closed when they're exhausted or the stream is closed.
+
+    Streams given as custom mocks are replaced with a `MagicMock` that has
+    the stream as `side_effect`.
+
+    Attributes:
+        consumed: The number of values returned or raised so far.
+        read_ahead: The maximum number of values read ahead.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any] | str | os.PathLike,
+        *,
+        format: str | None = None,
+        read_ahead: int = 64,
+    ):
+        """
+        Args:
+            source: An iterable of values, or the path of a file of values.
+            format: The format of the file, either `"jsonl"` or `"pickle"`.
+                Defaults to `"pickle"` for `.pkl` and `.pickle` files and
+                `"jsonl"` otherwise.
+            read_ahead: The maximum number of values read ahead.
+        """
+        if read_ahead < 1:
+            raise ValueError("`read_ahead` must be at least 1.")
+        self.read_ahead = read_ahead
+        self.consumed = 0
+        self._buffer: deque[Any] = deque()
+        self._file: IO | None = None
+        self._values: Iterator[Any] | None = None
+
+        if isinstance(source, (str, os.PathLike)):
+            if format is None:
+                extension = os.path.splitext(source)[1].lower()
+                format = "pickle" if extension in (".pkl", ".pickle") else "jsonl"
+            if format not in ("jsonl", "pickle"):
+                raise ValueError(f"Unknown stream format: {format!r}")
+            self._path: str | os.PathLike | None = source
+            self._format = format
+        else:
+            self._path = None
+            self._values = iter(source)
+
+    def __call__(self, *_args, **_kwargs) -> Any:
+        if not self._buffer:
+            self._fill()
+        if not self._buffer:
+            raise StreamExhaustedError(
+                f"The side effect stream was exhausted after {self.consumed} values."
+            )
+        value = self._buffer.popleft()
+        self.consumed += 1
+        if isinstance(value, BaseException) or (
+            isinstance(value, type) and issubclass(value, BaseException)
+        ):
+            raise value
+        return value
+
+    @property
+    def buffered(self) -> int:
+        """The number of values read ahead and not consumed yet."""
+        return len(self._buffer)
+
+    def as_mock(self, name: str | None = None) -> Mock:
+        return MagicMock(name=name, side_effect=self)
+
+    def close(self) -> None:
+        """Close the file of the stream, if open, and drop buffered values."""
+        self._close_file()
+        self._values = iter(())
+        self._buffer.clear()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> SideEffectStream:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _fill(self) -> None:
+        if self._values is None:
+            self._values = self._read_file()
+        for value in self._values:
+            self._buffer.append(value)
+            if len(self._buffer) >= self.read_ahead:
+                break
+
+    def _read_file(self) -> Iterator[Any]:
+        assert self._path is not None
+        if self._format == "pickle":
+            import pickle
+
+            self._file = open(self._path, "rb")
+            try:
+                while True:
+                    try:
+                        yield pickle.load(self._file)
+                    except EOFError:
+                        return
+            finally:
+                self._close_file()
+        else:
+            import json
+
+            self._file = open(self._path, encoding="utf-8")
+            try:
+                for line in self._file:
+                    if line.strip():
+                        yield json.loads(line)
+            finally:
+                self._close_file()
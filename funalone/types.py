@@ -1,6 +1,8 @@
 from enum import Enum
 from typing import ParamSpec, Protocol, TypeVar, TypeAlias, Any
-from dataclasses import dataclass
+from dataclasses import InitVar, dataclass
+from threading import RLock, local
+from weakref import WeakSet
 
 P = ParamSpec("P")
 R = TypeVar("R")
@@ -18,15 +20,150 @@ class MockOrigin(Enum):
     FUNCTION_ORIGINAL = 2
     GENERATED_WHILE_ACTIVE = 3
     GENERATED_WHILE_INACTIVE = 4
+    FOLLOWED_CLONE = 5
+    PREWARMED = 6
+
+
+class _ThreadCounts:
+    """The counts of a single thread, retired into their group when the thread
+    ends."""
+
+    __slots__ = ("counts", "retired", "__weakref__")
+
+    def __init__(self, retired: dict[int, int]):
+        self.counts: dict[int, int] = {}
+        self.retired = retired
+
+    def __del__(self):
+        with _RETIRE_LOCK:
+            for index, count in self.counts.items():
+                self.retired[index] += count
+            # The group may still hold it until its weak reference is cleared.
+            self.counts.clear()
+
+
+# Reentrant, as a thread may end while another one of the same group is read.
+_RETIRE_LOCK = RLock()
+
+
+class AccessCounterGroup:
+    """Counters that threads can increment without locks.
+
+    Every thread increments its own counts, kept in a single `threading.local`
+    for all the counters of the group, and the counts of every thread are
+    summed when a counter is read. On free-threaded builds this avoids both
+    the data race of a shared `+= 1` and the contention of a lock. The counts
+    of threads that ended are folded into the group, so it doesn't grow with
+    the number of threads.
+    """
+
+    __slots__ = ("_local", "_threads", "_retired")
+
+    def __init__(self) -> None:
+        self._local = local()
+        self._threads: WeakSet[_ThreadCounts] = WeakSet()
+        self._retired: dict[int, int] = {}
+
+    def _add_counter(self, value: int) -> int:
+        with _RETIRE_LOCK:
+            index = len(self._retired)
+            self._retired[index] = value
+        return index
+
+    def _thread_counts(self) -> dict[int, int]:
+        try:
+            return self._local.thread.counts
+        except AttributeError:
+            thread = self._local.thread = _ThreadCounts(self._retired)
+            with _RETIRE_LOCK:
+                self._threads.add(thread)
+            return thread.counts
+
+
+class AccessCounter:
+    """A counter of an `AccessCounterGroup`, with a group of its own if none
+    is given."""
+
+    __slots__ = ("_group", "_index")
+
+    def __init__(self, value: int = 0, group: AccessCounterGroup | None = None):
+        self._group = group if group is not None else AccessCounterGroup()
+        self._index = self._group._add_counter(value)
+
+    def add(self, amount: int = 1) -> None:
+        counts = self._group._thread_counts()
+        counts[self._index] = counts.get(self._index, 0) + amount
+
+    @property
+    def value(self) -> int:
+        group = self._group
+        # Threads retire their counts under the same lock, so that no count is
+        # missed or summed twice.
+        with _RETIRE_LOCK:
+            return group._retired[self._index] + sum(
+                thread.counts.get(self._index, 0) for thread in group._threads
+            )
+
+    def set(self, value: int) -> None:
+        """Set the value. Not meant to run while other threads increment it."""
+        group = self._group
+        with _RETIRE_LOCK:
+            for thread in group._threads:
+                thread.counts.pop(self._index, None)
+            group._retired[self._index] = value
+
+
+class _AccessCountField:
+    """A dataclass field whose count is kept in an `AccessCounter`."""
+
+    def __set_name__(self, owner: type, name: str):
+        self.counter_name = f"_{name}"
+
+    def __get__(self, instance: Any, owner: Any = None) -> int:
+        if instance is None:
+            # The default of the dataclass field.
+            return 0
+        counter = getattr(instance, self.counter_name)
+        return counter.value if isinstance(counter, AccessCounter) else counter
+
+    def __set__(self, instance: Any, value: int):
+        counter = getattr(instance, self.counter_name, None)
+        if isinstance(counter, AccessCounter):
+            counter.set(value)
+        else:
+            # Kept as is until `__post_init__` moves it into a counter.
+            setattr(instance, self.counter_name, value)
 
 
 @dataclass
 class MockMetadata:
-    """A dataclass to track the metadata of a MockItem"""
+    """A dataclass to track the metadata of a MockItem.
+
+    Access counts are kept per thread and summed when read, so that threads
+    calling the same clone count accesses correctly without locks. The counts
+    are kept in `counters`, usually the group shared by the mocks of a
+    context.
+    """
+
+    __slots__ = ("origin", "_total_access_count", "_active_access_count")
 
     origin: MockOrigin
-    total_access_count: int
-    active_access_count: int
+    total_access_count: int = _AccessCountField()  # type: ignore[assignment]
+    active_access_count: int = _AccessCountField()  # type: ignore[assignment]
+    counters: InitVar[AccessCounterGroup | None] = None
+
+    def __post_init__(self, counters: AccessCounterGroup | None) -> None:
+        self._total_access_count: AccessCounter = AccessCounter(
+            self.total_access_count, counters
+        )
+        self._active_access_count: AccessCounter = AccessCounter(
+            self.active_access_count, counters
+        )
+
+    def count_access(self, active: bool) -> None:
+        self._total_access_count.add()
+        if active:
+            self._active_access_count.add()
 
 
 @dataclass
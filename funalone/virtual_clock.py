@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import sys
+import time
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+from funalone.stand_ins import StandInModule
+
+
+class VirtualClock:
+    """A fake clock for isolated functions that depend on time.
+
+    Sleeping advances the virtual time instantly instead of blocking, and
+    every time function reads from the same virtual time, so they stay
+    consistent with each other.
+
+    Attributes:
+        elapsed: The seconds elapsed since the clock was created.
+        epoch: The value returned by `time.time()` when `elapsed` is 0.
+    """
+
+    elapsed: float
+    epoch: float
+
+    def __init__(self, epoch: float = 0.0):
+        self.elapsed = 0.0
+        self.epoch = epoch
+
+    def advance(self, seconds: float) -> None:
+        """Advance the virtual time by a number of seconds."""
+        if seconds < 0:
+            raise ValueError("The virtual time can't go backwards.")
+        self.elapsed += seconds
+
+    def reset(self) -> None:
+        """Set the virtual time back to when the clock was created."""
+        self.elapsed = 0.0
+
+    def time(self) -> float:
+        return self.epoch + self.elapsed
+
+    def time_ns(self) -> int:
+        return int(self.time() * 1e9)
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def monotonic_ns(self) -> int:
+        return int(self.elapsed * 1e9)
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    async def async_sleep(self, delay: float, result: Any = None) -> Any:
+        import asyncio
+
+        self.advance(delay)
+        # Still yield to the event loop, like a real sleep would.
+        await asyncio.sleep(0)
+        return result
+
+    def stand_ins(self) -> list[tuple[Any, Any]]:
+        """Return pairs of time related objects and the stand-ins that replace
+        them.
+
+        `time` is replaced by a module with mocks backed by this clock for its
+        clock functions, so calls can be asserted as with any other mock,
+        while its other attributes, like `strftime`, are the real ones. If
+        `asyncio` has been imported, it's replaced the same way, overriding
+        `sleep`, and the event loops returned by `get_running_loop` and
+        `get_event_loop`, whose `time()` reads the virtual time.
+        """
+        functions = {
+            "time": self.time,
+            "time_ns": self.time_ns,
+            "monotonic": self.monotonic,
+            "monotonic_ns": self.monotonic_ns,
+            "perf_counter": self.monotonic,
+            "perf_counter_ns": self.monotonic_ns,
+            "sleep": self.sleep,
+        }
+        mocks = {
+            name: MagicMock(name=f"time.{name}", side_effect=function)
+            for name, function in functions.items()
+        }
+        stand_ins: list[tuple[Any, Any]] = [(time, StandInModule(time, mocks))]
+        stand_ins.extend((getattr(time, name), mock) for name, mock in mocks.items())
+
+        if asyncio := sys.modules.get("asyncio"):
+            overrides = {
+                "sleep": AsyncMock(side_effect=self.async_sleep),
+                "get_running_loop": self._loop_getter(asyncio.get_running_loop),
+                "get_event_loop": self._loop_getter(asyncio.get_event_loop),
+            }
+            stand_ins.append((asyncio, StandInModule(asyncio, overrides)))
+            stand_ins.extend(
+                (getattr(asyncio, name), stand_in)
+                for name, stand_in in overrides.items()
+            )
+
+        return stand_ins
+
+    def _loop_getter(self, get_loop: Callable[[], Any]) -> Callable[[], Any]:
+        @wraps(get_loop)
+        def get_virtual_time_loop():
+            return _VirtualTimeLoop(get_loop(), self)
+
+        return get_virtual_time_loop
+
+
+class _VirtualTimeLoop:
+    """An event loop whose `time()` reads the virtual time of a clock.
+
+    Everything else is the real event loop, so callbacks scheduled with
+    `call_later` still run on the real time.
+    """
+
+    def __init__(self, loop: Any, clock: VirtualClock):
+        self._loop = loop
+        self._clock = clock
+
+    def time(self) -> float:
+        return self._clock.monotonic()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loop, name)
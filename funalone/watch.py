@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import inspect
+import os
+import sys
+import time
+import traceback
+import unittest
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from types import CodeType, FunctionType, ModuleType
+from typing import IO, Any, TypeAlias
+
+from funalone.impact import code_fingerprint
+from funalone.isolated_function_clone import IsolatedFunctionClone
+from funalone.types import MockOrigin
+
+WatchedTest: TypeAlias = Callable[[], Any] | unittest.TestCase
+
+
+@dataclass
+class WatchResult:
+    """The result of reloading changed functions and re-running their tests.
+
+    Attributes:
+        swapped: The functions whose code was swapped, as `module:qualname`.
+        not_swapped: The changed functions whose code couldn't be swapped,
+            because their closure changed. Their module has to be re-imported.
+        passed: The ids of the tests that passed.
+        failed: The tracebacks of the tests that failed, by test id.
+        duration: The seconds it took to swap the code and run the tests.
+    """
+
+    swapped: list[str] = field(default_factory=list)
+    not_swapped: list[str] = field(default_factory=list)
+    passed: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        lines = [f"Reloaded: {', '.join(self.swapped) or '<nothing>'}"]
+        if self.not_swapped:
+            lines.append(f"Re-import needed: {', '.join(self.not_swapped)}")
+        lines.extend(f"FAILED {test_id}\n{tb}" for test_id, tb in self.failed.items())
+        lines.append(
+            f"{len(self.passed)} passed, {len(self.failed)} failed"
+            f" in {self.duration:.3f}s"
+        )
+        return "\n".join(lines)
+
+
+class WatchRunner:
+    """Re-run isolated tests in-process when the source of their code changes.
+
+    Tests are registered with the clones they call. The runner polls the
+    source files of the tested functions, of the callees they follow and of
+    the allowed original functions in their contexts. When a file changes, it
+    is compiled again and only the functions whose code changed get the new
+    code swapped into their `__code__`, and into the clones of them, followed
+    callees included. Modules stay imported and clones keep their contexts,
+    so only the affected tests run again, without paying the import and
+    startup cost.
+
+    Names that a changed function starts using are mocked by the clone, like
+    any other name that isn't allowed. The contexts of the clones aren't
+    recomputed for the new code: their specs and attribute chains are those of
+    the code the clones were created with, so the attributes that a changed
+    function starts using may not be autospec-ed. Decorated functions get the
+    new code in the function they wrap.
+    """
+
+    def __init__(self, interval: float = 0.2, stream: IO[str] | None = None):
+        """
+        Args:
+            interval: The seconds between polls of the source files.
+            stream: Where the results of every run are written. Defaults to
+                `sys.stderr`.
+        """
+        self.interval = interval
+        self.stream = stream
+        self._tests: list[tuple[WatchedTest, tuple[IsolatedFunctionClone, ...]]] = []
+        self._mtimes: dict[str, int] = {}
+
+    def add_test(self, test: WatchedTest, *clones: IsolatedFunctionClone) -> None:
+        """Register a test, either a callable or a `unittest.TestCase`, and
+        the clones it calls."""
+        self._tests.append((test, clones))
+        for filename in self._watched_files(clones):
+            if filename not in self._mtimes:
+                self._mtimes[filename] = os.stat(filename).st_mtime_ns
+
+    def run(self, iterations: int | None = None) -> None:
+        """Poll for changes until interrupted, or for a number of polls."""
+        iteration = 0
+        try:
+            while iterations is None or iteration < iterations:
+                result = self.check()
+                if result is not None:
+                    print(result.summary(), file=self.stream or sys.stderr)
+                iteration += 1
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+    def check(self) -> WatchResult | None:
+        """Swap the code of changed functions and re-run the affected tests.
+
+        Returns:
+            The result, or `None` if no source file changed.
+        """
+        changed_files = []
+        for filename, mtime in self._mtimes.items():
+            new_mtime = os.stat(filename).st_mtime_ns
+            if new_mtime != mtime:
+                self._mtimes[filename] = new_mtime
+                changed_files.append(filename)
+        if not changed_files:
+            return None
+
+        start = time.perf_counter()
+        result = WatchResult()
+        swapped_functions: set[int] = set()
+        for module in list(sys.modules.values()):
+            module_file = getattr(module, "__file__", None)
+            if module_file is not None and module_file in changed_files:
+                swapped_functions |= self._swap_changed_code(module, result)
+
+        for test, clones in self._tests:
+            if any(
+                self._clone_is_affected(clone, swapped_functions) for clone in clones
+            ):
+                self._run_test(test, result)
+        result.duration = time.perf_counter() - start
+        return result
+
+    def _swap_changed_code(self, module: ModuleType, result: WatchResult) -> set[int]:
+        with open(module.__file__, encoding="utf-8") as file:  # type: ignore[arg-type]
+            source = file.read()
+        try:
+            module_code = compile(source, module.__file__, "exec")  # type: ignore
+        except SyntaxError:
+            result.failed[module.__name__] = traceback.format_exc()
+            return set()
+
+        new_codes = dict(_iter_qualified_codes(module_code))
+        swapped: set[int] = set()
+        swapped_codes: dict[CodeType, CodeType] = {}
+        for qualname, function in _iter_module_functions(module):
+            new_code = new_codes.get(qualname)
+            if new_code is None or code_fingerprint(new_code) == code_fingerprint(
+                function.__code__
+            ):
+                continue
+
+            name = f"{module.__name__}:{qualname}"
+            old_code = function.__code__
+            try:
+                function.__code__ = new_code
+            except ValueError:
+                # The number of free variables of the function changed.
+                result.not_swapped.append(name)
+                continue
+            swapped.add(id(function))
+            swapped_codes[old_code] = new_code
+            result.swapped.append(name)
+
+        for _test, clones in self._tests:
+            for clone in clones:
+                function = _original_function_or_none(clone)
+                if function is not None and id(function) in swapped:
+                    clone._namespaced_function_clone.__code__ = function.__code__
+                # Followed clones are kept by the code of their callee.
+                for old_code, new_code in swapped_codes.items():
+                    followed_clone = clone.followed_clones.pop(old_code, None)
+                    if followed_clone is not None:
+                        followed_clone.__code__ = new_code
+                        clone.followed_clones[new_code] = followed_clone
+                        swapped.add(id(followed_clone))
+        return swapped
+
+    @staticmethod
+    def _clone_is_affected(clone: IsolatedFunctionClone, swapped: set[int]) -> bool:
+        function = _original_function_or_none(clone)
+        if function is not None and id(inspect.unwrap(function)) in swapped:
+            return True
+        if any(id(followed) in swapped for followed in clone.followed_clones.values()):
+            return True
+        return any(
+            id(mock_item.object) in swapped
+            for mock_item in clone.context.to_debug_dict().values()
+            if mock_item.metadata.origin == MockOrigin.FUNCTION_ORIGINAL
+        )
+
+    @staticmethod
+    def _run_test(test: WatchedTest, result: WatchResult) -> None:
+        if isinstance(test, unittest.TestCase):
+            test_result = unittest.TestResult()
+            test.run(test_result)
+            for _case, tb in test_result.errors + test_result.failures:
+                result.failed[test.id()] = tb
+            if test_result.wasSuccessful():
+                result.passed.append(test.id())
+            return
+
+        test_id = getattr(test, "__qualname__", repr(test))
+        try:
+            test()
+        except Exception:
+            result.failed[test_id] = traceback.format_exc()
+        else:
+            result.passed.append(test_id)
+
+    @staticmethod
+    def _watched_files(clones: tuple[IsolatedFunctionClone, ...]) -> Iterator[str]:
+        for clone in clones:
+            functions = [_original_function_or_none(clone)] + [
+                mock_item.object
+                for mock_item in clone.context.to_debug_dict().values()
+                if mock_item.metadata.origin == MockOrigin.FUNCTION_ORIGINAL
+                and isinstance(mock_item.object, FunctionType)
+            ]
+            for function in functions:
+                module = sys.modules.get(getattr(function, "__module__", None) or "")
+                if module is not None and getattr(module, "__file__", None):
+                    filename = inspect.getsourcefile(module)
+                    if filename is not None:
+                        yield filename
+            # Followed clones have the globals of the clone, so their module
+            # is found by the file of their code.
+            for followed_code in clone.followed_clones:
+                if os.path.isfile(followed_code.co_filename):
+                    yield followed_code.co_filename
+
+
+def _original_function_or_none(clone: IsolatedFunctionClone) -> Any:
+    try:
+        return clone.original_function
+    except ReferenceError:
+        return None
+
+
+def _iter_qualified_codes(
+    code: CodeType, prefix: str = ""
+) -> Iterator[tuple[str, CodeType]]:
+    for const in code.co_consts:
+        if not isinstance(const, CodeType) or const.co_name.startswith("<"):
+            continue
+        qualname = f"{prefix}{const.co_name}"
+        yield qualname, const
+        # Class bodies don't get their own locals, function bodies do.
+        is_function = bool(const.co_flags & inspect.CO_NEWLOCALS)
+        yield from _iter_qualified_codes(
+            const, f"{qualname}.<locals>." if is_function else f"{qualname}."
+        )
+
+
+def _iter_module_functions(
+    module: ModuleType,
+) -> Iterator[tuple[str, FunctionType]]:
+    for obj in vars(module).values():
+        if getattr(obj, "__module__", None) != module.__name__:
+            continue
+        if isinstance(obj, type):
+            attributes = [
+                getattr(attribute, "__func__", attribute)
+                for attribute in vars(obj).values()
+            ]
+        else:
+            attributes = [obj]
+        for attribute in attributes:
+            # Wrappers take the qualname of the function they wrap, but not
+            # its code.
+            function = inspect.unwrap(attribute) if callable(attribute) else attribute
+            if (
+                isinstance(function, FunctionType)
+                and function.__code__.co_name == function.__qualname__.split(".")[-1]
+            ):
+                yield function.__qualname__, function
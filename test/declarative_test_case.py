@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from typing import Generator, Literal
 from unittest.mock import MagicMock
 
@@ -10,7 +11,8 @@ class DeclarativeTestCase:
 
     # This variable controls the test cases that will be run.
     run_test_cases: list[str | int] | Literal["all"] = "all"
-    test_cases: list[dict]
+    # Any iterable of dicts, like a `CaseTable` loaded lazily from a file.
+    test_cases: Iterable[dict]
 
     def setUp(self) -> None:
         # Reset the mocks before each test
@@ -23,9 +25,9 @@ class DeclarativeTestCase:
 
         test_cases = self._get_tests(self.run_test_cases)
 
-        for case in test_cases:
+        for message, case in test_cases:
             self.setUp()
-            with self.subTest(case["message"]):
+            with self.subTest(message):
                 try:
                     result = self.action(case)
 
@@ -68,11 +70,14 @@ class DeclarativeTestCase:
 
     def _get_tests(
         self, tests_to_run: set[str | int] | Literal["all"]
-    ) -> Generator[dict, None, None]:
-        """Filter the tests based on the provided list of test names."""
+    ) -> Generator[tuple[str, dict], None, None]:
+        """Filter the tests based on the provided list of test names.
+
+        Yields the message of every test along with the test, which isn't
+        copied, since tables may have many rows."""
         run_all = tests_to_run == "all"
 
         for i, test in enumerate(self.test_cases):
             test_this = run_all or i in tests_to_run or test["message"] in tests_to_run
             if test_this:
-                yield test | {"message": f"Test {i:0>2}: {test['message']}"}
+                yield f"Test {i:0>2}: {test['message']}", test
@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from funalone.bytecode import (
+    format_attribute_paths,
+    global_attribute_chains,
+    global_names,
+)
+from test.utils import basic_two_int_function, if_else_function, join_paths
+
+
+def nested_attribute_use(items):
+    return [os_like.path.join(item) for item in items]  # noqa: F821
+
+
+class BytecodeTests(TestCase):
+    """Test case for the static analysis of code objects."""
+
+    def test_global_names(self):
+        self.assertEqual(
+            global_names(if_else_function.__code__), {"check_one", "check_two"}
+        )
+
+    def test_attribute_chains(self):
+        self.assertEqual(
+            global_attribute_chains(join_paths.__code__),
+            {"os": frozenset({("path", "join")})},
+        )
+        self.assertEqual(global_attribute_chains(basic_two_int_function.__code__), {})
+
+    def test_attribute_chains_in_nested_code(self):
+        chains = global_attribute_chains(nested_attribute_use.__code__)
+        self.assertEqual(format_attribute_paths(chains), ["os_like.path.join"])
@@ -0,0 +1,92 @@
+import os
+from tempfile import TemporaryDirectory
+from typing import Literal
+from unittest import TestCase
+
+from funalone.case_tables import CaseTable
+from test.declarative_test_case import DeclarativeTestCase
+from test import test_isolated_function_clone
+from test.utils import (
+    add_twice,
+    basic_two_int_function,
+    basic_wrapper_function_with_error,
+    check_one,
+)
+
+CASE_TABLES = os.path.join(os.path.dirname(__file__), "case_tables")
+REGISTRY = {
+    "add_twice": add_twice,
+    "basic_two_int_function": basic_two_int_function,
+    "basic_wrapper_function_with_error": basic_wrapper_function_with_error,
+    "check_one": check_one,
+    "TypeError": TypeError,
+}
+
+
+class CaseTableTests(TestCase):
+    """Test case for declarative test cases loaded from files."""
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_jsonl(self):
+        cases = list(
+            CaseTable(
+                os.path.join(CASE_TABLES, "isolated_function_clone.jsonl"), REGISTRY
+            )
+        )
+        self.assertEqual(len(cases), 3)
+        self.assertIs(cases[0]["function"], basic_two_int_function)
+        self.assertEqual(cases[0]["checks"], {"not_called": [check_one]})
+
+    def test_csv(self):
+        first, second = CaseTable(
+            os.path.join(CASE_TABLES, "isolated_function_clone.csv"), REGISTRY
+        )
+        self.assertEqual(
+            first,
+            {
+                "message": "Test allowed dependency from a CSV table",
+                "function": add_twice,
+                "args": [1, 2],
+                "config": {"name_allow_list": ["add"]},
+                "checks": {"result": 5},
+            },
+        )
+        self.assertEqual(second["checks"], {"not_called": [check_one]})
+
+    def test_rows_are_parsed_on_demand(self):
+        path = self.write("cases.jsonl", '{"message": "first"}\nnot json\n')
+        rows = iter(CaseTable(path))
+        self.assertEqual(next(rows), {"message": "first"})
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            next(rows)
+
+    def test_empty_and_unknown_references(self):
+        self.assertEqual(list(CaseTable(self.write("empty.csv", ""))), [])
+        path = self.write("cases.jsonl", '{"function": {"$ref": "missing"}}')
+        with self.assertRaises(KeyError):
+            list(CaseTable(path, REGISTRY))
+
+
+class IsolatedFunctionCloneCaseTableTests(DeclarativeTestCase, TestCase):
+    """Declarative tests of the isolated function clone, from case tables."""
+
+    mocks_used = test_isolated_function_clone.IsolatedFunctionCloneTests.mocks_used
+    run_test_cases: list[str | int] | Literal["all"] = "all"
+
+    def test(self):
+        for table in ("isolated_function_clone.jsonl", "isolated_function_clone.csv"):
+            self.test_cases = CaseTable(os.path.join(CASE_TABLES, table), REGISTRY)
+            super().test()
+
+    action = test_isolated_function_clone.IsolatedFunctionCloneTests.action
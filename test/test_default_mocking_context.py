@@ -1,11 +1,25 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 from unittest.mock import ANY, Mock
 from typing import Literal
-from funalone.default_mocking_context import ContextStates, DefaultMockingContext
-from funalone.types import MockItem as MI, MockMetadata as MM, MockOrigin as MO
+from funalone import IsolatedFunctionClone
+from funalone.default_mocking_context import (
+    ContextStates,
+    DefaultMockingContext,
+    LazyModuleMock,
+)
+from funalone.types import (
+    AccessCounter,
+    MockItem as MI,
+    MockMetadata as MM,
+    MockOrigin as MO,
+)
 from test.declarative_test_case import DeclarativeTestCase
 from test.utils import (
     basic_two_int_function,
+    call_per_item,
     return_external_variable,
     check_one,
     ext_variable,
@@ -235,3 +249,111 @@ class DefaultMockingContestTests(DeclarativeTestCase, TestCase):
             action(context)
 
         return context.to_debug_dict()
+
+
+class LazyModuleMockTests(TestCase):
+    """Test case for lazily autospec-ed module mocks."""
+
+    def test_context_creates_lazy_module_mocks(self):
+        context = DefaultMockingContext(specs={"os": os}, module_spec_depth=1)
+        self.assertIsInstance(context["os"], LazyModuleMock)
+
+    def test_attributes_are_autospeced_on_access(self):
+        mock = LazyModuleMock(spec=os, depth=2, name="os")
+        self.assertNotIn("getcwd", mock._mock_children)
+
+        mock.path.join("a", "b")
+        mock.path.join.assert_called_once_with("a", "b")
+        self.assertIsInstance(mock.path, LazyModuleMock)
+        with self.assertRaises(TypeError):
+            mock.path.join()
+        with self.assertRaises(AttributeError):
+            mock.not_an_attribute
+
+    def test_depth_limit(self):
+        mock = LazyModuleMock(spec=os, depth=1, name="os")
+        # Past the depth limit attributes are not spec-ed.
+        mock.path.join()
+        mock.path.join.assert_called_once_with()
+
+
+class ThreadedAccessTests(TestCase):
+    """Test case for contexts accessed from several threads at once."""
+
+    threads = 8
+    calls_per_thread = 200
+
+    def test_access_counter_sums_cells_of_every_thread(self):
+        counter = AccessCounter(3)
+        with ThreadPoolExecutor(self.threads) as executor:
+            for _ in range(self.threads):
+                executor.submit(lambda: [counter.add() for _ in range(1000)])
+        self.assertEqual(counter.value, 3 + self.threads * 1000)
+
+        counter.set(0)
+        self.assertEqual(counter.value, 0)
+
+    def test_access_counter_retires_cells_of_ended_threads(self):
+        counter = AccessCounter()
+        for _ in range(self.threads):
+            thread = threading.Thread(target=lambda: counter.add(2))
+            thread.start()
+            thread.join()
+        counter.add()
+
+        self.assertEqual(counter.value, 2 * self.threads + 1)
+        self.assertEqual(len(counter._group._threads), 1)
+
+    def test_mocks_of_a_context_share_one_thread_local(self):
+        context = DefaultMockingContext(custom=1)
+        context.missing
+        thread = threading.Thread(target=lambda: (context.custom, context.missing))
+        thread.start()
+        thread.join()
+
+        items = context.to_debug_dict()
+        self.assertEqual(items["custom"].metadata.total_access_count, 1)
+        self.assertEqual(items["missing"].metadata.total_access_count, 2)
+        self.assertEqual(len(context._access_counters._threads), 1)
+
+    def test_access_counts_are_exact_with_concurrent_calls(self):
+        clone = IsolatedFunctionClone(call_per_item)
+
+        def call_many():
+            for _ in range(self.calls_per_thread):
+                clone([1, 2])
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            for future in [executor.submit(call_many) for _ in range(self.threads)]:
+                future.result()
+
+        calls = self.threads * self.calls_per_thread
+        items = clone.context.to_debug_dict()
+        self.assertEqual(items["check_one"].metadata.total_access_count, 2 * calls)
+        self.assertEqual(items["check_one"].metadata.active_access_count, 2 * calls)
+        self.assertEqual(items["check_two"].metadata.active_access_count, calls)
+        self.assertEqual(clone.context.state, ContextStates.ENDED)
+
+    def test_missing_names_generate_a_single_mock(self):
+        context = DefaultMockingContext()
+        barrier = threading.Barrier(self.threads)
+
+        def access():
+            barrier.wait()
+            return context["missing"]
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            mocks = list(executor.map(lambda _: access(), range(self.threads)))
+
+        self.assertTrue(all(mock is mocks[0] for mock in mocks))
+        metadata = context.to_debug_dict()["missing"].metadata
+        self.assertEqual(metadata.total_access_count, self.threads)
+
+    def test_context_stays_active_while_calls_overlap(self):
+        context = DefaultMockingContext()
+        context.activate()
+        context.activate()
+        context.deactivate()
+        self.assertEqual(context.state, ContextStates.ACTIVE)
+        context.deactivate()
+        self.assertEqual(context.state, ContextStates.ENDED)
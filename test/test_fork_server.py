@@ -0,0 +1,95 @@
+from unittest import TestCase, skipUnless
+
+from funalone.fork_server import (
+    ForkServer,
+    _templates,
+    clear_templates,
+    clone_template,
+)
+from funalone.parallel import fork_available
+from test.utils import add_twice
+
+
+class CloneTemplateTests(TestCase):
+    """Test case for pre-warmed clone templates."""
+
+    def tearDown(self):
+        clear_templates()
+
+    def test_templates_are_built_once_and_reset(self):
+        clone = clone_template(add_twice, name_allow_list=["add"])
+        self.assertIn("add", clone.context.to_debug_dict())
+        self.assertEqual(clone(1, 2), 5)
+
+        self.assertIs(clone_template(add_twice, name_allow_list=["add"]), clone)
+        metadata = clone.context.to_debug_dict()["add"].metadata
+        self.assertEqual(metadata.active_access_count, 0)
+
+    def test_templates_with_other_parameters_raise(self):
+        clone_template(add_twice)
+        with self.assertRaises(ValueError):
+            clone_template(add_twice, name_allow_list=["add"])
+
+
+class ForkServerTests(TestCase):
+    """Test case for the fork server test runner."""
+
+    def setUp(self):
+        self.server = ForkServer(["test.utils"], workers=2, shard_size=2)
+        self.server.add_template(add_twice, name_allow_list=["add"])
+
+    def tearDown(self):
+        clear_templates()
+
+    def test_workers_inherit_templates(self):
+        report = self.server.run(["test.utils:templated_isolated_test"] * 5)
+        self.assertTrue(report.succeeded, report.summary())
+        self.assertEqual(report.counts, {"passed": 5})
+        self.assertEqual(report.workers, 2 if fork_available() else 0)
+
+    def test_results_are_streamed(self):
+        results = self.server.stream(
+            [
+                "test.utils:passing_isolated_test",
+                "test.utils:ExampleIsolatedTests",
+                "test.utils:failing_isolated_test",
+            ]
+        )
+        outcomes = sorted((result.test_id, result.outcome) for result in results)
+        self.assertEqual(
+            outcomes,
+            [
+                ("test.utils:ExampleIsolatedTests.test_fails", "failed"),
+                ("test.utils:ExampleIsolatedTests.test_is_skipped", "skipped"),
+                ("test.utils:ExampleIsolatedTests.test_passes", "passed"),
+                ("test.utils:failing_isolated_test", "failed"),
+                ("test.utils:passing_isolated_test", "passed"),
+            ],
+        )
+
+    @skipUnless(fork_available(), "needs fork")
+    def test_tests_of_dead_workers_error(self):
+        report = self.server.run(
+            [
+                "test.utils:exiting_test",
+                "test.utils:passing_isolated_test",
+                "test.utils:templated_isolated_test",
+                "test.utils:templated_isolated_test",
+            ]
+        )
+        self.assertEqual(report.counts, {"error": 2, "passed": 2})
+        errors = [result for result in report.results if result.outcome == "error"]
+        self.assertIn("exited with code 3", errors[0].message)
+
+    def test_shard_size_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            ForkServer(shard_size=0)
+
+    @skipUnless(fork_available(), "needs fork")
+    def test_workers_dont_change_the_server_templates(self):
+        template, _ = _templates[add_twice]
+        metadata = template.context.to_debug_dict()["add"].metadata
+        accesses = metadata.total_access_count
+
+        self.server.run(["test.utils:templated_isolated_test"] * 2)
+        self.assertEqual(metadata.total_access_count, accesses)
@@ -0,0 +1,74 @@
+from typing import Any, Literal
+from random import Random
+from unittest import TestCase, skipUnless
+
+from funalone.fuzz import FuzzRunner, shrink, strategy_for
+from funalone.parallel import fork_available
+from test.utils import add, average_of, if_else_function
+
+
+class FuzzTests(TestCase):
+    """Test case for the fuzz runner of isolated functions."""
+
+    def test_strategies(self):
+        rng = Random(0)
+        annotations = {
+            int: int,
+            str: str,
+            bool: bool,
+            list[int]: list,
+            tuple[int, str]: tuple,
+            dict[str, float]: dict,
+            Literal["a", "b"]: str,
+        }
+        for annotation, expected_type in annotations.items():
+            strategy = strategy_for(annotation)
+            for _ in range(50):
+                self.assertIsInstance(strategy(rng), expected_type)
+        self.assertEqual(
+            {strategy_for(int | None)(rng) is None for _ in range(50)}, {True, False}
+        )
+        strategy_for(Any)(rng)
+        with self.assertRaises(TypeError):
+            strategy_for(Random)
+
+    def test_shrink(self):
+        self.assertEqual(next(shrink(42)), 0)
+        self.assertEqual(next(shrink([1, 2])), [])
+        self.assertEqual(list(shrink(0)), [])
+
+    def test_no_failures(self):
+        report = FuzzRunner(add, seed=1).run(iterations=500)
+        self.assertEqual(report.executions, 500)
+        self.assertEqual(report.failures, [])
+        self.assertGreater(report.executions_per_second, 0)
+
+    def test_failures_are_shrunk(self):
+        report = FuzzRunner(average_of, seed=1).run(iterations=500)
+        (failure,) = report.failures
+        self.assertTrue(failure.exception.startswith("ZeroDivisionError"))
+        self.assertEqual(failure.shrunk_arguments, {"values": [], "default": None})
+        self.assertLess(report.executions, 500)
+
+    def test_expected_exceptions_and_strategies(self):
+        report = FuzzRunner(
+            average_of, seed=1, expected_exceptions=(ZeroDivisionError,)
+        ).run(iterations=200)
+        self.assertEqual(report.failures, [])
+
+        report = FuzzRunner(
+            average_of, seed=1, strategies={"values": lambda rng: [rng.randint(0, 9)]}
+        ).run(iterations=200)
+        self.assertEqual(report.failures, [])
+
+    def test_mocked_dependencies(self):
+        report = FuzzRunner(if_else_function, seed=1).run(iterations=100)
+        self.assertEqual(report.failures, [])
+
+    @skipUnless(fork_available(), "Worker processes can't be forked.")
+    def test_process_pool(self):
+        report = FuzzRunner(add, seed=1, processes=2).run(iterations=301)
+        self.assertEqual(report.executions, 301)
+
+        report = FuzzRunner(average_of, seed=1, processes=2).run(iterations=500)
+        self.assertEqual(len(report.failures), 2)
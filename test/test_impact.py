@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from funalone import IsolatedFunctionClone
+from funalone.impact import ImpactStore, code_fingerprint
+from test.utils import add, add_twice, if_else_function
+
+
+def subtract(a: int, b: int) -> int:
+    return a - b
+
+
+def is_vowel(letter: str) -> bool:
+    return letter in {"a", "e", "i", "o", "u"}
+
+
+class ImpactTests(TestCase):
+    """Test case for the selection of tests affected by code changes."""
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "impact.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fingerprint_ignores_line_numbers(self):
+        moved_code = add.__code__.replace(co_firstlineno=1)
+        self.assertEqual(code_fingerprint(moved_code), code_fingerprint(add.__code__))
+        self.assertNotEqual(
+            code_fingerprint(subtract.__code__), code_fingerprint(add.__code__)
+        )
+
+    def test_fingerprint_is_the_same_in_every_process(self):
+        fingerprints = {
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "from funalone.impact import code_fingerprint; "
+                    "from test.test_impact import is_vowel; "
+                    "print(code_fingerprint(is_vowel.__code__))",
+                ],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                env={**os.environ, "PYTHONHASHSEED": str(seed)},
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+            for seed in range(4)
+        }
+        self.assertEqual(fingerprints, {f"{code_fingerprint(is_vowel.__code__)}\n"})
+
+    def test_records_accessed_names_and_dependencies(self):
+        store = ImpactStore(self.path)
+        with IsolatedFunctionClone(add_twice, name_allow_list=["add"]) as clone:
+            clone(1, 2)
+        store.record(clone, "test_add_twice")
+
+        (record,) = store.records["test_add_twice"]
+        self.assertEqual(record.function, "test.utils:add_twice")
+        self.assertEqual(record.accessed_names, ["add"])
+        self.assertEqual(list(record.dependencies), ["add"])
+
+    def test_affected_tests(self):
+        store = ImpactStore(self.path)
+        with IsolatedFunctionClone(add_twice, name_allow_list=["add"]) as clone:
+            clone(1, 2)
+        store.record(clone, "test_add_twice")
+        with IsolatedFunctionClone(if_else_function) as clone:
+            clone(1, 2)
+        store.record(clone, "test_if_else")
+        store.save()
+
+        store = ImpactStore(self.path)
+        self.assertEqual(store.affected_tests(), set())
+        self.assertEqual(
+            store.select(["test_add_twice", "test_if_else", "test_new"]),
+            ["test_new"],
+        )
+
+        original_code = add.__code__
+        add.__code__ = subtract.__code__
+        try:
+            self.assertEqual(store.affected_tests(), {"test_add_twice"})
+        finally:
+            add.__code__ = original_code
+
+    def test_unresolvable_functions_are_affected(self):
+        store = ImpactStore(self.path)
+        with IsolatedFunctionClone(if_else_function) as clone:
+            clone(1, 2)
+        store.record(clone, "test_if_else")
+        store.records["test_if_else"][0].function = "test.utils:removed_function"
+        self.assertEqual(store.affected_tests(), {"test_if_else"})
+
+    def test_record_requires_test_id(self):
+        store = ImpactStore(self.path)
+        clone = IsolatedFunctionClone(if_else_function)
+        environ = os.environ.pop("PYTEST_CURRENT_TEST", None)
+        try:
+            with self.assertRaises(ValueError):
+                store.record(clone)
+        finally:
+            if environ is not None:
+                os.environ["PYTEST_CURRENT_TEST"] = environ
@@ -0,0 +1,66 @@
+import sys
+from unittest import TestCase, skipUnless
+
+from funalone.interpreters import (
+    SubinterpreterRunner,
+    run_tests,
+    subinterpreters_available,
+)
+
+TEST_IDS = [
+    "test.utils:passing_isolated_test",
+    "test.utils:failing_isolated_test",
+    "test.utils:ExampleIsolatedTests",
+    "test.utils:not_a_test",
+]
+EXPECTED_OUTCOMES = [
+    ("test.utils:passing_isolated_test", "passed"),
+    ("test.utils:failing_isolated_test", "failed"),
+    ("test.utils:ExampleIsolatedTests.test_fails", "failed"),
+    ("test.utils:ExampleIsolatedTests.test_is_skipped", "skipped"),
+    ("test.utils:ExampleIsolatedTests.test_passes", "passed"),
+    ("test.utils:not_a_test", "error"),
+]
+
+
+class SubinterpreterRunnerTests(TestCase):
+    """Test case for the subinterpreter test runner."""
+
+    def assert_outcomes(self, report):
+        self.assertEqual(
+            [(result.test_id, result.outcome) for result in report.results],
+            EXPECTED_OUTCOMES,
+        )
+        self.assertEqual(
+            report.counts, {"passed": 2, "failed": 2, "skipped": 1, "error": 1}
+        )
+        self.assertFalse(report.succeeded)
+
+    def test_run_tests_returns_result_records(self):
+        records = run_tests(["test.utils:failing_isolated_test"])
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["outcome"], "failed")
+        self.assertIn("add is mocked", records[0]["message"])
+
+    def test_single_worker_runs_in_main_interpreter(self):
+        report = SubinterpreterRunner(workers=1).run(TEST_IDS)
+        self.assert_outcomes(report)
+        self.assertEqual(report.workers, 0)
+        self.assertIn("1 skipped", report.summary())
+
+    def test_test_methods(self):
+        report = SubinterpreterRunner(workers=1).run(
+            ["test.utils:ExampleIsolatedTests.test_passes"]
+        )
+        self.assertTrue(report.succeeded)
+        self.assertEqual(report.counts, {"passed": 1})
+
+    @skipUnless(subinterpreters_available(), "needs subinterpreters with own GIL")
+    def test_tests_run_in_subinterpreters(self):
+        report = SubinterpreterRunner(workers=3).run(TEST_IDS)
+        self.assert_outcomes(report)
+        self.assertEqual(report.workers, 3)
+
+    def test_subinterpreters_need_python_3_12(self):
+        if sys.version_info < (3, 12):
+            self.assertFalse(subinterpreters_available())
@@ -1,11 +1,31 @@
+import asyncio
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import PurePosixPath
 from typing import Literal
 from unittest import TestCase
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 
+from funalone.cassette import CassetteExhaustedError
+from funalone.cost_model import LatencyBudgetExceededError
+from funalone.default_mocking_context import (
+    AccessBudgetExceededError,
+    LazyModuleMock,
+)
 from funalone.isolated_function_clone import (
     IsolatedFunctionClone,
     with_isolated_function_clone,
 )
+from funalone.memory_filesystem import MemoryFileSystem
+from funalone.name_rules import (
+    AllowModulePrefix,
+    AllowNameGlob,
+    AllowNameRegex,
+    AllowType,
+)
+from funalone.virtual_clock import VirtualClock
 from test.declarative_test_case import DeclarativeTestCase
 from test.utils import (
     StrangeObject,
@@ -22,6 +42,22 @@ from test.utils import (
     use_of_a_strange_object,
     use_of_str_builtin_function,
     basic_wrapper_function_with_error,
+    add,
+    add_twice,
+    call_per_item,
+    call_per_item_catching_errors,
+    count_lines,
+    format_lines,
+    gather_sleeps,
+    join_paths,
+    list_directory,
+    list_if_exists,
+    make_strings,
+    retry_with_backoff,
+    save_environment,
+    sleep_then_get_time,
+    stat_file,
+    write_report,
 )
 
 
@@ -405,6 +441,50 @@ class IsolatedFunctionCloneTests(DeclarativeTestCase, TestCase):
                 "called_with": [(check_one, 1, 2)],
             },
         },
+        {
+            "message": "Test name allow glob rule",
+            "function": basic_two_int_function,
+            "config": {
+                "name_allow_rules": [AllowNameGlob("check_*")],
+            },
+            "args": (1, 2),
+            "checks": {
+                "called_with": [(check_one, 1, 2)],
+            },
+        },
+        {
+            "message": "Test name allow regex rule miss",
+            "function": basic_two_int_function,
+            "config": {
+                "name_allow_rules": [AllowNameRegex("check")],
+            },
+            "args": (1, 2),
+            "checks": {
+                "not_called": [check_one],
+            },
+        },
+        {
+            "message": "Test name allow type rule",
+            "function": basic_two_int_function,
+            "config": {
+                "name_allow_rules": [AllowType(Mock)],
+            },
+            "args": (1, 2),
+            "checks": {
+                "called_with": [(check_one, 1, 2)],
+            },
+        },
+        {
+            "message": "Test name allow module prefix rule",
+            "function": basic_wrapper_function_with_error,
+            "config": {
+                "name_allow_rules": [AllowModulePrefix("test")],
+            },
+            "args": (),
+            "checks": {
+                "raises": TypeError,
+            },
+        },
     ]
 
     def action(self, case):
@@ -415,6 +495,7 @@ class IsolatedFunctionCloneTests(DeclarativeTestCase, TestCase):
                 custom_mocked_objects=config.get("custom_mocks"),
                 name_allow_list=config.get("name_allow_list"),
                 name_allow_condition=config.get("name_allow_condition"),
+                name_allow_rules=config.get("name_allow_rules"),
                 allow_all_names=config.get("allow_all_names", False),
                 allow_builtins=config.get("allow_builtins", True),
                 allow_exceptions=config.get("allow_exceptions", True),
@@ -444,7 +525,12 @@ class IsolatedFunctionCloneDecoratorTests(DeclarativeTestCase, TestCase):
     # This variable controls the test cases that will be run.
     run_test_cases: list[str | int] | Literal["all"] = "all"
 
-    test_cases = IsolatedFunctionCloneTests.test_cases
+    # The deprecated decorator doesn't support options added after it.
+    test_cases = [
+        case
+        for case in IsolatedFunctionCloneTests.test_cases
+        if not case.get("config", {}).keys() & {"name_allow_rules"}
+    ]
 
     def action(self, case):
         config = case.get("config", {})
@@ -474,3 +560,476 @@ class IsolatedFunctionCloneDecoratorTests(DeclarativeTestCase, TestCase):
             return result
 
         return test()  # Call the decorated function
+
+
+class IsolatedFunctionCloneLifecycleTests(TestCase):
+    """Test case for closing clones and tracking live clones."""
+
+    def test_close_releases_context(self):
+        function = IsolatedFunctionClone(basic_two_int_function)
+        function(1, 2)
+        self.assertIn("check_one", function.context.to_debug_dict())
+
+        function.close()
+
+        self.assertEqual(function.context.to_debug_dict(), {})
+        self.assertEqual(function.context.specs, {})
+        with self.assertRaises(RuntimeError):
+            function(1, 2)
+
+    def test_original_function_is_weakly_referenced(self):
+        def local_function(a, b):
+            return check_one(a, b)
+
+        function = IsolatedFunctionClone(local_function, weak_original_function=True)
+        self.assertIs(function.original_function, local_function)
+
+        del local_function
+        with self.assertRaises(ReferenceError):
+            function.original_function
+
+    def test_original_function_is_kept_alive_by_default(self):
+        function = IsolatedFunctionClone(lambda a, b: check_one(a, b))
+        self.assertEqual(function.original_function.__name__, "<lambda>")
+
+    def test_live_clone_warning(self):
+        previous = IsolatedFunctionClone.live_clone_warning_threshold
+        IsolatedFunctionClone.live_clone_warning_threshold = 0
+        try:
+            with self.assertWarns(ResourceWarning):
+                function = IsolatedFunctionClone(do_nothing)
+            function.close()
+        finally:
+            IsolatedFunctionClone.live_clone_warning_threshold = previous
+
+
+class IsolatedFunctionCloneAttributeChainTests(TestCase):
+    """Test case for mocks built from the attribute chains a function uses."""
+
+    def test_attribute_chain_mock(self):
+        with IsolatedFunctionClone(join_paths) as function:
+            self.assertEqual(function.attribute_paths, ["os.path.join"])
+            function("a", "b")
+            function.context["os"].path.join.assert_called_once_with("a", "b")
+
+    def test_attribute_chain_mock_is_autospeced(self):
+        with IsolatedFunctionClone(join_paths) as function:
+            with self.assertRaises(AttributeError):
+                function.context["os"].not_an_attribute
+            with self.assertRaises(TypeError):
+                function.context["os"].path.join()
+
+    def test_module_spec_depth_is_opt_in(self):
+        with IsolatedFunctionClone(join_paths) as function:
+            self.assertIsNone(function.context.module_spec_depth)
+            self.assertNotIsInstance(function.context["os"], LazyModuleMock)
+        with IsolatedFunctionClone(join_paths, module_spec_depth=1) as function:
+            self.assertIsInstance(function.context["os"], LazyModuleMock)
+
+
+class IsolatedFunctionCloneCassetteTests(TestCase):
+    """Test case for recording and replaying dependency results."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cassette_path = os.path.join(directory.name, "add_twice.cassette")
+
+    def test_record_then_replay(self):
+        with IsolatedFunctionClone(
+            add_twice, name_allow_list=[add], cassette=self.cassette_path
+        ) as function:
+            self.assertEqual(function(1, 2), 5)
+        self.assertEqual(
+            function.cassette.recordings, {"add": [(False, 3), (False, 5)]}
+        )
+
+        with IsolatedFunctionClone(
+            add_twice, name_allow_list=[add], cassette=self.cassette_path
+        ) as function:
+            # The replayed values don't depend on the arguments.
+            self.assertEqual(function(0, 0), 5)
+            self.assertEqual(function.context[add].call_count, 2)
+            with self.assertRaises(CassetteExhaustedError):
+                function(0, 0)
+
+    def test_reset_rewinds_the_replay(self):
+        with IsolatedFunctionClone(
+            add_twice, name_allow_list=[add], cassette=self.cassette_path
+        ) as function:
+            function(1, 2)
+
+        with IsolatedFunctionClone(
+            add_twice, name_allow_list=[add], cassette=self.cassette_path
+        ) as function:
+            self.assertEqual(function(0, 0), 5)
+            function.reset()
+            self.assertEqual(function(0, 0), 5)
+
+    def test_custom_mocks_take_precedence_over_replay(self):
+        with IsolatedFunctionClone(
+            add_twice, name_allow_list=[add], cassette=self.cassette_path
+        ) as function:
+            function(1, 2)
+
+        with IsolatedFunctionClone(
+            add_twice,
+            cassette=self.cassette_path,
+            cassette_mode="replay",
+            add=Mock(return_value=0),
+        ) as function:
+            self.assertEqual(function(1, 2), 0)
+
+    def test_cassette_isnt_saved_when_the_body_raises(self):
+        with self.assertRaises(ValueError):
+            with IsolatedFunctionClone(
+                add_twice, name_allow_list=[add], cassette=self.cassette_path
+            ) as function:
+                function(1, 2)
+                raise ValueError("the test failed")
+        self.assertFalse(os.path.exists(self.cassette_path))
+
+    def test_module_attribute_calls_are_recorded(self):
+        with IsolatedFunctionClone(
+            join_paths, name_allow_list=["os"], cassette=self.cassette_path
+        ) as function:
+            self.assertEqual(function("a", "b"), os.path.join("a", "b"))
+            self.assertEqual(function.context["os"].sep, os.sep)
+        self.assertEqual(
+            function.cassette.recordings,
+            {"os.path.join": [(False, os.path.join("a", "b"))]},
+        )
+
+        with IsolatedFunctionClone(join_paths, cassette=self.cassette_path) as function:
+            self.assertEqual(function("x", "y"), os.path.join("a", "b"))
+            self.assertIsNot(function.context["os"], os)
+
+    def test_invalid_cassette_mode(self):
+        with self.assertRaises(ValueError):
+            IsolatedFunctionClone(
+                add_twice, cassette=self.cassette_path, cassette_mode="rewind"
+            )
+
+
+class IsolatedFunctionCloneVirtualClockTests(TestCase):
+    """Test case for isolated functions with a virtual clock."""
+
+    def test_sleeps_advance_virtual_time(self):
+        with IsolatedFunctionClone(
+            retry_with_backoff,
+            virtual_clock=True,
+            check_one=Mock(side_effect=[False, False, False, True]),
+        ) as function:
+            self.assertEqual(function(10), 7)
+            self.assertEqual(function.clock.elapsed, 7)
+            function.context["time"].sleep.assert_called_with(4)
+
+    def test_reset_resets_the_clock_and_its_mocks(self):
+        with IsolatedFunctionClone(
+            retry_with_backoff,
+            virtual_clock=True,
+            check_one=Mock(side_effect=[False, True, False, True]),
+        ) as function:
+            function(10)
+            function.reset()
+            self.assertEqual(function.clock.elapsed, 0)
+            function.context["time"].sleep.assert_not_called()
+
+            function(10)
+            self.assertEqual(function.clock.elapsed, 1)
+            function.context["time"].sleep.assert_called_once_with(1)
+        clock = VirtualClock(epoch=100)
+        with IsolatedFunctionClone(
+            sleep_then_get_time, virtual_clock=clock
+        ) as function:
+            function.advance_time(5)
+            self.assertEqual(asyncio.run(function(10)), 115)
+            function.context["asyncio"].sleep.assert_awaited_once_with(10)
+
+    def test_other_time_and_asyncio_attributes_are_real(self):
+        with IsolatedFunctionClone(gather_sleeps, virtual_clock=True) as function:
+            self.assertEqual(asyncio.run(function([1, 2, 3])), (6, "1970"))
+            self.assertEqual(function.clock.elapsed, 6)
+            self.assertIs(function.context["asyncio"].gather, asyncio.gather)
+            self.assertIsNot(function.context["asyncio"], asyncio)
+            self.assertIsNot(asyncio.sleep, function.context["asyncio"].sleep)
+
+    def test_advance_time_without_clock(self):
+        with IsolatedFunctionClone(sleep_then_get_time) as function:
+            with self.assertRaises(RuntimeError):
+                function.advance_time(5)
+
+
+class IsolatedFunctionCloneFilesystemTests(TestCase):
+    """Test case for isolated functions with an in-memory filesystem."""
+
+    def test_open_reads_seeded_files(self):
+        filesystem = MemoryFileSystem({"/data/input.txt": "a\nb\nc\n"})
+        with IsolatedFunctionClone(count_lines, filesystem=filesystem) as function:
+            self.assertEqual(function("/data/input.txt"), 3)
+            function.context["open"].assert_called_once_with("/data/input.txt")
+            with self.assertRaises(FileNotFoundError):
+                function("/data/missing.txt")
+
+    def test_writes_can_be_inspected(self):
+        with IsolatedFunctionClone(write_report, filesystem=True) as function:
+            self.assertTrue(function("reports", ["a", "b"]))
+            self.assertEqual(function.filesystem.writes, ["/reports/report.txt"])
+            self.assertEqual(
+                function.filesystem.read_text("/reports/report.txt"), "a\nb"
+            )
+
+    def test_functions_imported_from_os_are_replaced(self):
+        filesystem = MemoryFileSystem({"/data/input.txt": ""})
+        with IsolatedFunctionClone(list_if_exists, filesystem=filesystem) as function:
+            self.assertEqual(function("/data"), ["input.txt"])
+            self.assertEqual(function("/etc"), [])
+            function.context["exists"].assert_called_with("/etc")
+
+    def test_non_filesystem_attributes_are_real(self):
+        with IsolatedFunctionClone(save_environment, filesystem=True) as function:
+            with patch.dict(os.environ, {"FUNALONE_USER": "ada"}):
+                path = function("/env", "FUNALONE_USER")
+            self.assertEqual(path, "/env/funalone_user.txt")
+            self.assertEqual(function.filesystem.read_text(path), "ada" + os.linesep)
+            self.assertIs(function.context["os"].environ, os.environ)
+            self.assertIs(function.context["pathlib"].PurePosixPath, PurePosixPath)
+            function.context["os"].makedirs.assert_called_once_with(
+                "/env", exist_ok=True
+            )
+
+    def test_unsupported_filesystem_functions_raise(self):
+        with IsolatedFunctionClone(stat_file, filesystem=True) as function:
+            with self.assertRaisesRegex(NotImplementedError, "os.stat"):
+                function(__file__)
+
+
+class IsolatedFunctionCloneCallBudgetTests(TestCase):
+    """Test case for dependency call budgets."""
+
+    def test_within_budget(self):
+        with IsolatedFunctionClone(
+            call_per_item, max_calls={check_one: 3, check_two: 1}
+        ) as function:
+            function([1, 2, 3])
+
+    def test_budget_exceeded(self):
+        with IsolatedFunctionClone(call_per_item, max_calls={check_one: 2}) as function:
+            with self.assertRaisesRegex(
+                AccessBudgetExceededError, "`check_one` was accessed 3 times"
+            ):
+                function([1, 2, 3, 4])
+            check_one_item = function.context.to_debug_dict()["check_one"]
+            self.assertEqual(check_one_item.metadata.active_access_count, 3)
+
+            function.reset()
+            function([1])
+
+    def test_budgets_are_per_call(self):
+        with IsolatedFunctionClone(call_per_item, max_calls={check_one: 2}) as function:
+            function([1, 2])
+            function([1])
+            function([])
+            with self.assertRaises(AccessBudgetExceededError):
+                function([1, 2, 3])
+            self.assertIsNotNone(function.context.budget_violation)
+
+            function([1, 2])
+            self.assertIsNone(function.context.budget_violation)
+
+    def test_budget_report_has_argument_sizes(self):
+        with IsolatedFunctionClone(call_per_item, max_calls={check_one: 2}) as function:
+            function([1])
+            with self.assertRaisesRegex(
+                AccessBudgetExceededError,
+                "accessed 3 times in the call(.|\\n)*`items` has 5",
+            ):
+                function([1, 2, 3, 4, 5])
+
+    def test_total_budget_exceeded(self):
+        with IsolatedFunctionClone(call_per_item, max_total_calls=3) as function:
+            with self.assertRaisesRegex(AccessBudgetExceededError, "total budget of 3"):
+                function([1, 2, 3])
+
+    def test_budget_violation_is_raised_if_caught(self):
+        with IsolatedFunctionClone(
+            call_per_item_catching_errors, max_calls={check_one: 1}
+        ) as function:
+            with self.assertRaises(AccessBudgetExceededError):
+                function([1, 2])
+
+
+class IsolatedFunctionCloneCostModelTests(TestCase):
+    """Test case for simulated latencies."""
+
+    def test_simulated_latency(self):
+        with IsolatedFunctionClone(
+            call_per_item,
+            dependency_costs={
+                check_one: 1.0,
+                check_two: lambda items: 10.0 * len(items),
+            },
+        ) as function:
+            function([1, 2])
+            self.assertEqual(function.simulated_latency, 22.0)
+            function([1])
+            self.assertEqual(function.simulated_latency, 11.0)
+
+            report = function.latency_reports[0]
+            self.assertEqual(
+                report.by_dependency, {"check_one": 2.0, "check_two": 20.0}
+            )
+            self.assertEqual(report.call_counts, {"check_one": 2, "check_two": 1})
+
+    def test_simulated_latency_of_attributes(self):
+        with IsolatedFunctionClone(
+            join_paths, dependency_costs={"os.path.join": 0.5}
+        ) as function:
+            function("a", "b")
+            self.assertEqual(function.simulated_latency, 0.5)
+
+    def test_latency_budget(self):
+        with IsolatedFunctionClone(
+            call_per_item,
+            dependency_costs={check_one: 1.0},
+            max_simulated_latency=2.0,
+        ) as function:
+            function([1, 2])
+            with self.assertRaises(LatencyBudgetExceededError):
+                function([1, 2, 3])
+
+
+class IsolatedFunctionCloneMemoryProfileTests(TestCase):
+    """Test case for memory profiling of isolated calls."""
+
+    def test_profile_memory(self):
+        with IsolatedFunctionClone(make_strings, profile_memory=True) as function:
+            strings = function(100)
+            report = function.memory_reports[-1]
+
+            self.assertGreater(report.net, sum(len(string) for string in strings))
+            self.assertGreaterEqual(report.peak, report.net)
+            self.assertGreater(report.peak, sum(len(string) for string in strings))
+            # Interpreters may attribute small allocations, like those of
+            # instrumenting the code, to the `def` line.
+            self.assertEqual(
+                report.top_sites[0].lineno, make_strings.__code__.co_firstlineno + 3
+            )
+            self.assertGreater(
+                report.top_sites[0].size, sum(len(string) for string in strings)
+            )
+
+    def test_profile_memory_keeps_the_traced_peak(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        allocation = bytearray(1_000_000)
+        del allocation
+        _current, peak = tracemalloc.get_traced_memory()
+
+        with IsolatedFunctionClone(make_strings, profile_memory=True) as function:
+            function(10)
+            self.assertIsNone(function.memory_reports[-1].peak)
+            strings = function(2_000)
+            self.assertGreater(
+                function.memory_reports[-1].peak,
+                sum(len(string) for string in strings),
+            )
+
+        self.assertGreaterEqual(tracemalloc.get_traced_memory()[1], peak)
+
+    def test_run_batch(self):
+        with IsolatedFunctionClone(basic_two_int_function) as function:
+            results = function.run_batch([(1, 2), (3, 4)], profile_memory=True)
+
+            self.assertEqual(len(results), 2)
+            self.assertEqual(len(function.memory_reports), 1)
+            function.context[check_one].assert_called_once_with(3, 4)
+
+
+class IsolatedFunctionCloneCoverageTests(TestCase):
+    """Test case for coverage collection of isolated calls."""
+
+    def test_coverage_per_call_and_combined(self):
+        first_line = if_else_function.__code__.co_firstlineno
+        if_line, then_line, else_line = first_line + 4, first_line + 5, first_line + 7
+
+        with IsolatedFunctionClone(if_else_function, collect_coverage=True) as function:
+            function(2, 1)
+            self.assertEqual(function.coverage_per_call[0].lines, {if_line, then_line})
+            self.assertEqual(function.coverage.missing_lines, {else_line})
+
+            function(1, 2)
+            self.assertEqual(function.coverage_per_call[1].lines, {if_line, else_line})
+            self.assertEqual(function.coverage.missing_lines, set())
+            self.assertEqual(
+                function.coverage.branches,
+                {(if_line, then_line), (if_line, else_line)},
+            )
+
+            function.reset()
+            self.assertEqual(function.coverage.lines, set())
+
+    def test_coverage_keeps_the_trace_function(self):
+        traced_lines = []
+
+        def trace(frame, event, arg):
+            if frame.f_code.co_name == if_else_function.__name__ and event == "line":
+                traced_lines.append(frame.f_lineno)
+            return trace
+
+        sys.settrace(trace)
+        try:
+            with IsolatedFunctionClone(
+                if_else_function, collect_coverage=True
+            ) as function:
+                function(2, 1)
+            self.assertIs(sys.gettrace(), trace)
+        finally:
+            sys.settrace(None)
+
+        self.assertEqual(set(traced_lines), function.coverage.lines)
+
+    def test_coverage_not_collected(self):
+        with IsolatedFunctionClone(if_else_function) as function:
+            with self.assertRaises(RuntimeError):
+                function.coverage
+
+
+class IsolatedFunctionCloneFollowTests(TestCase):
+    """Test case for the recursive isolation of callees."""
+
+    def test_follow_direct_callees(self):
+        with IsolatedFunctionClone(list_directory, follow=[format_lines]) as function:
+            function.context["os"].listdir.return_value = [" A "]
+            function.context["format_path"].return_value = "path"
+
+            result = function("Path")
+            self.assertEqual(len(result), 2)
+            function.context["normalize_line"].assert_called_once_with(" A ")
+            self.assertEqual(result[1], "path")
+            self.assertEqual(list(function.followed_clones), [format_lines.__code__])
+
+    def test_follow_call_tree(self):
+        with IsolatedFunctionClone(
+            list_directory,
+            follow=[AllowModulePrefix("test.utils")],
+            follow_depth=2,
+        ) as function:
+            function.context["os"].listdir.return_value = [" A ", "b "]
+
+            self.assertEqual(function("Path"), ["a", "b", "path"])
+            # `normalize_line` is shared, but only cloned once.
+            self.assertEqual(len(function.followed_clones), 3)
+            normalize_line_item = function.context.to_debug_dict()["normalize_line"]
+            self.assertEqual(normalize_line_item.metadata.active_access_count, 3)
+
+    def test_custom_mocks_are_not_followed(self):
+        with IsolatedFunctionClone(
+            list_directory,
+            follow=lambda name, obj: True,
+            follow_depth=2,
+            format_lines=Mock(return_value=[]),
+        ) as function:
+            function.context["os"].listdir.return_value = []
+            self.assertEqual(function("Path"), ["path"])
+            self.assertNotIn(format_lines.__code__, function.followed_clones)
@@ -0,0 +1,82 @@
+import unittest
+from unittest import TestCase
+
+from funalone import IsolatedTestCase, isolated_clone
+from funalone.types import MockOrigin
+from test.utils import add_twice, if_else_function, join_paths
+
+
+def run_test_case(test_case: type[TestCase]) -> unittest.TestResult:
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(test_case)
+    result = unittest.TestResult()
+    suite.run(result)
+    return result
+
+
+class IsolatedTestCaseTests(TestCase):
+    """Test case for the unittest mixin that shares clones between tests."""
+
+    def test_clones_are_shared_and_reset(self):
+        built_clones = []
+
+        class Example(IsolatedTestCase, TestCase):
+            if_else_clone = isolated_clone(if_else_function)
+            add_twice_clone = isolated_clone(add_twice, name_allow_list=["add"])
+
+            def test_first(self):
+                built_clones.append(self.if_else_clone)
+                self.if_else_clone(2, 1)
+                self.if_else_clone.context["check_one"].assert_called_once_with(2, 1)
+                self.assertEqual(self.add_twice_clone(1, 2), 5)
+
+            def test_second(self):
+                built_clones.append(self.if_else_clone)
+                self.if_else_clone(2, 1)
+                self.if_else_clone.context["check_one"].assert_called_once_with(2, 1)
+
+        result = run_test_case(Example)
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(result.errors + result.failures, [])
+        self.assertIs(built_clones[0], built_clones[1])
+        self.assertEqual(Example._isolated_clones, {})
+
+    def test_subclasses_override_declarations(self):
+        class Example(IsolatedTestCase, TestCase):
+            clone = isolated_clone(if_else_function)
+            other_clone = isolated_clone(if_else_function)
+
+            def test_clone(self):
+                self.assertEqual(self.clone(1, 2), 5)
+
+        class SubclassExample(Example):
+            clone = isolated_clone(add_twice, name_allow_list=["add"])
+            other_clone = None
+
+        self.assertEqual(list(SubclassExample._clone_declarations()), ["clone"])
+        result = run_test_case(SubclassExample)
+        self.assertEqual(result.errors + result.failures, [])
+
+    def test_clone_outside_of_class_setup(self):
+        class Example(IsolatedTestCase, TestCase):
+            clone = isolated_clone(if_else_function)
+
+            def test_clone(self):
+                pass
+
+        with self.assertRaises(RuntimeError):
+            Example("test_clone").clone
+
+    def test_prewarm(self):
+        clone = isolated_clone(join_paths, module_spec_depth=1).build()
+        context = clone.context.to_debug_dict()
+        self.assertEqual(context["os"].metadata.origin, MockOrigin.PREWARMED)
+        self.assertEqual(context["os"].metadata.total_access_count, 0)
+        self.assertIn("path", vars(context["os"].object)["_mock_children"])
+        clone("a", "b")
+        self.assertEqual(context["os"].metadata.active_access_count, 1)
+
+    def test_prewarmed_mocks_are_only_alerted_once_used(self):
+        clone = isolated_clone(join_paths).build()
+        self.assertEqual(clone.default_mock_alert_message(), "")
+        clone("a", "b")
+        self.assertIn("`os` is not properly mocked", clone.default_mock_alert_message())
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from funalone.memory_filesystem import MemoryFileSystem
+
+
+class MemoryFileSystemTests(TestCase):
+    """Test case for the in-memory filesystem."""
+
+    def setUp(self):
+        self.filesystem = MemoryFileSystem({"/a/b.txt": "content"}, cwd="/a")
+
+    def test_open_modes(self):
+        with self.filesystem.open("b.txt", "a") as file:
+            file.write(" appended")
+        self.assertEqual(self.filesystem.read_text("/a/b.txt"), "content appended")
+
+        with self.filesystem.open("/a/c.bin", "wb") as file:
+            file.write(b"\x00")
+        self.assertEqual(self.filesystem.read_bytes("c.bin"), b"\x00")
+
+        with self.assertRaises(FileExistsError):
+            self.filesystem.open("c.bin", "x")
+        with self.assertRaises(FileNotFoundError):
+            self.filesystem.open("/missing/c.bin", "w")
+        with self.assertRaises(IsADirectoryError):
+            self.filesystem.open("/a")
+
+    def test_read_only_files_are_not_writable(self):
+        with self.filesystem.open("b.txt") as file:
+            with self.assertRaises(OSError):
+                file.write("x")
+        self.assertEqual(self.filesystem.writes, [])
+
+    def test_directories(self):
+        self.filesystem.makedirs("x/y")
+        self.assertEqual(self.filesystem.listdir(), ["b.txt", "x"])
+        self.assertTrue(self.filesystem.isdir("/a/x/y"))
+        with self.assertRaises(OSError):
+            self.filesystem.rmdir("x")
+        self.filesystem.rmdir("x/y")
+        self.filesystem.rmdir("x")
+        self.assertEqual(self.filesystem.listdir(), ["b.txt"])
+
+    def test_path(self):
+        path = self.filesystem.Path("new") / "file.txt"
+        path.parent.mkdir()
+        path.write_text("hello")
+        self.assertTrue(path.is_file())
+        self.assertEqual(path.read_text(), "hello")
+        self.assertEqual(list(path.parent.iterdir()), [path])
+        path.unlink()
+        self.assertFalse(path.exists())
+        path.unlink(missing_ok=True)
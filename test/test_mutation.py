@@ -0,0 +1,65 @@
+from unittest import TestCase, skipUnless
+
+from funalone.mutation import MutationRunner, generate_mutants
+from funalone.parallel import fork_available
+from test.utils import clamp_to_limit, count_down, if_else_function
+
+
+class MutationTests(TestCase):
+    """Test case for the mutation testing of isolated functions."""
+
+    def test_mutants_leave_the_docstring(self):
+        descriptions = [
+            mutant.description
+            for mutant in generate_mutants(
+                clamp_to_limit.__code__, clamp_to_limit.__doc__
+            )
+        ]
+        self.assertTrue(any(d.endswith("`>` -> `<=`") for d in descriptions))
+        self.assertIn("clamp_to_limit: constant 10 -> 11", descriptions)
+        self.assertFalse(any("Returns" in description for description in descriptions))
+
+    def test_all_mutants_killed(self):
+        report = MutationRunner(
+            clamp_to_limit,
+            [
+                {"args": (3,), "checks": {"result": 3}},
+                {"args": (20,), "checks": {"result": 10}},
+            ],
+            processes=1,
+        ).run()
+        self.assertTrue(report.results)
+        self.assertEqual(report.survivors, [])
+        self.assertEqual(report.score, 1.0)
+
+    def test_surviving_mutants(self):
+        report = MutationRunner(
+            clamp_to_limit, [{"args": (3,), "checks": {"result": 3}}], processes=1
+        ).run()
+        self.assertIn(
+            "clamp_to_limit: constant 10 -> 11",
+            [result.description for result in report.survivors],
+        )
+        self.assertLess(report.score, 1.0)
+
+    def test_mutants_killed_by_mock_calls(self):
+        report = MutationRunner(if_else_function, [{"args": (2, 1)}], processes=1).run()
+        self.assertEqual(report.survivors, [])
+
+    def test_original_must_pass(self):
+        runner = MutationRunner(
+            clamp_to_limit, [{"args": (3,), "checks": {"result": 4}}], processes=1
+        )
+        with self.assertRaises(ValueError):
+            runner.run()
+
+    @skipUnless(fork_available(), "Worker processes can't be forked.")
+    def test_parallel_run_kills_endless_mutants(self):
+        report = MutationRunner(
+            count_down,
+            [{"args": (0,), "checks": {"result": 0}}, {"args": (3,)}],
+            processes=2,
+            timeout=0.5,
+        ).run()
+        self.assertIn("timed out", [result.reason for result in report.results])
+        self.assertEqual(report.survivors, [])
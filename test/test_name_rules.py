@@ -0,0 +1,82 @@
+import gc
+import weakref
+from unittest import TestCase
+
+from funalone.name_rules import (
+    AllowModulePrefix,
+    AllowNameGlob,
+    AllowNameRegex,
+    AllowType,
+    compile_name_allows,
+)
+from test.utils import (
+    CustomException,
+    basic_two_int_function,
+    raise_and_catch_custom_exception,
+)
+
+
+class CompileNameAllowsTests(TestCase):
+    """Test case for compiled name allow tables."""
+
+    def test_name_rules_are_resolved_ahead_of_time(self):
+        table = compile_name_allows(
+            basic_two_int_function.__code__,
+            name_allow_list=["unused_name"],
+            name_allow_rules=[AllowNameGlob("check_*"), AllowNameRegex("ch.ck_tw.")],
+        )
+        self.assertEqual(table.names, frozenset({"check_one"}))
+        self.assertTrue(table("check_one", object()))
+        self.assertFalse(table("check_two", object()))
+
+    def test_compiled_tables_are_cached(self):
+        first = compile_name_allows(basic_two_int_function.__code__, ["check_one"])
+        second = compile_name_allows(basic_two_int_function.__code__, ["check_one"])
+        self.assertIs(first, second)
+
+    def test_cache_doesnt_keep_code_objects_alive(self):
+        namespace: dict = {}
+        exec("def function():\n    return check_one()", namespace)
+        code = weakref.ref(namespace["function"].__code__)
+        compile_name_allows(code(), ["check_one"])
+
+        del namespace["function"]
+        gc.collect()
+        self.assertIsNone(code())
+
+    def test_tables_with_conditions_arent_cached(self):
+        code = basic_two_int_function.__code__
+        condition = lambda name, obj: False  # noqa: E731
+        first = compile_name_allows(code, name_allow_condition=condition)
+        second = compile_name_allows(code, name_allow_condition=condition)
+        self.assertIsNot(first, second)
+
+    def test_module_prefix_rule(self):
+        table = compile_name_allows(
+            raise_and_catch_custom_exception.__code__,
+            name_allow_rules=[AllowModulePrefix("test")],
+            allow_exceptions=False,
+        )
+        self.assertTrue(table("CustomException", CustomException))
+        self.assertFalse(table("TestCase", TestCase))
+
+        table = compile_name_allows(
+            raise_and_catch_custom_exception.__code__,
+            name_allow_rules=[AllowModulePrefix("tes")],
+            allow_exceptions=False,
+        )
+        self.assertFalse(table("CustomException", CustomException))
+
+    def test_type_rule(self):
+        table = compile_name_allows(
+            basic_two_int_function.__code__,
+            name_allow_rules=[AllowType(Exception)],
+            allow_exceptions=False,
+        )
+        self.assertTrue(table("CustomException", CustomException))
+        self.assertTrue(table("error", ValueError()))
+        self.assertFalse(table("check_one", object()))
+
+    def test_unknown_rule(self):
+        with self.assertRaises(TypeError):
+            compile_name_allows(basic_two_int_function.__code__, name_allow_rules=[1])
@@ -6,6 +6,7 @@ from funalone import create_namespaced_function_clone
 from test.declarative_test_case import DeclarativeTestCase
 from test.utils import (
     basic_two_int_function,
+    call_per_item,
     check_one,
     check_two,
     ext_variable,
@@ -58,6 +59,18 @@ class NamespacedFunctionCloneTests(DeclarativeTestCase, TestCase):
                 "called": [check_one],
             },
         },
+        {
+            "message": "Test keep original globals used in a comprehension",
+            "function": call_per_item,
+            "config": {
+                "globals": {"check_two": lambda items: ...},
+                "keep_original_globals": lambda name, value: name == "check_one",
+            },
+            "args": ([1, 2],),
+            "checks": {
+                "called": [check_one],
+            },
+        },
         {
             "message": "Test replace check_one",
             "function": basic_two_int_function,
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+import textwrap
+from importlib.util import find_spec
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipIf
+from unittest.mock import Mock
+
+from test.utils import add, add_twice, if_else_function
+
+if find_spec("pytest") is not None:
+    from funalone.pytest_plugin import _CloneStore
+
+PLUGIN_TESTS = """
+from test.utils import add_twice
+
+
+def test_first(isolated):
+    clone = isolated(add_twice, scope="session", name_allow_list=["add"])
+    assert clone(1, 2) == 5
+
+
+def test_second(isolated):
+    clone = isolated(add_twice, scope="session", name_allow_list=["add"])
+    assert clone.context.to_debug_dict()["add"].metadata.active_access_count == 0
+    assert clone(1, 2) == 5
+
+
+def test_mocked(isolated):
+    clone = isolated(add_twice)
+    clone(1, 2)
+    clone.context["add"].assert_called()
+"""
+
+
+@skipIf(find_spec("pytest") is None, "pytest isn't installed.")
+class CloneStoreTests(TestCase):
+    """Test case for the clones shared by the pytest plugin."""
+
+    def test_clones_are_shared_by_scope(self):
+        store = _CloneStore()
+        clone = store.get(if_else_function, "module", "test_a.py")
+        self.assertIs(store.get(if_else_function, "module", "test_a.py"), clone)
+        self.assertIsNot(store.get(if_else_function, "module", "test_b.py"), clone)
+        self.assertIsNot(
+            store.get(if_else_function, "module", "test_a.py", allow_builtins=False),
+            clone,
+        )
+        self.assertEqual(store.built, 3)
+
+    def test_clones_are_shared_by_parameters(self):
+        store = _CloneStore()
+        check = Mock()
+        clone = store.get(add_twice, "session", "", name_allow_list=["add"], add=check)
+        self.assertIs(
+            store.get(add_twice, "session", "", name_allow_list=["add"], add=check),
+            clone,
+        )
+        self.assertIsNot(
+            store.get(add_twice, "session", "", name_allow_list=["add"], add=Mock()),
+            clone,
+        )
+        self.assertIsNot(store.get(add_twice, "session", "", add=check), clone)
+        self.assertEqual(store.built, 3)
+
+    def test_clones_are_reset_between_tests(self):
+        store = _CloneStore()
+        clone = store.get(add_twice, "session", "", name_allow_list=["add"])
+        clone(1, 2)
+        store.end_test("test_a.py")
+        self.assertEqual(
+            clone.context.to_debug_dict()["add"].metadata.active_access_count, 0
+        )
+        self.assertEqual(store.resets, 1)
+        self.assertEqual(store.access_counts, {"test.utils:add_twice": {"add": 2}})
+
+    def test_scoped_clones_are_closed(self):
+        store = _CloneStore()
+        function_clone = store.get(add, "function", "test_a.py::test")
+        module_clone = store.get(add, "module", "test_a.py")
+        store.end_test("test_a.py")
+        self.assertNotIn(function_clone, store.clones.values())
+        self.assertIn(module_clone, store.clones.values())
+        store.end_test("test_b.py")
+        self.assertEqual(store.clones, {})
+
+    def test_merge_worker_stats(self):
+        store = _CloneStore()
+        worker_store = _CloneStore()
+        worker_store.get(add_twice, "session", "")(1, 2)
+        worker_store.end_test(None)
+        store.merge(worker_store.to_dict())
+        store.merge(worker_store.to_dict())
+        self.assertEqual(store.built, 2)
+        self.assertEqual(store.access_counts["test.utils:add_twice"]["add"], 4)
+
+    def test_plugin(self):
+        with TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "test_plugin.py"), "w") as file:
+                file.write(textwrap.dedent(PLUGIN_TESTS))
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            process = subprocess.run(
+                [sys.executable, "-m", "pytest", "-p", "funalone.pytest_plugin"],
+                cwd=directory,
+                env=os.environ | {"PYTHONPATH": root},
+                capture_output=True,
+                text=True,
+            )
+        self.assertEqual(process.returncode, 0, process.stdout)
+        self.assertIn("2 clones built, reset 3 times between tests.", process.stdout)
+        self.assertIn("test.utils:add_twice: add: 6", process.stdout)
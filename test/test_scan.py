@@ -0,0 +1,173 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from funalone.scan import ScanConfig, Scanner
+
+PACKAGE_SOURCE = {
+    "__init__.py": "",
+    "core.py": """
+        import os
+        from functools import wraps
+
+        LIMIT = 10
+
+
+        def helper(value):
+            return value
+
+
+        def decorated(function):
+            @wraps(function)
+            def wrapper(*args):
+                return function(*args)
+
+            return wrapper
+
+
+        @decorated
+        def process(path):
+            if not os.path.exists(path):
+                raise ValueError(path)
+            return [helper(line) for line in open(path)][:LIMIT] + undefined
+
+
+        class Reader:
+            @staticmethod
+            def read(path):
+                return helper(path)
+
+            @property
+            def size(self):
+                return len(helper(self))
+    """,
+    "sub/__init__.py": "",
+    "sub/broken.py": "raise ImportError('broken on purpose')\n",
+}
+
+
+class ScannerTests(TestCase):
+    """Test case for the static dependency scanner."""
+
+    package_number = 0
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        # Every test scans a new package, since scanned modules stay imported.
+        ScannerTests.package_number += 1
+        self.package = f"scanned_package_{self.package_number}"
+        for path, source in PACKAGE_SOURCE.items():
+            self.write(path, source)
+        sys.path.insert(0, self.directory.name)
+        self.cache_path = os.path.join(self.directory.name, "cache.json")
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        self.directory.cleanup()
+
+    def write(self, path: str, source: str):
+        path = os.path.join(self.directory.name, self.package, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(textwrap.dedent(source))
+
+    def scan(self, config=None, processes=1):
+        return Scanner(config, self.cache_path, processes).scan([self.package])
+
+    def test_names_are_classified_like_the_context(self):
+        functions = self.scan().to_dict()
+        self.assertEqual(
+            functions[f"{self.package}.core:process"],
+            {
+                "LIMIT": {"category": "mocked", "spec": "int"},
+                "ValueError": {"category": "exception", "spec": None},
+                "helper": {"category": "mocked", "spec": "function"},
+                "open": {"category": "builtin", "spec": None},
+                "os": {"category": "mocked", "spec": "module"},
+                "undefined": {"category": "mocked", "spec": None},
+            },
+        )
+        self.assertIn(f"{self.package}.core:Reader.read", functions)
+        self.assertIn(f"{self.package}.core:Reader.size", functions)
+        self.assertIn(f"{self.package}.core:decorated", functions)
+        self.assertNotIn(f"{self.package}.core:wraps", functions)
+
+    def test_allow_configuration(self):
+        config = ScanConfig(
+            name_allow_list=("helper",),
+            allowed_modules=("os",),
+            allow_builtins=False,
+        )
+        names = self.scan(config).to_dict()[f"{self.package}.core:process"]
+        self.assertEqual(names["helper"]["category"], "allowed")
+        self.assertEqual(names["os"]["category"], "allowed")
+        self.assertEqual(names["open"]["category"], "mocked")
+        self.assertEqual(names["ValueError"]["category"], "exception")
+
+    def test_import_errors_are_reported(self):
+        report = self.scan()
+        self.assertEqual(list(report.errors), [f"{self.package}.sub.broken"])
+        self.assertIn("broken on purpose", report.summary_lines()[-2])
+
+    def test_subpackage_errors_are_reported(self):
+        self.write("failing/__init__.py", "raise RuntimeError('boom')\n")
+        self.write("failing/module.py", "def function():\n    return helper()\n")
+        report = self.scan()
+        self.assertEqual(
+            report.errors,
+            {
+                f"{self.package}.failing": "RuntimeError: boom",
+                f"{self.package}.sub.broken": "ImportError: broken on purpose",
+            },
+        )
+        self.assertIn(f"{self.package}.core:process", report.to_dict())
+
+    def test_serial_rescans_import_changed_modules(self):
+        self.scan()
+        self.write("core.py", "def added():\n    return helper()\n")
+        self.assertIn(f"{self.package}.core:added", self.scan().to_dict())
+
+    def test_rescans_only_changed_modules(self):
+        first = self.scan(processes=2)
+        self.assertEqual(first.cached, [])
+
+        self.write("core.py", "def added():\n    return helper()\n")
+        second = self.scan(processes=2)
+        # The broken module isn't cached, so it's scanned again.
+        self.assertEqual(
+            sorted(second.scanned),
+            [f"{self.package}.core", f"{self.package}.sub.broken"],
+        )
+        self.assertIn(f"{self.package}.core:added", second.to_dict())
+
+        other_config = self.scan(ScanConfig(allow_builtins=False))
+        self.assertEqual(other_config.cached, [])
+
+    def test_command_line(self):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "funalone",
+                "scan",
+                self.package,
+                "--format=json",
+                "--no-cache",
+                "--allow=helper",
+            ],
+            capture_output=True,
+            text=True,
+            cwd=self.directory.name,
+            env=os.environ | {"PYTHONPATH": os.getcwd()},
+        )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("broken on purpose", result.stderr)
+        functions = json.loads(result.stdout)
+        self.assertEqual(
+            functions[f"{self.package}.core:Reader.read"],
+            {"helper": {"category": "allowed", "spec": None}},
+        )
@@ -0,0 +1,81 @@
+import json
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from funalone import IsolatedFunctionClone
+from funalone.streams import SideEffectStream, StreamExhaustedError
+from test.utils import call_per_item
+
+
+class SideEffectStreamTests(TestCase):
+    """Test case for lazily read side effect streams."""
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_iterable_is_read_ahead_lazily(self):
+        read = []
+
+        def values():
+            for value in range(100):
+                read.append(value)
+                yield value
+
+        stream = SideEffectStream(values(), read_ahead=4)
+        self.assertEqual(read, [])
+        self.assertEqual([stream(), stream()], [0, 1])
+        self.assertEqual(read, [0, 1, 2, 3])
+        self.assertEqual((stream.consumed, stream.buffered), (2, 2))
+
+    def test_exhausted_and_exceptions(self):
+        stream = SideEffectStream([1, ValueError("boom")])
+        self.assertEqual(stream(), 1)
+        with self.assertRaises(ValueError):
+            stream()
+        with self.assertRaises(StreamExhaustedError):
+            stream()
+        self.assertEqual(stream.consumed, 2)
+
+    def test_jsonl_file(self):
+        path = os.path.join(self.directory.name, "pages.jsonl")
+        with open(path, "w") as file:
+            file.write('{"page": 1}\n\n[2, 3]\n')
+
+        with SideEffectStream(path, read_ahead=1) as stream:
+            self.assertEqual(stream(), {"page": 1})
+            self.assertIsNotNone(stream._file)
+            self.assertEqual(stream(), [2, 3])
+            with self.assertRaises(StreamExhaustedError):
+                stream()
+            self.assertIsNone(stream._file)
+
+    def test_pickle_file(self):
+        path = os.path.join(self.directory.name, "messages.pkl")
+        with open(path, "wb") as file:
+            for message in ({"id": 1}, {"id": 2}, {"id": 3}):
+                pickle.dump(message, file)
+
+        stream = SideEffectStream(path, read_ahead=2)
+        self.assertEqual(
+            [stream() for _ in range(3)], [{"id": 1}, {"id": 2}, {"id": 3}]
+        )
+        stream.close()
+        with self.assertRaises(StreamExhaustedError):
+            stream()
+
+    def test_custom_mock(self):
+        path = os.path.join(self.directory.name, "results.jsonl")
+        with open(path, "w") as file:
+            file.writelines(f"{json.dumps(value)}\n" for value in range(1000))
+
+        stream = SideEffectStream(path, read_ahead=8)
+        with IsolatedFunctionClone(call_per_item, check_one=stream) as function:
+            self.assertEqual(function([10, 20, 30]), [0, 1, 2])
+            function.context["check_one"].assert_called_with(30)
+        self.assertEqual(stream.consumed, 3)
+        self.assertLessEqual(stream.buffered, 8)
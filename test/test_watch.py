@@ -0,0 +1,165 @@
+import io
+import os
+import sys
+import textwrap
+import unittest
+from importlib import import_module, reload
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from funalone import IsolatedFunctionClone
+from funalone.watch import WatchRunner
+
+WATCHED_MODULE = """
+def double(value):
+    return value * 2
+
+
+def double_total(values):
+    return double(sum(values))
+
+
+class Counter:
+    def increment(self, value):
+        return value + 1
+"""
+
+DECORATED_MODULE = """
+import functools
+
+
+def logged(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+@logged
+def triple(value):
+    return value * 3
+"""
+
+
+class WatchTests(TestCase):
+    """Test case for the watch runner."""
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "watched_module.py")
+        self.write_source(WATCHED_MODULE)
+        sys.path.insert(0, self.directory.name)
+        self.module = import_module("watched_module")
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        sys.modules.pop("watched_module", None)
+        self.directory.cleanup()
+
+    def write_source(self, source: str):
+        with open(self.path, "w") as file:
+            file.write(textwrap.dedent(source))
+        # Make sure the modification time changes even on coarse clocks.
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_no_changes(self):
+        runner = WatchRunner()
+        runner.add_test(lambda: None, IsolatedFunctionClone(self.module.double))
+        self.assertIsNone(runner.check())
+
+    def test_swaps_changed_functions_and_reruns_affected_tests(self):
+        double = self.module.double
+        double_clone = IsolatedFunctionClone(double)
+        total_clone = IsolatedFunctionClone(
+            self.module.double_total, name_allow_list=["double"]
+        )
+        counter_clone = IsolatedFunctionClone(self.module.Counter.increment)
+
+        def test_double():
+            assert double_clone(2) == 4
+
+        def test_double_total():
+            assert total_clone([1, 2]) == 6
+
+        class CounterTest(TestCase):
+            def test_increment(self):
+                self.assertEqual(counter_clone(None, 1), 2)
+
+        runner = WatchRunner()
+        runner.add_test(test_double, double_clone)
+        runner.add_test(test_double_total, total_clone)
+        runner.add_test(CounterTest("test_increment"), counter_clone)
+
+        self.write_source(WATCHED_MODULE.replace("value * 2", "value * 3"))
+        result = runner.check()
+
+        self.assertEqual(result.swapped, ["watched_module:double"])
+        self.assertEqual(result.passed, [])
+        self.assertEqual(
+            sorted(result.failed),
+            [
+                "WatchTests.test_swaps_changed_functions_and_reruns_affected_tests"
+                ".<locals>.test_double",
+                "WatchTests.test_swaps_changed_functions_and_reruns_affected_tests"
+                ".<locals>.test_double_total",
+            ],
+        )
+        self.assertIs(self.module.double, double)
+        self.assertEqual(double(2), 6)
+        self.assertIsNone(runner.check())
+
+        self.write_source(
+            WATCHED_MODULE.replace("value * 2", "value * 3").replace(
+                "value + 1", "value + 2"
+            )
+        )
+        result = runner.check()
+        self.assertEqual(result.swapped, ["watched_module:Counter.increment"])
+        self.assertEqual(list(result.failed), [CounterTest("test_increment").id()])
+
+    def test_swaps_followed_callees(self):
+        total_clone = IsolatedFunctionClone(self.module.double_total, follow=["double"])
+
+        def test_double_total():
+            assert total_clone([1, 2]) == 6
+
+        runner = WatchRunner()
+        runner.add_test(test_double_total, total_clone)
+        self.write_source(WATCHED_MODULE.replace("value * 2", "value * 3"))
+        result = runner.check()
+
+        self.assertEqual(result.swapped, ["watched_module:double"])
+        self.assertEqual(len(result.failed), 1)
+        self.assertEqual(total_clone([1, 2]), 9)
+        self.assertEqual(
+            list(total_clone.followed_clones), [self.module.double.__code__]
+        )
+
+    def test_swaps_the_code_of_decorated_functions(self):
+        self.write_source(DECORATED_MODULE)
+        module = reload(self.module)
+        triple_clone = IsolatedFunctionClone(module.triple)
+
+        def test_triple():
+            assert triple_clone(2) == 6
+
+        runner = WatchRunner()
+        runner.add_test(test_triple, triple_clone)
+        self.write_source(DECORATED_MODULE.replace("value * 3", "value * 4"))
+        result = runner.check()
+
+        self.assertEqual(result.swapped, ["watched_module:triple"])
+        self.assertEqual(result.not_swapped, [])
+        self.assertEqual(len(result.failed), 1)
+        self.assertEqual(triple_clone(2), 8)
+
+    def test_run_prints_results(self):
+        clone = IsolatedFunctionClone(self.module.double)
+        stream = io.StringIO()
+        runner = WatchRunner(interval=0, stream=stream)
+        runner.add_test(unittest.FunctionTestCase(lambda: clone(1)), clone)
+        self.write_source(WATCHED_MODULE.replace("value * 2", "value * 3"))
+        runner.run(iterations=1)
+        self.assertIn("1 passed, 0 failed", stream.getvalue())
@@ -1,3 +1,10 @@
+import asyncio
+import os
+import pathlib
+import time
+from os import listdir
+from os.path import exists
+from unittest import TestCase, skip
 from unittest.mock import Mock
 from typing import Any
 
@@ -135,3 +142,209 @@ def raise_and_catch_custom_exception(a: int) -> None:
         raise CustomException(a)
     except CustomException as e:
         check_one(e, a)
+
+
+def join_paths(a: str, b: str) -> str:
+    """Example function.
+    Uses a function from a submodule of a module global."""
+    return os.path.join(a, b)
+
+
+def add(a: int, b: int) -> int:
+    """An example dependency with a real result."""
+    return a + b
+
+
+def add_twice(a: int, b: int) -> int:
+    """Example function.
+    Calls `add` twice, using the result of the first call."""
+    return add(add(a, b), b)
+
+
+def retry_with_backoff(attempts: int) -> float | None:
+    """Example function.
+    Calls `check_one` until it returns something truthy, sleeping between
+    attempts, and returns the time it took."""
+    start = time.monotonic()
+    for attempt in range(attempts):
+        if check_one(attempt):
+            return time.monotonic() - start
+        time.sleep(2**attempt)
+    return None
+
+
+async def sleep_then_get_time(delay: float) -> float:
+    """Example function.
+    Sleeps asynchronously and returns the current time."""
+    await asyncio.sleep(delay)
+    return time.time()
+
+
+async def gather_sleeps(delays: list[float]) -> tuple[float, str]:
+    """Example function.
+    Sleeps concurrently, measuring the loop time, and formats a date with
+    `time`."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(asyncio.sleep(delay) for delay in delays))
+    return loop.time() - start, time.strftime("%Y", time.gmtime(0))
+
+
+def count_lines(path: str) -> int:
+    """Example function.
+    Reads a file with the `open` builtin."""
+    with open(path) as file:
+        return len(file.readlines())
+
+
+def write_report(directory: str, lines: list[str]) -> bool:
+    """Example function.
+    Writes a file using `os` and `pathlib`."""
+    os.makedirs(directory, exist_ok=True)
+    report = pathlib.Path(directory) / "report.txt"
+    report.write_text("\n".join(lines))
+    return os.path.exists(report)
+
+
+def call_per_item(items: list[int]) -> list:
+    """Example function.
+    Calls `check_one` once per item and `check_two` once."""
+    check_two(items)
+    return [check_one(item) for item in items]
+
+
+def call_per_item_catching_errors(items: list[int]) -> list:
+    """Example function.
+    Calls `check_one` once per item, ignoring any error."""
+    try:
+        return [check_one(item) for item in items]
+    except Exception:
+        return []
+
+
+def make_strings(n: int) -> list[str]:
+    """Example function.
+    Allocates `n` strings of growing size."""
+    return ["x" * (i + 100) for i in range(n)]
+
+
+def clamp_to_limit(value: int) -> int:
+    """Example function.
+    Returns `value`, but never more than 10."""
+    if value > 10:
+        return 10
+    return value
+
+
+def count_down(n: int) -> int:
+    """Example function.
+    Loops until `n` reaches 0."""
+    while n != 0:
+        n -= 1
+    return n
+
+
+def normalize_line(line: str) -> str:
+    """Example helper, followed by `list_directory`."""
+    return line.strip().lower()
+
+
+def format_lines(lines: list[str]) -> list[str]:
+    """Example helper.
+    Normalizes every line with `normalize_line`."""
+    return [normalize_line(line) for line in lines]
+
+
+def format_path(path: str) -> str:
+    """Example helper.
+    Normalizes a path with `normalize_line`."""
+    return normalize_line(path)
+
+
+def list_directory(path: str) -> list[str]:
+    """Example function.
+    Lists a directory with `os`, and formats the names and the path with
+    same-module helpers."""
+    return format_lines(os.listdir(path)) + [format_path(path)]
+
+
+def average_of(values: list[int], default: float | None = None) -> float:
+    """Example function.
+    Divides by zero when `values` is empty and there is no default."""
+    if not values and default is not None:
+        return default
+    return sum(values) / len(values)
+
+
+def passing_isolated_test():
+    """Example test.
+    Calls an isolated clone of `add_twice`, allowing `add`."""
+    from funalone import IsolatedFunctionClone
+
+    clone = IsolatedFunctionClone(add_twice, name_allow_list=["add"])
+    assert clone(1, 2) == 5
+
+
+def failing_isolated_test():
+    """Example test.
+    Fails, since `add` is mocked."""
+    from funalone import IsolatedFunctionClone
+
+    clone = IsolatedFunctionClone(add_twice)
+    assert clone(1, 2) == 5, "add is mocked"
+
+
+class ExampleIsolatedTests(TestCase):
+    """Example test case.
+    Has a passing, a failing and a skipped test."""
+
+    def test_passes(self):
+        passing_isolated_test()
+
+    def test_fails(self):
+        failing_isolated_test()
+
+    @skip("skipped on purpose")
+    def test_is_skipped(self):
+        pass
+
+
+def templated_isolated_test():
+    """Example test.
+    Calls the clone template of `add_twice`, allowing `add`, and fails if the
+    template wasn't built before the test."""
+    from funalone.fork_server import _templates, clone_template
+
+    assert add_twice in _templates, "the template was built by the test"
+    clone = clone_template(add_twice, name_allow_list=["add"])
+    assert clone(1, 2) == 5
+    assert clone.context.to_debug_dict()["add"].metadata.total_access_count == 2
+
+
+def exiting_test():
+    """Example test.
+    Exits the process without cleaning up."""
+    os._exit(3)
+
+
+def save_environment(directory: str, name: str) -> str:
+    """Example function.
+    Writes an environment variable to a file, using `os` and `pathlib` for
+    things other than the filesystem too."""
+    path = pathlib.PurePosixPath(directory) / f"{name.lower()}.txt"
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        file.write(os.getenv(name, "") + os.linesep)
+    return str(path)
+
+
+def list_if_exists(directory: str) -> list[str]:
+    """Example function.
+    Lists a directory with functions imported from `os` and `os.path`."""
+    return listdir(directory) if exists(directory) else []
+
+
+def stat_file(path: str) -> int:
+    """Example function.
+    Reads the size of a file with `os.stat`."""
+    return os.stat(path).st_size